@@ -1,50 +1,96 @@
-from typing import Union, Tuple, Optional, List
-
-from board import Board
-from utils import GameState, Color, Shape, Coordinate, Algorithm
-
-
-# Helper dictionaries for translating between the board and the game state
-COLOR_MAP = {
-    "Red": Color.RED,
-    "Green": Color.GREEN,
-    "Blue": Color.BLUE,
-    "Yellow": Color.YELLOW
-}
-
-SHAPE_MAP = {
-    "Circle": Shape.CIRCLE,
-    "Square": Shape.SQUARE,
-    "Hexagon": Shape.STAR,   # Hexagon -> Star
-    "Triangle": Shape.TRIANGLE
-}
-
-CHIP_MAP = {
-    "BC": (Color.BLUE, Shape.CIRCLE),
-    "BS": (Color.BLUE, Shape.SQUARE),
-    "BH": (Color.BLUE, Shape.STAR),
-    "BT": (Color.BLUE, Shape.TRIANGLE),
-    "GC": (Color.GREEN, Shape.CIRCLE),
-    "GS": (Color.GREEN, Shape.SQUARE),
-    "GH": (Color.GREEN, Shape.STAR),
-    "GT": (Color.GREEN, Shape.TRIANGLE),
-    "RC": (Color.RED, Shape.CIRCLE),
-    "RS": (Color.RED, Shape.SQUARE),
-    "RH": (Color.RED, Shape.STAR),
-    "RT": (Color.RED, Shape.TRIANGLE),
-    "YC": (Color.YELLOW, Shape.CIRCLE),
-    "YS": (Color.YELLOW, Shape.SQUARE),
-    "YH": (Color.YELLOW, Shape.STAR),
-    "YT": (Color.YELLOW, Shape.TRIANGLE),
-}
+import threading
+from typing import TYPE_CHECKING, Union, Tuple, Optional, List
+
+from board import Board, DIRECTION_NAMES
+from compiled_board import CompiledBoard
+from utils import COLOR_MAP, SHAPE_MAP, CHIP_MAP, GameState, Color, Shape, Coordinate, Algorithm, SearchCache, GameResolutionInterface, Solution, SearchProgress
+
+if TYPE_CHECKING:
+    from board_catalog import BoardCatalog
+
+
+# Helper dictionaries for translating between the game state and the board
+COLOR_NAMES = {color: name for name, color in COLOR_MAP.items()}
+
+DIRECTION_NAMES_BY_DIRECTION = {direction: name for name, direction in DIRECTION_NAMES.items()}
+
+
+def create_resolver(
+    algorithm: Algorithm,
+    state: GameState,
+    cache: Optional[SearchCache] = None,
+    compiled_board: Optional[CompiledBoard] = None,
+    verbose: bool = False,
+) -> GameResolutionInterface:
+    """
+    Returns the resolver (BFS, A*, vectorized or external memory BFS) of an algorithm.
+    :param verbose: Whether the resolver reports its searches on the standard output.
+    """
+    if algorithm == Algorithm.BFS:
+        from solving_bfs import BFS
+        resolver = BFS(state, cache, compiled_board)
+    elif algorithm == Algorithm.A_STAR:
+        from solving_a_star import AStar
+        resolver = AStar(state, cache, compiled_board)
+    elif algorithm == Algorithm.BFS_VECTORIZED:
+        from solving_bfs_vectorized import VectorizedBFS
+        resolver = VectorizedBFS(state, cache, compiled_board)
+    elif algorithm == Algorithm.BFS_EXTERNAL:
+        from solving_bfs_external import ExternalMemoryBFS
+        resolver = ExternalMemoryBFS(state, cache, compiled_board)
+    else:
+        raise ValueError(f"Unsupported algorithm: {algorithm}")
+    resolver.verbose = verbose
+    return resolver
+
+
+class BackgroundResolution:
+    """
+    A resolution running in a worker thread, started by `AiAdapter.start_resolve`.
+    The caller polls `done` (e.g. once per frame) and reads `progress` meanwhile.
+    """
+
+    def __init__(self, resolver: GameResolutionInterface, state: GameState):
+        self.progress = SearchProgress()
+        self.solution: Optional[Solution] = None
+        self._thread = threading.Thread(target=self._run, args=(resolver, state), daemon=True)
+        self._thread.start()
+
+    def _run(self, resolver: GameResolutionInterface, state: GameState):
+        self.solution = resolver.resolve(state, self.progress)
+
+    def done(self) -> bool:
+        return not self._thread.is_alive()
+
+    def cancel(self):
+        """
+        Stops the search, its result is then ignored.
+        """
+        self.progress.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.progress.cancelled
 
 
 class AiAdapter:
-    def __init__(self, board: 'Board', algorithm: 'Algorithm'):
+    def __init__(self, board: 'Board', algorithm: 'Algorithm', catalog: Optional['BoardCatalog'] = None):
+        """
+        :param board: The board of the game.
+        :param algorithm: The algorithm resolving the game.
+        :param catalog: If provided, the compiled boards are loaded from it, along with their distance maps,
+            instead of being converted from the board.
+        """
         self.board = board
         self.algorithm = algorithm
-        self.moves: Optional[List[Tuple[Color, Coordinate]]] = None
+        self.catalog = catalog
+        self.moves: Optional[Solution] = None
         self.found_solution: Optional[bool] = None
+        # Static part of the game state and resolver of the current board layout, shared by all the requests
+        # made on that board. Both are rebuilt when `Board.layout_version` changes.
+        self._compiled_board: Optional[CompiledBoard] = None
+        self._resolver: Optional[GameResolutionInterface] = None
+        self._layout_version: Optional[int] = None
 
     def resolve(self):
         """
@@ -52,34 +98,74 @@ class AiAdapter:
         storing the moves needed to reach the target.
         """
         state = self._convert_board_to_game_state()
-        resolver = self._get_resolver(state)
-        res = resolver.resolve()
-        self.moves = res
-        if res is None:
+        self._store_solution(self._get_board_resolver(state).resolve(state))
+
+    def start_resolve(self) -> BackgroundResolution:
+        """
+        Same as `resolve`, but the search runs in a worker thread so the caller stays responsive.
+        The board is converted before returning, so the robots can move while the search runs.
+        Once the resolution is done, `finish_resolve` stores its moves.
+        """
+        state = self._convert_board_to_game_state()
+        return BackgroundResolution(self._get_board_resolver(state), state)
+
+    def finish_resolve(self, resolution: BackgroundResolution):
+        """
+        Stores the moves found by a finished background resolution.
+        """
+        self._store_solution(None if resolution.cancelled else resolution.solution)
+
+    def _store_solution(self, solution: Optional[Solution]):
+        self.moves = solution
+        if solution is None:
             self.found_solution = False
         else:
             self.found_solution = True
 
+    def _get_resolver(
+        self,
+        state: GameState,
+        cache: Optional[SearchCache] = None,
+        compiled_board: Optional[CompiledBoard] = None,
+    ) -> GameResolutionInterface:
+        """
+        Returns the appropriate resolver based on self.algorithm, reporting its searches on the console of the game.
+        """
+        return create_resolver(self.algorithm, state, cache, compiled_board, verbose=True)
 
-    def _get_resolver(self, state: GameState):
+    def _get_board_resolver(self, state: GameState) -> GameResolutionInterface:
         """
-        Returns the appropriate resolver (BFS or A*) based on self.algorithm.
+        Returns the resolver of the current board, so that a new search after some player moves
+        reuses the compiled board, the distance maps and the solutions found by the previous ones.
+        A new resolver is only built when the board layout changes.
         """
-        if self.algorithm == Algorithm.BFS:
-            from solving_bfs import BFS
-            return BFS(state)
-        elif self.algorithm == Algorithm.A_STAR:
-            from solving_a_star import AStar
-            return AStar(state)
-        else:
-            raise ValueError(f"Unsupported algorithm: {self.algorithm}")
+        compiled_board = self.get_compiled_board()
+        if self._resolver is None:
+            self._resolver = self._get_resolver(state, SearchCache(), compiled_board)
+        return self._resolver
+
+    def get_compiled_board(self) -> CompiledBoard:
+        """
+        Returns the static part (walls, mirrors, chips) of the current board, only converting it again
+        after `Board.initialize_board` or `Board.reset_parameters` ran.
+        """
+        if self._compiled_board is None or self._layout_version != self.board.layout_version:
+            if self.catalog is not None and self.board.map_index is not None:
+                from board_catalog import get_board_id
+                self._compiled_board = self.catalog.get_board(get_board_id(self.board.map_index))
+            else:
+                # Shares the move tables of the board, only the chips are added
+                self._compiled_board = self.board.compiled_board.with_chips(self._create_chips())
+            self._resolver = None
+            self._layout_version = self.board.layout_version
+        return self._compiled_board
 
     def get_converted_moves(self) -> List[List[str]]:
         """
         Converts the moves into [[direction, color], ...], for example:
         [
-            ["UP", "RED"],
-            ["RIGHT", "GREEN"],
+            ["Up", "Red"],
+            ["Right", "Green"],
             ...
         ]
         :return: List of moves in the format [[direction, color], ...]
@@ -87,92 +173,27 @@ class AiAdapter:
         if not self.moves:
             return []
 
-        # Initialize current positions of each robot color
-        color_positions = {}
-        for robot in self.board.robots:
-            color_enum = COLOR_MAP.get(robot.color)
-            if color_enum:
-                color_positions[color_enum] = Coordinate(robot.x, robot.y)
-            else:
-                print(f"Unsupported robot color: {robot.color}")
-
-        converted_moves = []
-        for (color, new_coord) in self.moves:
-            old_coord = color_positions[color]
-            dx = new_coord.x - old_coord.x
-            dy = new_coord.y - old_coord.y
-
-            if dx < 0:
-                direction = "Left"
-            elif dx > 0:
-                direction = "Right"
-            elif dy < 0:
-                direction = "Up"
-            elif dy > 0:
-                direction = "Down"
-            else:
-                # No movement (rare/not expected)
-                continue
-
-            converted_moves.append([direction, color.name])
-            color_positions[color] = new_coord
-
-        return converted_moves
+        return [[DIRECTION_NAMES_BY_DIRECTION[direction], COLOR_NAMES[color]] for color, direction in self.moves.decode()]
 
     def _convert_board_to_game_state(self) -> GameState:
         """
         Converts the Board into a GameState, including walls, chips, pawns, and current target.
+        The walls, mirrors and chips grids come from the compiled board cache, only the pawns and the target
+        are read again from the board.
         """
-        walls = self._create_walls()
-        chips = self._create_chips()
+        compiled_board = self.get_compiled_board()
         robots = self._get_robot_positions()
         target = (self._translate_color(), self._translate_shape())
 
         return GameState(
-            board_size=self.board.grid_size,
-            walls=walls,
-            mirrors=[[(None, None) for _ in range(self.board.grid_size)] for _ in range(self.board.grid_size)],
-            chips=chips,
+            board_size=compiled_board.board_size,
+            walls=compiled_board.walls,
+            mirrors=compiled_board.mirrors,
+            chips=compiled_board.chips,
             pawns=robots,
             current_target=target
         )
 
-    def _create_walls(self) -> List[List[Tuple[bool, bool, bool, bool]]]:
-        """
-        Generates the walls grid for the GameState.
-        Each cell is a tuple (up, right, down, left).
-        """
-        size = self.board.grid_size
-        # Initialize all to no walls
-        walls = [[(False, False, False, False) for _ in range(size)] for _ in range(size)]
-
-        # Vertical walls
-        for (x, y) in self.board.walls['Vertical']:
-            up_walls = walls[x - 1][y]
-            walls[x - 1][y] = (up_walls[0], True, up_walls[2], up_walls[3])
-            down_walls = walls[x][y]
-            walls[x][y] = (down_walls[0], down_walls[1], down_walls[2], True)
-
-        # Horizontal walls
-        for (x, y) in self.board.walls['Horizontal']:
-            left_walls = walls[x][y - 1]
-            walls[x][y - 1] = (left_walls[0], left_walls[1], True, left_walls[3])
-            right_walls = walls[x][y]
-            walls[x][y] = (True, right_walls[1], right_walls[2], right_walls[3])
-
-        # Surrounding walls
-        for i in range(size):
-            # Top row
-            walls[i][0] = (True, walls[i][0][1], walls[i][0][2], walls[i][0][3])
-            # Bottom row
-            walls[i][size - 1] = (walls[i][size - 1][0], walls[i][size - 1][1], True, walls[i][size - 1][3])
-            # Left col
-            walls[0][i] = (walls[0][i][0], True, walls[0][i][2], walls[0][i][3])
-            # Right col
-            walls[size - 1][i] = (walls[size - 1][i][0], walls[size - 1][i][1], walls[size - 1][i][2], True)
-
-        return walls
-
     def _create_chips(self) -> List[List[Tuple[Optional[Color], Optional[Shape]]]]:
         """
         Creates the chips grid for the GameState based on the board targets.
@@ -0,0 +1,103 @@
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+from board import Board
+from robot import Robot
+
+
+class MoveAnimator:
+    """
+    Plays a move sequence on the board, one frame at a time.
+    Each move is applied to the board when it starts, then the robot is drawn sliding from its previous cell
+    to the new one during `move_duration` seconds (see `Board.robot_draw_positions`).
+    `update` is called once per frame by the game loop, with the time elapsed since the previous frame.
+    """
+
+    def __init__(self, board: Board, move_duration: float = 0.5):
+        self.board = board
+        self.move_duration = move_duration
+        """
+        Seconds taken by one move, lower is faster.
+        """
+        self._pending: Deque[List[str]] = deque()
+        self._robot: Optional[Robot] = None
+        self._start: Tuple[int, int] = (0, 0)
+        self._elapsed = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return self._robot is not None or bool(self._pending)
+
+    def start(self, move_sequence: List[List[str]]):
+        """
+        Plays the given moves after the running ones.
+        :param move_sequence: The moves as [[direction, color], ...]
+        """
+        self._pending.extend(move_sequence)
+
+    def stop(self):
+        """
+        Drops the remaining moves, the running one ends at its destination.
+        """
+        self._pending.clear()
+        self._end_move()
+        self._elapsed = 0.0
+
+    def skip(self):
+        """
+        Applies all the remaining moves at once.
+        :return: False if one of the moves was invalid.
+        """
+        self._end_move()
+        self._elapsed = 0.0
+        while self._pending:
+            if not self._start_move(*self._pending.popleft()):
+                return False
+            self._end_move()
+        return True
+
+    def update(self, elapsed_ms: float) -> bool:
+        """
+        Advances the animation.
+        :param elapsed_ms: Milliseconds since the previous frame, as returned by `pygame.time.Clock.tick`.
+        :return: False if a move of the sequence was invalid, the remaining moves are then dropped.
+        """
+        self._elapsed += elapsed_ms / 1000
+        while self.is_running:
+            if self._robot is None:
+                if not self._start_move(*self._pending.popleft()):
+                    return False
+            if self._elapsed < self.move_duration:
+                progress = self._elapsed / self.move_duration
+                (start_x, start_y), robot = self._start, self._robot
+                self.board.robot_draw_positions[robot.color] = (
+                    start_x + (robot.x - start_x) * progress,
+                    start_y + (robot.y - start_y) * progress,
+                )
+                return True
+            # Several moves may end within a slow frame
+            self._elapsed -= self.move_duration
+            self._end_move()
+        self._elapsed = 0.0
+        return True
+
+    def _start_move(self, direction: str, color: str) -> bool:
+        # Change selected robot if needed
+        if self.board.selected_robot.color != color:
+            for robot in self.board.robots:
+                if robot.color == color:
+                    self.board.selected_robot = robot
+
+        robot = self.board.selected_robot
+        start = (robot.x, robot.y)
+        if not self.board.move_robot(direction):
+            self.board.ai_error = True
+            self._pending.clear()
+            return False
+        self._robot, self._start = robot, start
+        return True
+
+    def _end_move(self):
+        if self._robot is not None:
+            self.board.robot_draw_positions.pop(self._robot.color, None)
+            self._robot = None
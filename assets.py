@@ -0,0 +1,61 @@
+import os
+from typing import Dict, Tuple
+
+import pygame
+
+
+class AssetManager:
+    """
+    Icons of the `icon/` folder, decoded once and shared by all the boards, also across restarts.
+    The icons scaled to a given size are packed into a single atlas surface, each icon being a subsurface of it.
+    """
+
+    def __init__(self, icon_directory: str = "icon"):
+        self.icon_directory = icon_directory
+        self._images: Dict[str, pygame.Surface] = {}
+        """
+        Decoded icons by name (file name without extension), at their original size.
+        """
+        self._atlases: Dict[int, Tuple[bool, Dict[str, pygame.Surface]]] = {}
+        """
+        Icons scaled to a size, and whether their atlas was converted to the display format.
+        """
+
+    def get_icons(self, size: int) -> Dict[str, pygame.Surface]:
+        """
+        Returns the icons scaled to size x size pixels, by name (e.g. "Red", "BC", "Rain").
+        The atlas is converted to the display format once a display mode is set, for faster blits.
+        """
+        converted, icons = self._atlases.get(size, (False, None))
+        if icons is None or (not converted and pygame.display.get_surface() is not None):
+            converted, icons = self._atlases[size] = self._build_atlas(size)
+        return icons
+
+    def _load_images(self) -> Dict[str, pygame.Surface]:
+        if not self._images:
+            for file_name in sorted(os.listdir(self.icon_directory)):
+                name, extension = os.path.splitext(file_name)
+                if extension.lower() != ".png":
+                    continue
+                try:
+                    self._images[name] = pygame.image.load(os.path.join(self.icon_directory, file_name))
+                except pygame.error as e:
+                    print(f"Error loading image {file_name}: {e}")
+        return self._images
+
+    def _build_atlas(self, size: int) -> Tuple[bool, Dict[str, pygame.Surface]]:
+        images = self._load_images()
+        atlas = pygame.Surface((max(size * len(images), 1), size), pygame.SRCALPHA)
+        for index, image in enumerate(images.values()):
+            # Copies the pixels as is onto the transparent atlas, instead of blending them
+            atlas.blit(pygame.transform.scale(image, (size, size)), (index * size, 0), special_flags=pygame.BLEND_RGBA_MAX)
+
+        converted = pygame.display.get_surface() is not None
+        if converted:
+            atlas = atlas.convert_alpha()
+        icons = {name: atlas.subsurface((index * size, 0, size, size)) for index, name in enumerate(images)}
+        return converted, icons
+
+
+# Shared by all the boards
+assets = AssetManager()
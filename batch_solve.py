@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import IO, Dict, Iterator, List, Optional, Set, Tuple
+
+from puzzles import get_board_key, init_worker, solve_puzzle
+from utils import Algorithm
+from wire_format import pack_puzzle, unpack_puzzle
+
+
+def read_jsonl_puzzles(path: str) -> Iterator[Tuple[int, dict]]:
+    """
+    Stream the puzzles of a JSONL file, one `puzzles.encode_puzzle` object per line.
+    :return: The index (line number, from 0) and the puzzle.
+    """
+    with open(path) as file:
+        for index, line in enumerate(file):
+            if line.strip():
+                yield index, json.loads(line)
+
+
+def is_puzzle_file(path: str) -> bool:
+    """
+    Tell a puzzle file (see `puzzle_file`) from a JSONL file by its content.
+    """
+    from puzzle_file import MAGIC
+
+    with open(path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def read_puzzles(path: str) -> Iterator[Tuple[int, dict]]:
+    """
+    Stream the puzzles of a JSONL file or of a puzzle file (see `puzzle_file`).
+    """
+    if is_puzzle_file(path):
+        from puzzle_file import PuzzleFile
+        return PuzzleFile(path).iter_puzzles()
+    return read_jsonl_puzzles(path)
+
+
+def read_boards(path: str) -> List[dict]:
+    """
+    Get the boards listed by a puzzle file, none for a JSONL file.
+    """
+    if is_puzzle_file(path):
+        from puzzle_file import PuzzleFile
+        return PuzzleFile(path).boards
+    return []
+
+
+def load_checkpoint(path: str) -> Set[int]:
+    """
+    Get the indices of the puzzles already solved by an interrupted run, from its results.
+    The line being written when it was interrupted is removed from the file.
+    """
+    done = set()
+    valid_size = 0
+    with open(path, "rb") as file:
+        for line in file:
+            try:
+                done.add(json.loads(line)["index"])
+            except (ValueError, KeyError):
+                break
+            valid_size += len(line)
+    with open(path, "r+b") as file:
+        file.truncate(valid_size)
+    return done
+
+
+def _solve_chunk(chunk: List[Tuple[int, bytes]], algorithm: str, budget: Optional[float]) -> List[dict]:
+    results = []
+    for index, packed in chunk:
+        try:
+            results.append({"index": index, **solve_puzzle(unpack_puzzle(packed), Algorithm[algorithm], budget)})
+        except Exception as e:
+            results.append(_get_error_result(index, e))
+    return results
+
+
+def _get_error_result(index: int, error: Exception) -> dict:
+    return {"index": index, "status": "error", "error": f"{type(error).__name__}: {error}"}
+
+
+def _iter_chunks(
+    puzzles: Iterator[Tuple[int, dict]], done: Set[int], chunk_size: int, board_ids: Dict[str, int], errors: List[dict]
+) -> Iterator[List[Tuple[int, bytes]]]:
+    """
+    Group the puzzles to solve in chunks, packed with `wire_format.pack_puzzle`: the boards of `board_ids`
+    (by `puzzles.get_board_key`) are given by their id. The error results of the puzzles that can't be packed
+    are added to `errors`.
+    """
+    chunk = []
+    for index, puzzle in puzzles:
+        if index in done:
+            continue
+        try:
+            chunk.append((index, pack_puzzle(puzzle, board_ids.get(get_board_key(puzzle["board"])))))
+        except Exception as e:
+            errors.append(_get_error_result(index, e))
+            continue
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def batch_solve(
+    input_path: str,
+    output: IO[str],
+    algorithm: Algorithm = Algorithm.BFS_VECTORIZED,
+    workers: Optional[int] = None,
+    budget: Optional[float] = None,
+    chunk_size: int = 16,
+    max_in_flight: Optional[int] = None,
+    done: Optional[Set[int]] = None,
+) -> int:
+    """
+    Solve a stream of puzzles in a pool of processes, writing one JSON result per line as soon as it is ready:
+    `{"index": ..., "status": ..., "moves": ..., "length": ..., "nodes": ..., "time": ...}` (see `puzzles.solve_puzzle`).
+    A puzzle that can't be solved (invalid puzzle, failed process...) gets `{"index": ..., "status": "error",
+    "error": ...}` instead, and the run goes on: it is done as well for `--resume`.
+    The input is only read as fast as the results are written: at most `max_in_flight` chunks are waiting
+    or being solved. The puzzles are sent to the processes in the binary form of `wire_format`, and the boards
+    of a puzzle file are published once in shared memory for all of them (see `shared_boards`).
+    :param input_path: The JSONL or puzzle file.
+    :param output: Where the results are written, in completion order.
+    :param algorithm: The algorithm to use.
+    :param workers: The number of processes, the number of CPUs by default.
+    :param budget: The number of seconds allowed to each puzzle, unlimited if not provided.
+    :param chunk_size: The number of puzzles sent at once to a process.
+    :param max_in_flight: The number of chunks in flight, twice the number of processes by default.
+    :param done: The indices of the puzzles to skip, solved by a previous run.
+    :return: The number of results written by this run, errors included.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * workers
+    boards = read_boards(input_path)
+    board_ids = {get_board_key(board): board_id for board_id, board in enumerate(boards)}
+    errors: List[dict] = []
+    chunks = _iter_chunks(read_puzzles(input_path), done or set(), chunk_size, board_ids, errors)
+    solved = 0
+    start_time = time.perf_counter()
+
+    board_tables = None
+    if boards:
+        from shared_boards import SharedBoardTables
+        board_tables = SharedBoardTables.publish(boards)
+    try:
+        with ProcessPoolExecutor(workers, initializer=init_worker,
+                                 initargs=(board_tables.name if board_tables is not None else None,)) as pool:
+            # Indices of the puzzles of each chunk in flight
+            pending: Dict[Future, List[int]] = {}
+            while True:
+                for chunk in chunks:
+                    pending[pool.submit(_solve_chunk, chunk, algorithm.name, budget)] = [index for index, _ in chunk]
+                    if len(pending) >= max_in_flight:
+                        break
+                for result in errors:
+                    output.write(json.dumps(result) + "\n")
+                solved += len(errors)
+                errors.clear()
+                if not pending:
+                    break
+
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    indices = pending.pop(future)
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        # The whole chunk failed (process killed...)
+                        results = [_get_error_result(index, e) for index in indices]
+                    for result in results:
+                        output.write(json.dumps(result) + "\n")
+                    solved += len(results)
+                output.flush()
+                print(f"{solved} puzzles solved ({solved / (time.perf_counter() - start_time):.1f}/s)", file=sys.stderr)
+    finally:
+        if board_tables is not None:
+            board_tables.close()
+    return solved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a file of puzzles in parallel, one JSON result per line.")
+    parser.add_argument("input", help="JSONL file of puzzles or puzzle file")
+    parser.add_argument("output", help="JSONL file of the results, in completion order")
+    parser.add_argument("--algorithm", default=Algorithm.BFS_VECTORIZED.name, choices=Algorithm.__members__)
+    parser.add_argument("--workers", type=int, default=None, help="Number of solver processes (default: CPU count)")
+    parser.add_argument("--budget", type=float, default=None, help="Seconds allowed per puzzle")
+    parser.add_argument("--chunk-size", type=int, default=16, help="Puzzles sent at once to a process")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="Chunks in flight (default: 2 per process)")
+    parser.add_argument("--resume", action="store_true", help="Skip the puzzles already in the output and append to it")
+    args = parser.parse_args()
+
+    done = load_checkpoint(args.output) if args.resume and os.path.exists(args.output) else set()
+    if done:
+        print(f"Resuming after {len(done)} solved puzzles", file=sys.stderr)
+    with open(args.output, "a" if args.resume else "w") as output:
+        batch_solve(
+            args.input, output, Algorithm[args.algorithm], args.workers, args.budget,
+            args.chunk_size, args.max_in_flight, done,
+        )
+
+
+if __name__ == "__main__":
+    main()
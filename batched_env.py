@@ -0,0 +1,157 @@
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from compiled_board import DIRECTION_DELTAS, CompiledBoard
+from utils import Color
+
+
+def clip_slides(start: np.ndarray, stop: np.ndarray, delta, others: Sequence[np.ndarray], board_size: int) -> np.ndarray:
+    """
+    Vectorized version of the blocker clipping of `CompiledBoard.move`.
+    :param start: The cells of the moving pawns.
+    :param stop: Their stop cells on an empty board, from the slide tables.
+    :param delta: The cell offset of one step in the direction of each move (array or scalar).
+    :param others: The cells of the other pawns, one array per pawn. The moving pawn itself may be included.
+    :param board_size: The size of the grid of the game board.
+    :return: The cells where the pawns stop, in front of the nearest pawn on their way.
+    """
+    horizontal = np.abs(delta) == 1
+    # Number of cells each pawn slides, shortened by the pawns on its way
+    steps = (stop - start) // delta
+    for other in others:
+        same_line = np.where(horizontal, other // board_size == start // board_size, (other - start) % board_size == 0)
+        ahead = (other - start) // delta
+        blocking = same_line & (ahead > 0) & (ahead <= steps)
+        steps = np.where(blocking, ahead - 1, steps)
+    return start + steps * delta
+
+
+class BatchedEnvironment:
+    """
+    Many games stepped at once, for agent training and load testing.
+    The games are NumPy arrays: each game plays on one of the given boards (`board_ids`), the robots are an
+    (N, R) array of cells (`y * board_size + x`, robots in the `GameState.pawns` order) and `step` moves one
+    robot per game through the slide tables of the compiled boards, clipped by the other robots.
+
+    Actions use the encoding of the solutions: `robot << 2 | direction` (see `utils.encode_move`).
+    Boards with mirrors are not supported.
+    """
+
+    def __init__(
+        self,
+        boards: Sequence[CompiledBoard],
+        num_games: int,
+        num_robots: int = len(Color),
+        seed: Optional[int] = None,
+    ):
+        """
+        :param boards: The boards the games are sampled from, all of the same size and with their chips.
+            `AiAdapter.get_compiled_board` gives the compiled board of a `Board`.
+        :param num_games: The number of games N.
+        :param num_robots: The number of robots R of each game.
+        :param seed: The seed of the puzzle sampling.
+        """
+        if not boards:
+            raise ValueError("At least one board is needed.")
+        size = boards[0].board_size
+        if any(board.board_size != size for board in boards):
+            raise ValueError("All the boards must have the same size.")
+        if any(board.has_mirrors for board in boards):
+            raise ValueError("Boards with mirrors are not supported.")
+
+        self.boards = list(boards)
+        self.board_size = size
+        self.num_robots = num_robots
+        self.rng = np.random.default_rng(seed)
+        self.deltas = np.array([dx + dy * size for dx, dy in DIRECTION_DELTAS.values()], dtype=np.int32)
+
+        # (B, 4, C) stop cells and (B, C) wall masks, bit `direction` set when a wall or the border is in the way
+        self.slides = np.array([board.slides for board in boards], dtype=np.int32)
+        self.wall_masks = np.zeros((len(boards), size * size), dtype=np.uint8)
+        for direction in range(4):
+            blocked = np.array([board.neighbours[direction] for board in boards]) < 0
+            self.wall_masks |= blocked.astype(np.uint8) << direction
+
+        # (B, K) chips of each board, padded with -1
+        max_chips = max(len(board.chip_coordinates) for board in boards)
+        self.chip_counts = np.array([len(board.chip_coordinates) for board in boards])
+        self.chip_cells = np.full((len(boards), max_chips), -1, dtype=np.int32)
+        self.chip_colors = np.full((len(boards), max_chips), -1, dtype=np.int32)
+        for b, board in enumerate(boards):
+            for k, ((color, _), coordinates) in enumerate(board.chip_coordinates.items()):
+                self.chip_cells[b, k] = board.index_of(coordinates)
+                self.chip_colors[b, k] = color.value
+        if self.chip_counts.min() == 0:
+            raise ValueError("Every board needs at least one chip.")
+
+        # The robots start anywhere but on the 4 center cells, chips included, as in `Board.generate_robots_and_target`
+        # and `generate_corpus.sample_puzzles`
+        center = size // 2
+        excluded = {(y * size + x) for x in (center - 1, center) for y in (center - 1, center)}
+        self.start_cells = np.array(sorted(set(range(size * size)) - excluded), dtype=np.int32)
+
+        self.board_ids = np.zeros(num_games, dtype=np.int32)
+        self.positions = np.zeros((num_games, num_robots), dtype=np.int32)
+        self.target_cells = np.zeros(num_games, dtype=np.int32)
+        self.target_robots = np.zeros(num_games, dtype=np.int32)
+        self.moves = np.zeros(num_games, dtype=np.int32)
+        self.done = np.zeros(num_games, dtype=bool)
+        self.reset()
+
+    @property
+    def num_games(self) -> int:
+        return len(self.positions)
+
+    def reset(self, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Samples new puzzles: a board, distinct robot cells and a chip to reach. As in the game, the target robot
+        may start on its chip, the game is then only done once it moves back to it.
+        :param mask: The games to reset, as a boolean array of size N. Defaults to all of them.
+        :return: The robot positions, (N, R).
+        """
+        games = np.arange(self.num_games) if mask is None else np.flatnonzero(mask)
+        count = len(games)
+        board_ids = self.rng.integers(0, len(self.boards), size=count)
+        self.board_ids[games] = board_ids
+
+        cells = self.start_cells
+        picks = self.rng.integers(0, len(cells), size=(count, self.num_robots))
+        # Draws again the few games where two robots got the same cell
+        while True:
+            sorted_picks = np.sort(picks, axis=1)
+            collisions = np.flatnonzero((sorted_picks[:, 1:] == sorted_picks[:, :-1]).any(axis=1))
+            if len(collisions) == 0:
+                break
+            picks[collisions] = self.rng.integers(0, len(cells), size=(len(collisions), self.num_robots))
+        self.positions[games] = cells[picks]
+
+        chips = (self.rng.random(count) * self.chip_counts[board_ids]).astype(np.int32)
+        self.target_cells[games] = self.chip_cells[board_ids, chips]
+        self.target_robots[games] = self.chip_colors[board_ids, chips]
+        self.moves[games] = 0
+        self.done[games] = False
+        return self.positions
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Plays one move in each game that is not done yet.
+        :param actions: The move of each game, `robot << 2 | direction`, as an integer array of size N.
+        :return: The robot positions (N, R) and, for each game, whether its target was reached by this move.
+        """
+        actions = np.asarray(actions)
+        games = np.flatnonzero(~self.done)
+        robots = actions[games] >> 2
+        directions = actions[games] & 3
+
+        start = self.positions[games, robots]
+        stop = self.slides[self.board_ids[games], directions, start]
+        others = [self.positions[games, other_robot] for other_robot in range(self.num_robots)]
+        end = clip_slides(start, stop, self.deltas[directions], others, self.board_size)
+        self.positions[games, robots] = end
+        self.moves[games] += 1
+
+        reached = np.zeros(self.num_games, dtype=bool)
+        reached[games] = (robots == self.target_robots[games]) & (end == self.target_cells[games])
+        self.done |= reached
+        return self.positions, reached
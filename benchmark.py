@@ -0,0 +1,291 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ai_adapter import create_resolver
+from puzzle_file import UNKNOWN_LENGTH, PuzzleFile, PuzzleFileWriter
+from puzzles import decode_puzzle, get_board_key
+from utils import Algorithm, GameResolutionInterface, SearchCache, SearchProgress
+
+DEFAULT_CORPUS = "benchmark_corpus.bin"
+
+# Optimal solution lengths of each bucket of the corpus, both ends included (None: no upper bound)
+BUCKETS: Dict[str, Tuple[int, Optional[int]]] = {
+    "1-3": (1, 3),
+    "4-6": (4, 6),
+    "7+": (7, None),
+}
+
+# Metrics compared by `compare`, with the direction of a regression (+1: higher is worse, -1: lower is worse)
+COMPARED_METRICS = {
+    "latency_p50_ms": 1,
+    "latency_p95_ms": 1,
+    "latency_p99_ms": 1,
+    "nodes_mean": 1,
+    "peak_memory_p50_kb": 1,
+    "solved": -1,
+    "optimal": -1,
+}
+
+# Latency changes below this many milliseconds are noise, whatever their relative change
+LATENCY_NOISE_MS = 1.0
+
+
+def get_bucket(length: int) -> Optional[str]:
+    """
+    Get the bucket of an optimal solution length, None for a puzzle already solved or of unknown length.
+    """
+    if length == UNKNOWN_LENGTH:
+        return None
+    for name, (low, high) in BUCKETS.items():
+        if low <= length and (high is None or length <= high):
+            return name
+    return None
+
+
+def build_corpus(path: str, per_bucket: int = 12, seed: int = 0, candidates: int = 400, budget: Optional[float] = 20):
+    """
+    Write the benchmark corpus: a puzzle file (see `puzzle_file`) of `per_bucket` puzzles of each bucket,
+    drawn from a corpus generated by `generate_corpus` with the optimal BFS. The same seed gives the same corpus.
+    :param path: The puzzle file to write.
+    :param per_bucket: The number of puzzles of each bucket.
+    :param seed: The seed of the corpus.
+    :param candidates: The number of puzzles generated to draw from.
+    :param budget: The number of seconds allowed to label a candidate.
+    """
+    from generate_corpus import generate_corpus
+
+    with tempfile.TemporaryDirectory() as directory:
+        candidates_path = os.path.join(directory, "candidates.bin")
+        generate_corpus(candidates_path, candidates, seed, budget=budget)
+        corpus = PuzzleFile(candidates_path)
+        lengths = np.array(corpus.records["length"])
+
+        rng = random.Random(seed)
+        picks = []
+        for name in BUCKETS:
+            in_bucket = [index for index, length in enumerate(lengths.tolist()) if get_bucket(length) == name]
+            if len(in_bucket) < per_bucket:
+                raise ValueError(f"Only {len(in_bucket)} candidates of {name} moves, generate more of them.")
+            picks.extend(sorted(rng.sample(in_bucket, per_bucket)))
+
+        with PuzzleFileWriter(path, corpus.boards, corpus.robot_count) as writer:
+            writer.write(np.array(corpus.records[picks]))
+
+
+def _percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def _solve(resolver: GameResolutionInterface, puzzle: dict, budget: Optional[float]) -> dict:
+    """
+    Solve a puzzle with a cleared search cache, so that the puzzles don't reuse each other's results.
+    """
+    state, _ = decode_puzzle(puzzle, resolver.board)
+    resolver.cache.transpositions.clear()
+    progress = SearchProgress()
+    timer = None
+    if budget is not None:
+        timer = threading.Timer(budget, progress.cancel)
+        timer.daemon = True
+        timer.start()
+    start_time = time.perf_counter()
+    try:
+        solution = resolver.resolve(state, progress)
+    finally:
+        elapsed = time.perf_counter() - start_time
+        if timer is not None:
+            timer.cancel()
+    return {
+        "solved": solution is not None,
+        "timeout": progress.cancelled,
+        "length": len(solution) if solution is not None else None,
+        "nodes": progress.nodes,
+        "time": elapsed,
+    }
+
+
+def run_algorithm(puzzles: List[dict], algorithm: Algorithm, budget: Optional[float], memory: bool = True) -> List[dict]:
+    """
+    Solve each puzzle of the corpus with an algorithm.
+    The resolver of each board is created and run once before the measures (compiled board, distance maps...).
+    When `memory` is set, the puzzles are then solved again under tracemalloc for the peak memory of each search,
+    which slows them down too much to time them in the same run.
+    :return: For each puzzle: solved, timeout, length, nodes, time (seconds) and peak_memory (bytes, if measured).
+    """
+    resolvers: Dict[str, GameResolutionInterface] = {}
+    for puzzle in puzzles:
+        key = get_board_key(puzzle["board"])
+        if key not in resolvers:
+            state, board = decode_puzzle(puzzle)
+            resolvers[key] = create_resolver(algorithm, state, SearchCache(), board)
+            _solve(resolvers[key], puzzle, budget)
+
+    results = [_solve(resolvers[get_board_key(puzzle["board"])], puzzle, budget) for puzzle in puzzles]
+
+    if memory:
+        tracemalloc.start()
+        try:
+            for puzzle, result in zip(puzzles, results):
+                resolver = resolvers[get_board_key(puzzle["board"])]
+                tracemalloc.reset_peak()
+                baseline, _ = tracemalloc.get_traced_memory()
+                _solve(resolver, puzzle, budget)
+                result["peak_memory"] = tracemalloc.get_traced_memory()[1] - baseline
+        finally:
+            tracemalloc.stop()
+    return results
+
+
+def summarize(puzzles: List[dict], results: List[dict]) -> dict:
+    """
+    Metrics of the results of one algorithm on the puzzles of one bucket.
+    The latencies include the searches out of budget, a solution is optimal when it has the labelled length.
+    """
+    times = [result["time"] * 1000 for result in results]
+    nodes = [result["nodes"] for result in results]
+    summary = {
+        "puzzles": len(results),
+        "solved": sum(result["solved"] for result in results),
+        "timeouts": sum(result["timeout"] for result in results),
+        "optimal": sum(result["length"] == puzzle["length"] for puzzle, result in zip(puzzles, results)),
+        "excess_moves": sum(result["length"] - puzzle["length"] for puzzle, result in zip(puzzles, results) if result["solved"]),
+        "latency_p50_ms": _percentile(times, 50),
+        "latency_p95_ms": _percentile(times, 95),
+        "latency_p99_ms": _percentile(times, 99),
+        "nodes_mean": float(np.mean(nodes)) if nodes else 0.0,
+        "nodes_p95": _percentile(nodes, 95),
+    }
+    if results and "peak_memory" in results[0]:
+        memory = [result["peak_memory"] / 1024 for result in results]
+        summary["peak_memory_p50_kb"] = _percentile(memory, 50)
+        summary["peak_memory_max_kb"] = max(memory)
+    return summary
+
+
+def run_benchmark(
+    corpus_path: str = DEFAULT_CORPUS,
+    algorithms: Optional[List[Algorithm]] = None,
+    budget: Optional[float] = 10,
+    memory: bool = True,
+) -> dict:
+    """
+    Run algorithms over the benchmark corpus.
+    :param corpus_path: The puzzle file written by `build_corpus`.
+    :param algorithms: The algorithms to run, all of them by default.
+    :param budget: The number of seconds allowed to each search.
+    :param memory: Whether to measure the peak memory of the searches.
+    :return: The JSON report: `{"corpus": ..., "budget": ..., "python": ..., "results": {algorithm: {bucket: metrics}}}`.
+    """
+    corpus = PuzzleFile(corpus_path)
+    puzzles = [puzzle for _, puzzle in corpus.iter_puzzles()]
+    buckets = {name: [i for i, puzzle in enumerate(puzzles) if get_bucket(puzzle.get("length", 0)) == name] for name in BUCKETS}
+
+    report = {"corpus": corpus_path, "budget": budget, "python": platform.python_version(), "results": {}}
+    for algorithm in algorithms or list(Algorithm):
+        print(f"Running {algorithm.name} on {len(puzzles)} puzzles", file=sys.stderr)
+        results = run_algorithm(puzzles, algorithm, budget, memory)
+        report["results"][algorithm.name] = {
+            name: summarize([puzzles[i] for i in indices], [results[i] for i in indices])
+            for name, indices in buckets.items()
+        }
+    return report
+
+
+def compare(baseline: dict, report: dict, tolerance: float = 0.15) -> List[str]:
+    """
+    Find the regressions of a report against a baseline report, for the algorithms and buckets of both.
+    :param tolerance: The relative change of a metric above which it is a regression (latencies, nodes and memory),
+        the latencies must also change by more than `LATENCY_NOISE_MS`. Any drop of the number of solved or
+        optimal puzzles is a regression.
+    :return: One line per regression.
+    """
+    regressions = []
+    for algorithm, buckets in report["results"].items():
+        for name, metrics in buckets.items():
+            reference = baseline["results"].get(algorithm, {}).get(name)
+            if reference is None:
+                continue
+            for metric, direction in COMPARED_METRICS.items():
+                if metric not in metrics or metric not in reference:
+                    continue
+                before, after = reference[metric], metrics[metric]
+                if metric in ("solved", "optimal"):
+                    allowed = 0
+                elif metric.startswith("latency"):
+                    allowed = max(tolerance * abs(before), LATENCY_NOISE_MS)
+                else:
+                    allowed = tolerance * abs(before)
+                if (after - before) * direction > allowed:
+                    regressions.append(f"{algorithm} {name}: {metric} {before:.6g} -> {after:.6g}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of the solvers over a fixed puzzle corpus.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="Generate the benchmark corpus")
+    build_parser.add_argument("--output", default=DEFAULT_CORPUS)
+    build_parser.add_argument("--per-bucket", type=int, default=12, help="Puzzles of each length bucket")
+    build_parser.add_argument("--seed", type=int, default=0)
+    build_parser.add_argument("--candidates", type=int, default=400, help="Puzzles generated to draw from")
+
+    run_parser = commands.add_parser("run", help="Run the solvers over the corpus, the report is written as JSON")
+    run_parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    run_parser.add_argument("--algorithms", nargs="+", default=None, choices=Algorithm.__members__)
+    run_parser.add_argument("--budget", type=float, default=10, help="Seconds allowed per search")
+    run_parser.add_argument("--no-memory", action="store_true", help="Skip the peak memory measures")
+    run_parser.add_argument("--output", default=None, help="Report file (default: standard output)")
+    run_parser.add_argument("--baseline", default=None, help="Report to compare with, fails on regressions")
+    run_parser.add_argument("--tolerance", type=float, default=0.15, help="Relative change flagged as a regression")
+
+    compare_parser = commands.add_parser("compare", help="Compare two reports, fails on regressions")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("report")
+    compare_parser.add_argument("--tolerance", type=float, default=0.15, help="Relative change flagged as a regression")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_corpus(args.output, args.per_bucket, args.seed, args.candidates)
+        print(f"{args.per_bucket * len(BUCKETS)} puzzles written to {args.output}", file=sys.stderr)
+        return
+
+    if args.command == "run":
+        algorithms = [Algorithm[name] for name in args.algorithms] if args.algorithms else None
+        report = run_benchmark(args.corpus, algorithms, args.budget, not args.no_memory)
+        if args.output:
+            with open(args.output, "w") as file:
+                json.dump(report, file, indent=2)
+        else:
+            print(json.dumps(report, indent=2))
+        baseline_path = args.baseline
+    else:
+        with open(args.report) as file:
+            report = json.load(file)
+        baseline_path = args.baseline
+
+    if baseline_path is None:
+        return
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+    regressions = compare(baseline, report, args.tolerance)
+    for regression in regressions:
+        print(f"Regression: {regression}", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+    print("No regression", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import argparse
+import itertools
+import json
+import os
+import struct
+import sys
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from compiled_board import CompiledBoard
+from map_builder import BOARD_SIZE, QuadrantTables, compile_walls, create_compiled_board
+from utils import CHIP_MAP, Coordinate
+
+MAGIC = b"RRBOARDS"
+VERSION = 1
+HEADER_ALIGNMENT = 16
+
+# Targets of each board, in this order in the records
+CATALOG_TARGETS = sorted(CHIP_MAP) + ["Rain"]
+
+MISSING_TARGET = 255
+UNREACHABLE = 255
+
+CELL_COUNT = BOARD_SIZE ** 2
+
+CATALOG_RECORD = np.dtype([
+    ("map_index", "u1", (4,)),  # Map number of each quadrant, see Map.choose_quadrants
+    ("walls", "u1", (CELL_COUNT,)),  # Wall bits of each cell (y * size + x)
+    ("neighbours", "<i2", (4, CELL_COUNT)),  # CompiledBoard.neighbours
+    ("slides", "<i2", (4, CELL_COUNT)),  # CompiledBoard.slides
+    ("targets", "u1", (len(CATALOG_TARGETS),)),  # Cell of each target of CATALOG_TARGETS, MISSING_TARGET if absent
+    ("distances", "u1", (len(CATALOG_TARGETS), CELL_COUNT)),  # Distance map of each target, UNREACHABLE if None
+])
+"""
+One board of the catalog, about 8.5 KB.
+"""
+
+
+def enumerate_quadrant_choices() -> List[Tuple[int, ...]]:
+    """
+    Every board that can be dealt: the 4 tiles in any order, each on any of its 2 sides.
+    The index of a choice in this list is the id of the board.
+    :return: The map number of each quadrant, in the `Map.choose_quadrants` format.
+    """
+    return [
+        tuple(tile * 2 + side for tile, side in zip(order, sides))
+        for order in itertools.permutations(range(4))
+        for sides in itertools.product((1, 2), repeat=4)
+    ]
+
+
+_board_ids = {choice: board_id for board_id, choice in enumerate(enumerate_quadrant_choices())}
+
+
+def get_board_id(map_index: Sequence[int]) -> int:
+    """
+    Get the id of the board of a quadrant choice.
+    """
+    return _board_ids[tuple(map_index)]
+
+
+def create_board_records(boards: Sequence[Tuple[np.ndarray, Dict[str, Tuple[int, int]]]]) -> np.ndarray:
+    """
+    Compile boards into catalog records, with their move tables and the distance maps of their targets.
+    :param boards: The wall bits and targets of each board, in the `QuadrantTables.assemble` format.
+    :return: One `CATALOG_RECORD` per board, without its `map_index`.
+    """
+    records = np.zeros(len(boards), dtype=CATALOG_RECORD)
+    for record, (walls, targets) in zip(records, boards):
+        if walls.shape != (BOARD_SIZE, BOARD_SIZE):
+            raise ValueError(f"Only {BOARD_SIZE}x{BOARD_SIZE} boards can be recorded.")
+        board = compile_walls(walls, targets)
+        record["walls"] = walls.ravel()
+        record["neighbours"] = board.neighbours
+        record["slides"] = board.slides
+        record["targets"] = MISSING_TARGET
+        record["distances"] = UNREACHABLE
+        for index, key in enumerate(CATALOG_TARGETS):
+            if key not in targets:
+                continue
+            x, y = targets[key]
+            record["targets"][index] = y * BOARD_SIZE + x
+            distance_map = board.get_distance_map(Coordinate(x, y))
+            record["distances"][index] = [
+                UNREACHABLE if distance_map[cell % BOARD_SIZE][cell // BOARD_SIZE] is None
+                else distance_map[cell % BOARD_SIZE][cell // BOARD_SIZE]
+                for cell in range(CELL_COUNT)
+            ]
+    return records
+
+
+def build_catalog(path: str, file_name: str = "maps.txt"):
+    """
+    Write the catalog of all the boards, with their move tables and the distance maps of their targets.
+    :param path: The catalog file to write.
+    :param file_name: The maps the boards are built from.
+    """
+    tables = QuadrantTables(file_name)
+    choices = enumerate_quadrant_choices()
+    records = create_board_records([tables.assemble(choice) for choice in choices])
+    records["map_index"] = choices
+
+    header = json.dumps({"version": VERSION, "board_size": BOARD_SIZE, "targets": CATALOG_TARGETS}).encode()
+    header += b" " * (-(len(MAGIC) + 4 + len(header)) % HEADER_ALIGNMENT)
+    with open(path, "wb") as file:
+        file.write(MAGIC + struct.pack("<I", len(header)) + header)
+        records.tofile(file)
+
+
+class BoardCatalog:
+    """
+    A catalog written by `build_catalog`, its records memory-mapped: the boards are loaded by id without parsing
+    `maps.txt` nor computing their tables again. The compiled boards are immutable and shared.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a board catalog.")
+            header_size, = struct.unpack("<I", file.read(4))
+            header = json.loads(file.read(header_size))
+        if header["version"] != VERSION or header["targets"] != CATALOG_TARGETS:
+            raise ValueError(f"{path} was built by another version, build it again.")
+        self.records = np.memmap(path, dtype=CATALOG_RECORD, mode="r", offset=len(MAGIC) + 4 + header_size)
+        self._boards: Dict[int, CompiledBoard] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get_targets(self, board_id: int) -> Dict[str, Tuple[int, int]]:
+        """
+        Get the targets of a board, in the `Board.targets` format.
+        """
+        cells = self.records[board_id]["targets"]
+        return {
+            key: (int(cell) % BOARD_SIZE, int(cell) // BOARD_SIZE)
+            for key, cell in zip(CATALOG_TARGETS, cells) if cell != MISSING_TARGET
+        }
+
+    def get_board(self, board_id: int) -> CompiledBoard:
+        """
+        Get the compiled board of an id, with its chips and the distance maps of its targets.
+        """
+        board = self._boards.get(board_id)
+        if board is None:
+            with self._lock:
+                board = self._boards.get(board_id)
+                if board is None:
+                    board = self._boards[board_id] = self._load_board(board_id)
+        return board
+
+    def _load_board(self, board_id: int) -> CompiledBoard:
+        record = self.records[board_id]
+        targets = self.get_targets(board_id)
+        walls = np.asarray(record["walls"]).reshape(BOARD_SIZE, BOARD_SIZE)
+        board = create_compiled_board(walls, targets, (np.asarray(record["neighbours"]), np.asarray(record["slides"])))
+        distance_maps = {}
+        for index, key in enumerate(CATALOG_TARGETS):
+            if key in targets:
+                # [y][x] rows to the [x][y] columns of get_distance_map
+                columns = np.asarray(record["distances"][index]).reshape(BOARD_SIZE, BOARD_SIZE).T.tolist()
+                distance_maps[Coordinate(*targets[key])] = [
+                    [None if distance == UNREACHABLE else distance for distance in column] for column in columns
+                ]
+        board.add_distance_maps(distance_maps)
+        return board
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the catalog of all the boards and their tables.")
+    parser.add_argument("output", nargs="?", default="boards.bin", help="Catalog file to write")
+    parser.add_argument("--maps", default="maps.txt", help="Maps the boards are built from")
+    args = parser.parse_args()
+
+    build_catalog(args.output, args.maps)
+    print(f"{len(enumerate_quadrant_choices())} boards written to {args.output} "
+          f"({os.path.getsize(args.output) / 1024 ** 2:.1f} MB)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import pygame
+
+from assets import assets
+from board import Board
+from text_renderer import text_renderer
+
+
+class BoardRenderer:
+    """
+    Draws a Board with pygame. The board itself does not depend on pygame, so the game model, the map generation
+    and the solvers can run headless.
+    The icons and the static layer (grid, walls, targets) are refreshed when `Board.layout_version` changes.
+    """
+
+    def __init__(self, board: Board):
+        self.board = board
+        self.robot_images = {}
+        self.shape_images = {}
+        self.static_layer = None        # Prerendered grid, walls and targets of the current layout
+        self.layout_version = None      # Board layout the icons and the static layer were made for
+
+    def load_images(self, screen=None):
+        board = self.board
+        # Scale factor for robot and target icons
+        icon_scale_factor = 0.8
+
+        # Icons are decoded once and scaled once per size by the asset manager, shared between boards and restarts
+        icons = assets.get_icons(int(board.cell_size * icon_scale_factor))
+
+        # Assuming icons are named ROBOT_COLOR.png
+        self.robot_images = {robot.color: icons[robot.color] for robot in board.robots if robot.color in icons}
+        for robot in board.robots:
+            if robot.color not in icons:
+                print(f"Error loading image for robot color {robot.color}")
+
+        # Assuming icons are named COLOR_SHAPEE.png
+        self.shape_images = {target: icons[target] for target in board.targets if target in icons}
+        for target in board.targets:
+            if target not in icons:
+                print(f"Error loading image for target {target}")
+
+        # The targets are drawn on the static layer
+        self.static_layer = None
+
+    def sync_layout(self):
+        # After initialize_board or reset_parameters, the new robots and targets need their icons
+        if self.layout_version != self.board.layout_version:
+            self.load_images()
+            self.layout_version = self.board.layout_version
+
+    def get_static_layer(self, colors):
+        # The grid, walls and targets only change with the layout, so they are rendered once per board layout
+        self.sync_layout()
+        if self.static_layer is None:
+            self.static_layer = self.render_static_layer(colors)
+        return self.static_layer
+
+    def render_static_layer(self, colors):
+        board = self.board
+        board_size = board.grid_size * board.cell_size
+        # 2 extra pixels for the last grid line and the walls drawn on it
+        layer = pygame.Surface((board_size + 2, board_size))
+        layer.fill(colors["White"])
+
+        # Draw grid
+        for x in range(0, (board.grid_size + 1) * board.cell_size, board.cell_size):
+            pygame.draw.line(layer, colors["Gray"], (x, 0), (x, board.grid_size * board.cell_size))
+        for y in range(0, (board.grid_size + 1) * board.cell_size, board.cell_size):
+            pygame.draw.line(layer, colors["Gray"], (0, y), (board.grid_size * board.cell_size, y))
+        
+        # Draw walls
+        for (x, y) in board.walls["Vertical"]:
+            pygame.draw.line(layer, colors["Black"],
+                             (x * board.cell_size, y * board.cell_size),
+                             (x * board.cell_size, (y + 1) * board.cell_size), 4)
+        for (x, y) in board.walls["Horizontal"]:
+            pygame.draw.line(layer, colors["Black"],
+                             (x * board.cell_size, y * board.cell_size),
+                             ((x + 1) * board.cell_size, y * board.cell_size), 4)
+        
+        # Draw targets (shapes)
+        for target, target_position in board.targets.items():
+            shape_image = self.shape_images.get(target)
+            if shape_image:
+                # Get target position
+                target_x, target_y = target_position
+                # Center the shape icon within the grid cell
+                x_offset = (board.cell_size - shape_image.get_width()) // 2
+                y_offset = (board.cell_size - shape_image.get_height()) // 2
+                # Draw the shape at its target position, centered within the cell
+                layer.blit(shape_image, (target_x * board.cell_size + x_offset, target_y * board.cell_size + y_offset))
+        return layer
+
+    def get_robot_rects(self):
+        # Screen areas covered by the robots, at their drawing positions
+        board = self.board
+        self.sync_layout()
+        rects = []
+        for robot in board.robots:
+            robot_image = self.robot_images.get(robot.color)
+            if robot_image:
+                # Center the robot icon within the grid cell
+                x_offset = (board.cell_size - robot_image.get_width()) // 2
+                y_offset = (board.cell_size - robot_image.get_height()) // 2
+                robot_x, robot_y = board.robot_draw_positions.get(robot.color, (robot.x, robot.y))
+                rects.append(pygame.Rect(int(robot_x * board.cell_size) + x_offset, int(robot_y * board.cell_size) + y_offset,
+                                         robot_image.get_width(), robot_image.get_height()))
+        return rects
+
+    def draw_robots(self, screen):
+        board = self.board
+        robots = [robot for robot in board.robots if self.robot_images.get(robot.color)]
+        for robot, rect in zip(robots, self.get_robot_rects()):
+            # Draw the robot's icon at the correct position, centered within the cell
+            screen.blit(self.robot_images[robot.color], rect)
+
+    def redraw_robots(self, screen, colors, previous_rects):
+        # Restores the static layer where the robots were, then draws them again
+        # Returns the areas of the screen to update
+        static_layer = self.get_static_layer(colors)
+        for rect in previous_rects:
+            screen.blit(static_layer, rect, rect)
+        self.draw_robots(screen)
+        return previous_rects + self.get_robot_rects()
+
+    def draw(self, screen, colors):
+        # Draw grid, walls and targets
+        board = self.board
+        screen.blit(self.get_static_layer(colors), (0, 0))
+
+        # Draw robots
+        self.draw_robots(screen)
+        
+        # Draw information (attempts, robot, target)
+        show_robot_image = self.robot_images.get(board.target_color)
+        show_target_image = self.shape_images.get(board.target_color[0]+board.target_shape[0])
+
+        if board.target_shape == "Rain":
+            show_target_image = self.shape_images.get("Rain")
+            if show_target_image:
+                # Draw the target's icon at the side bar
+                screen.blit(show_target_image, ((board.grid_size + 7.5) * board.cell_size, 8 * board.cell_size))
+        
+            # Draw label
+            font = text_renderer.get_font(24)
+            label_text = f"Move any robot to the target"
+            label_surface = font.render(label_text, True, colors["Black"])  # Render text in black
+            label_position = ((board.grid_size + 1.8) * board.cell_size, 8.25 * board.cell_size)  # Position below the arrow
+            screen.blit(label_surface, label_position)
+
+        else:    
+            if show_robot_image:
+                # Draw the robot's icon at the side bar
+                screen.blit(show_robot_image, ((board.grid_size + 3) * board.cell_size, 8 * board.cell_size))
+
+            if show_target_image:
+                # Draw the target's icon at the side bar
+                screen.blit(show_target_image, ((board.grid_size + 6.5) * board.cell_size, 8 * board.cell_size))
+            
+            # Draw label
+            font = text_renderer.get_font(24)
+            label_text = f"Move            to the target"
+            label_surface = font.render(label_text, True, colors["Black"])  # Render text in black
+            label_position = ((board.grid_size + 1.8) * board.cell_size, 8.25 * board.cell_size)
+            screen.blit(label_surface, label_position)
+        
+        if board.ai_error:
+            # Draw the label
+            font = text_renderer.get_font(32) 
+            label_text = f"AI moving error! Restart the game!"
+            label_surface = font.render(label_text, True, colors["Black"])  # Render text in black
+            label_position = ((board.grid_size + 1.8) * board.cell_size, 10 * board.cell_size)
+            screen.blit(label_surface, label_position)
+    
+    def target_reached_result(self, screen, colors):
+        # Draw the label
+        board = self.board
+        font = text_renderer.get_font(32) 
+        label_text = f"Target reached after {len(board.move_history)} attempts"
+        label_surface = font.render(label_text, True, colors["Black"])  # Render text in black
+        label_position = ((board.grid_size + 1.8) * board.cell_size, 10 * board.cell_size)  # Position below the arrow
+        screen.blit(label_surface, label_position)
@@ -0,0 +1,326 @@
+import copy
+from collections import deque
+from functools import lru_cache
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from utils import Color, Coordinate, Direction, GameState, MirrorAngle, Shape
+
+
+DIRECTION_DELTAS = {
+    Direction.UP: (0, -1),
+    Direction.RIGHT: (1, 0),
+    Direction.DOWN: (0, 1),
+    Direction.LEFT: (-1, 0),
+}
+
+REFLECTION_MAP = {
+    (Direction.UP, MirrorAngle.BACKSLASH): Direction.LEFT,
+    (Direction.UP, MirrorAngle.SLASH): Direction.RIGHT,
+    (Direction.RIGHT, MirrorAngle.SLASH): Direction.UP,
+    (Direction.RIGHT, MirrorAngle.BACKSLASH): Direction.DOWN,
+    (Direction.DOWN, MirrorAngle.BACKSLASH): Direction.RIGHT,
+    (Direction.DOWN, MirrorAngle.SLASH): Direction.LEFT,
+    (Direction.LEFT, MirrorAngle.BACKSLASH): Direction.UP,
+    (Direction.LEFT, MirrorAngle.SLASH): Direction.DOWN,
+}
+
+
+def create_walls_grid(
+    board_size: int, vertical_walls: Iterable[Tuple[int, int]], horizontal_walls: Iterable[Tuple[int, int]]
+) -> List[List[Tuple[bool, bool, bool, bool]]]:
+    """
+    Generates the walls grid of a GameState from the wall lists of a `Board`.
+    Each cell is a tuple (up, right, down, left).
+    :param board_size: The size of the grid of the game board.
+    :param vertical_walls: The (x, y) cells having a wall on their left side.
+    :param horizontal_walls: The (x, y) cells having a wall on their upper side.
+    :return: The walls grid, accessible by `walls[x][y]`.
+    """
+    size = board_size
+    # Initialize all to no walls
+    walls = [[[False, False, False, False] for _ in range(size)] for _ in range(size)]
+
+    # Vertical walls
+    for (x, y) in vertical_walls:
+        if x > 0:
+            walls[x - 1][y][Direction.RIGHT.value] = True
+        walls[x][y][Direction.LEFT.value] = True
+
+    # Horizontal walls
+    for (x, y) in horizontal_walls:
+        if y > 0:
+            walls[x][y - 1][Direction.DOWN.value] = True
+        walls[x][y][Direction.UP.value] = True
+
+    # Surrounding walls
+    for i in range(size):
+        walls[i][0][Direction.UP.value] = True
+        walls[i][size - 1][Direction.DOWN.value] = True
+        walls[0][i][Direction.LEFT.value] = True
+        walls[size - 1][i][Direction.RIGHT.value] = True
+
+    return [[tuple(cell) for cell in col] for col in walls]
+
+
+@lru_cache(maxsize=None)
+def _get_coordinates(board_size: int) -> Tuple[Coordinate, ...]:
+    # Coordinates are immutable, so all the boards of a size share them
+    return tuple(Coordinate(x=i % board_size, y=i // board_size) for i in range(board_size ** 2))
+
+
+class CompiledBoard:
+    """
+    Static part of a game (walls, mirrors and chips) along with the tables computed from it.
+    A search never modifies it, so a single instance can be shared by many resolvers, queries and threads.
+
+    It also holds the move kernel of the game, used by the board of the UI, the AI adapter and the resolvers.
+    Cells are numbered `y * board_size + x`, and `slides[direction][cell]` is the cell where a pawn
+    moving from `cell` stops when there is no other pawn on its way.
+    """
+
+    def __init__(
+        self,
+        board_size: int,
+        walls: List[List[Tuple[bool, bool, bool, bool]]],
+        mirrors: List[List[Tuple[Optional[Color], Optional[MirrorAngle]]]],
+        chips: List[List[Tuple[Optional[Color], Optional[Shape]]]],
+        tables: Optional[Tuple[Sequence[Sequence[int]], Sequence[Sequence[int]]]] = None,
+    ):
+        """
+        :param board_size: The size of the grid of the game board.
+        :param walls: The walls grid, in the `GameState.walls` format.
+        :param mirrors: The mirrors grid, in the `GameState.mirrors` format.
+        :param chips: The chips grid, in the `GameState.chips` format.
+        :param tables: The `neighbours` and `slides` tables of these walls when already known (see `map_builder`),
+            computed from the walls if not provided.
+        """
+        self.board_size = board_size
+        # Copied into tuples so that the caller can't change the board under a running search
+        self.walls = tuple(tuple(col) for col in walls)
+        self.mirrors = tuple(tuple(col) for col in mirrors)
+        self.has_mirrors = any(mirror[0] is not None for col in self.mirrors for mirror in col)
+        self.coordinates = _get_coordinates(board_size)
+        self.deltas = tuple(dx + dy * board_size for dx, dy in DIRECTION_DELTAS.values())
+        if tables is not None:
+            neighbours, slides = tables
+            self.neighbours = tuple(tuple(table) for table in neighbours)
+            self.slides = tuple(tuple(table) for table in slides)
+        else:
+            self.neighbours = self._compute_neighbours()
+            self.slides = self._compute_slides()
+        self._set_chips(chips)
+
+    @classmethod
+    def from_game_state(cls, state: GameState) -> "CompiledBoard":
+        """
+        Compile the static part of a game state.
+        :param state: The game state.
+        :return: The compiled board.
+        """
+        return cls(state.board_size, state.walls, state.mirrors, state.chips)
+
+    @classmethod
+    def from_wall_lists(
+        cls, board_size: int, vertical_walls: Iterable[Tuple[int, int]], horizontal_walls: Iterable[Tuple[int, int]]
+    ) -> "CompiledBoard":
+        """
+        Compile a board without mirrors nor chips from the wall lists of a `Board`.
+        :param board_size: The size of the grid of the game board.
+        :param vertical_walls: The (x, y) cells having a wall on their left side.
+        :param horizontal_walls: The (x, y) cells having a wall on their upper side.
+        :return: The compiled board.
+        """
+        empty_grid = [[(None, None) for _ in range(board_size)] for _ in range(board_size)]
+        return cls(board_size, create_walls_grid(board_size, vertical_walls, horizontal_walls), empty_grid, empty_grid)
+
+    def with_chips(self, chips: List[List[Tuple[Optional[Color], Optional[Shape]]]]) -> "CompiledBoard":
+        """
+        Get a copy of the board with other chips, sharing the wall and move tables with this one.
+        :param chips: The chips grid, in the `GameState.chips` format.
+        :return: The new compiled board.
+        """
+        board = copy.copy(self)
+        board._set_chips(chips)
+        return board
+
+    def _set_chips(self, chips: List[List[Tuple[Optional[Color], Optional[Shape]]]]):
+        self.chips = tuple(tuple(col) for col in chips)
+        self.chip_coordinates: Dict[Tuple[Color, Shape], Coordinate] = {
+            chip: Coordinate(x=x, y=y)
+            for x, col in enumerate(self.chips)
+            for y, chip in enumerate(col)
+            if chip[0] is not None
+        }
+        self._distance_maps: Dict[Coordinate, List[List[Optional[int]]]] = {}
+        self._distance_maps_lock = Lock()
+
+    def _compute_neighbours(self) -> Tuple[Tuple[int, ...], ...]:
+        """
+        For each direction and cell, the next cell in that direction or -1 if a wall or the border is in the way.
+        A wall blocks the move as soon as one of the two cells it separates declares it.
+        """
+        size = self.board_size
+        neighbours = []
+        for direction, (dx, dy) in DIRECTION_DELTAS.items():
+            opposite = (direction.value + 2) % 4
+            table = []
+            for cell in range(size * size):
+                x, y = cell % size, cell // size
+                nx, ny = x + dx, y + dy
+                if (
+                    not (0 <= nx < size and 0 <= ny < size)
+                    or self.walls[x][y][direction.value]
+                    or self.walls[nx][ny][opposite]
+                ):
+                    table.append(-1)
+                else:
+                    table.append(ny * size + nx)
+            neighbours.append(tuple(table))
+        return tuple(neighbours)
+
+    def _compute_slides(self) -> Tuple[Tuple[int, ...], ...]:
+        slides = []
+        for table in self.neighbours:
+            stops = []
+            for cell in range(self.board_size ** 2):
+                while table[cell] >= 0:
+                    cell = table[cell]
+                stops.append(cell)
+            slides.append(tuple(stops))
+        return tuple(slides)
+
+    def index_of(self, coordinates: Coordinate) -> int:
+        """
+        Get the cell number of coordinates.
+        """
+        return coordinates.y * self.board_size + coordinates.x
+
+    def move(
+        self, positions: Sequence[Optional[int]], pawn: int, direction: int, pawn_color: Optional[Color] = None
+    ) -> int:
+        """
+        The move kernel: get the cell where a pawn stops.
+        :param positions: The cell of each pawn (None for a missing pawn).
+        :param pawn: The index of the moving pawn in `positions`.
+        :param direction: The value of the direction of the move.
+        :param pawn_color: The color of the moving pawn, only used by mirrors. Defaults to `Color(pawn)`
+            (`GameState.pawns` order).
+        :return: The cell where the pawn stops, its own cell if it can't move.
+        """
+        start = positions[pawn]
+        if self.has_mirrors:
+            return self._walk(positions, pawn, direction, pawn_color if pawn_color is not None else Color(pawn))
+
+        stop = self.slides[direction][start]
+        if stop == start:
+            return start
+
+        # Stop in front of the nearest pawn standing between the start and the stop cells
+        delta = self.deltas[direction]
+        size = self.board_size
+        for i, other in enumerate(positions):
+            if i == pawn or other is None:
+                continue
+            if delta > 0:
+                if start < other <= stop and (delta == 1 or (other - start) % size == 0):
+                    stop = other - delta
+            elif stop <= other < start and (delta == -1 or (start - other) % size == 0):
+                stop = other - delta
+        return stop
+
+    def _walk(self, positions: Sequence[Optional[int]], pawn: int, direction: int, pawn_color: Color) -> int:
+        """
+        Cell by cell version of the move, used on boards with mirrors: a mirror of the color of the pawn
+        reflects it, the other pawns go through.
+        """
+        occupied = {other for i, other in enumerate(positions) if i != pawn and other is not None}
+        cell = positions[pawn]
+        # A pawn can't visit a cell twice in the same direction, otherwise it is trapped between mirrors
+        for _ in range(4 * self.board_size ** 2):
+            next_cell = self.neighbours[direction][cell]
+            if next_cell < 0 or next_cell in occupied:
+                return cell
+            cell = next_cell
+            mirror_color, mirror_angle = self.mirrors[cell % self.board_size][cell // self.board_size]
+            if mirror_color is not None and mirror_color == pawn_color:
+                direction = REFLECTION_MAP[(Direction(direction), mirror_angle)].value
+        return positions[pawn]
+
+    def get_pawn_destination(self, pawns: Sequence[Optional[Coordinate]], pawn_color: Color, direction: Direction) -> Coordinate:
+        """
+        Coordinates version of the move kernel, with pawns in the `GameState.pawns` order.
+        :param pawns: The coordinates of each pawn.
+        :param pawn_color: The color of the moving pawn.
+        :param direction: The direction of the move.
+        :return: The coordinates where the pawn stops.
+        """
+        positions = [None if p is None else p.y * self.board_size + p.x for p in pawns]
+        return self.coordinates[self.move(positions, pawn_color.value, direction.value, pawn_color)]
+
+    def get_chip_coordinates(self, color: Color, chip: Shape) -> Coordinate:
+        """
+        Get the coordinates of a chip on the board.
+        :param color: The color of the chip.
+        :param chip: The chip number.
+        :return: The coordinates of the chip. (x, y)
+        """
+        coordinates = self.chip_coordinates.get((color, chip))
+        if coordinates is None:
+            raise ValueError(f"Chip {chip} of color {color} not found on the board.")
+        return coordinates
+
+    def get_distance_map(self, target: Coordinate) -> List[List[Optional[int]]]:
+        """
+        Get the distance map of a target: for each cell, the minimal number of moves needed by a pawn to reach
+        the target if it could stop on any cell (the other pawns can only make it longer).
+        It is a lower bound of the real cost. The map is computed once per target and then shared.
+        :param target: The coordinates of the target.
+        :return: A grid accessible by `distance_map[x][y]`, `None` marking the cells from which the target
+            can't be reached.
+        """
+        distance_map = self._distance_maps.get(target)
+        if distance_map is None:
+            with self._distance_maps_lock:
+                distance_map = self._distance_maps.get(target)
+                if distance_map is None:
+                    distance_map = self._compute_distance_map(target)
+                    self._distance_maps[target] = distance_map
+        return distance_map
+
+    def add_distance_maps(self, distance_maps: Dict[Coordinate, List[List[Optional[int]]]]):
+        """
+        Store distance maps computed beforehand (see `board_catalog`), in the `get_distance_map` format.
+        """
+        with self._distance_maps_lock:
+            self._distance_maps.update(distance_maps)
+
+    def _compute_distance_map(self, target: Coordinate) -> List[List[Optional[int]]]:
+        """
+        Backward breadth-first search from the target: a cell is at distance d + 1 if a move started from it
+        goes through (or stops on) a cell at distance d.
+        Mirrors are not handled, a board with mirrors gets a map full of zeros (no information).
+        """
+        size = self.board_size
+        if self.has_mirrors:
+            return [[0] * size for _ in range(size)]
+
+        distances: List[List[Optional[int]]] = [[None] * size for _ in range(size)]
+        distances[target.x][target.y] = 0
+        queue = deque([self.index_of(target)])
+
+        while queue:
+            cell = queue.popleft()
+            distance = distances[cell % size][cell // size] + 1
+            for direction in range(4):
+                # Walk backward over all the cells from which a move in this direction reaches the current cell
+                backward = self.neighbours[(direction + 2) % 4]
+                previous = backward[cell]
+                while previous >= 0:
+                    x, y = previous % size, previous // size
+                    if distances[x][y] is None:
+                        distances[x][y] = distance
+                        queue.append(previous)
+                    previous = backward[previous]
+
+        return distances
@@ -1,16 +1,21 @@
+import os
 import pygame
 import time
 
 from ai_adapter import AiAdapter
+from animation import MoveAnimator
+from text_renderer import text_renderer
 from board import Board
+from board_renderer import BoardRenderer
 from ai_player import AIPlayer
 from utils import Algorithm
 
 
 class Game:
-    def __init__(self, grid_size, cell_size, control_panel_width, robot_list, colors):
+    def __init__(self, grid_size, cell_size, control_panel_width, robot_list, colors, ai_move_duration=0.5):
         self.board = Board(grid_size, cell_size, control_panel_width)
         self.board.initialize_board(robot_list)
+        self.board_renderer = BoardRenderer(self.board)
         self.screen = None
         self.clock = None
         self.robot_list = robot_list
@@ -23,8 +28,23 @@ class Game:
         self.start_time = time.time()
         self.estimated_move = ""
         self.ai_player = AIPlayer(self.board)
+        self.ai_adapter = AiAdapter(self.board, Algorithm.A_STAR, self.load_board_catalog())
         self.game_over = False
         self.ai_no_solution_found_msg: bool = False
+        # Last fully drawn UI state and the areas updated since then (see render)
+        self.drawn_ui_state = None
+        self.robot_rects = []
+        self.timer_text = None
+        self.timer_rect = None
+        self.ai_resolution = None  # Background search started by "AI play", polled each frame
+        self.move_animator = MoveAnimator(self.board, ai_move_duration)  # Plays the AI moves, updated each frame
+
+    def load_board_catalog(self, path="boards.bin"):
+        # Tables of all the boards, built by `python board_catalog.py`, so the AI doesn't compute them again
+        if not os.path.exists(path):
+            return None
+        from board_catalog import BoardCatalog
+        return BoardCatalog(path)
 
     def create_buttons(self):
         BUTTON_WIDTH = 100
@@ -45,14 +65,32 @@ class Game:
             "AI play": pygame.Rect(self.board.grid_size * self.board.cell_size + self.board.control_panel_width // 2 - BUTTON_WIDTH // 2, self.board.grid_size * self.board.cell_size - 1.5 * BUTTON_Y, BUTTON_WIDTH, BUTTON_HEIGHT)
         }
     
-    def handle_events(self):
-        for event in pygame.event.get():
+    def wait_for_events(self, timeout=0):
+        # Sleeps until an event arrives or the timeout (ms, 0 waits forever) expires, then returns the pending events
+        event = pygame.event.wait(timeout)
+        events = [] if event.type == pygame.NOEVENT else [event]
+        return events + pygame.event.get()
+
+    def is_busy(self):
+        # The frames keep coming while the AI searches or plays, otherwise the loop waits for events
+        return self.ai_resolution is not None or self.move_animator.is_running
+
+    def get_timer_timeout(self):
+        # Milliseconds until the timer text changes
+        elapsed_ms = int((time.time() - self.start_time) * 1000)
+        return 1000 - elapsed_ms % 1000 + 1
+
+    def handle_events(self, events):
+        for event in events:
             if event.type == pygame.QUIT:
+                self.cancel_ai_resolution()
                 self.running = False
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 self.handle_button_click(event.pos)
             elif event.type == pygame.KEYDOWN:
                 self.handle_keyboard_input(event)
+            elif event.type == pygame.WINDOWEXPOSED:
+                self.drawn_ui_state = None  # Only the changed areas are drawn otherwise
 
     def handle_button_click(self, pos):
         # Check if clicked on a button
@@ -71,6 +109,10 @@ class Game:
 
     def trigger_action(self, button_name):
         if button_name in ["Up", "Down", "Left", "Right"]:
+            if self.move_animator.is_running:
+                return  # The AI is playing
+            # The running search was started from the previous robot positions
+            self.cancel_ai_resolution()
             self.board.move_robot(button_name)
         elif button_name == "AI play":
             '''
@@ -78,20 +120,16 @@ class Game:
             2. Get the AI move steps from the algorithm
             3. Pass the AI move steps into the auto-move function 
             '''
-            ai_adapter = AiAdapter(self.board, Algorithm.A_STAR)
-            ai_adapter.resolve()
-            self.board.ai_move = ai_adapter.get_converted_moves()
-
-            if not ai_adapter.found_solution:
-                self.ai_no_solution_found_msg = True
-                self.draw(self.screen, self.general_font)
-                return
-
-            # Call AI player for the auto play (use the move sequence for inputz)
-            self.ai_play_turn(self.board.ai_move)
+            # The adapter is kept for the whole game so a new request reuses the previous searches of the round.
+            # The search runs in the background, its result is picked up by poll_ai_resolution.
+            if self.ai_resolution is None and not self.move_animator.is_running:
+                self.ai_no_solution_found_msg = False
+                self.ai_resolution = self.ai_adapter.start_resolve()
         
         elif button_name == "Restart":
             # print("Game Restarted")
+            self.cancel_ai_resolution()
+            self.move_animator.stop()
             self.ai_no_solution_found_msg = False
             self.board.reset_parameters()
             self.board.initialize_board(self.robot_list)
@@ -100,30 +138,40 @@ class Game:
 
         elif button_name == "Quit":
             # print("Game Exited")
+            self.cancel_ai_resolution()
             self.running = False
 
         #print(self.board.move_history)
+
+    def poll_ai_resolution(self):
+        """
+        Called each frame: once the background search is done, plays the moves it found.
+        """
+        if self.ai_resolution is None or not self.ai_resolution.done():
+            return
+        resolution, self.ai_resolution = self.ai_resolution, None
+        self.ai_adapter.finish_resolve(resolution)
+        self.board.ai_move = self.ai_adapter.get_converted_moves()
+
+        if not self.ai_adapter.found_solution:
+            self.ai_no_solution_found_msg = True
+            return
+
+        # Call AI player for the auto play (use the move sequence for inputz)
+        self.ai_play_turn(self.board.ai_move)
+
+    def cancel_ai_resolution(self):
+        if self.ai_resolution is not None:
+            self.ai_resolution.cancel()
+            self.ai_resolution = None
     
     def ai_play_turn(self, move_sequence):
-        for direction, color in move_sequence:
-            # Change selected robot if needed
-            if self.board.selected_robot.color != color:
-                for robot in self.board.robots:
-                    if robot.color == color:
-                        self.change_selected_robot(robot)
-            
-            # Move the robot (break if move is invalid)
-            if not self.board.move_robot(direction):
-                self.board.ai_error = True
-                self.display_end_screen()
-                break
-            time.sleep(1)
-
-            # Update the display
-            self.screen.fill(self.colors["White"])
-            self.draw(self.screen, self.general_font)
-            pygame.display.flip()
-            self.clock.tick(60)
+        # The moves are played by the animator, from the main loop (see update_ai_animation)
+        self.move_animator.start(move_sequence)
+
+    def update_ai_animation(self, elapsed_ms):
+        # An invalid move stops the sequence and shows the AI error (see MoveAnimator)
+        self.move_animator.update(elapsed_ms)
 
     def change_selected_robot(self, robot):
         if self.board.selected_robot != robot:
@@ -140,9 +188,14 @@ class Game:
             pygame.K_RIGHT: "Right",
         }
 
+        # Space skips the AI moves to the end
+        if event.key == pygame.K_SPACE:
+            self.move_animator.skip()
+
         # Check if the key is mapped to a direction
-        if event.key in key_to_direction:
+        elif event.key in key_to_direction and not self.move_animator.is_running:
             direction = key_to_direction[event.key]
+            self.cancel_ai_resolution()
             self.board.move_robot(direction)
 
     def draw_buttons(self, screen, general_font):
@@ -156,26 +209,81 @@ class Game:
             label = general_font.render(button_name, True, self.colors["White"])
             screen.blit(label, (button_rect.x + 10, button_rect.y + 10))
     
-    def draw_timer(self, screen, general_font):
+    def get_timer_text(self):
         elapsed_time = time.time() - self.start_time
         minutes = int(elapsed_time // 60)
         seconds = int(elapsed_time % 60)
-        timer_text = f"Time: {minutes:02}:{seconds:02}"
-        timer_label = general_font.render(timer_text, True, self.colors["Black"])
+        return f"Time: {minutes:02}:{seconds:02}"
+
+    def draw_timer(self, screen, general_font):
+        self.timer_text = self.get_timer_text()
+        timer_label = general_font.render(self.timer_text, True, self.colors["Black"])
         timer_x = self.board.grid_size * self.board.cell_size + 20  # Position on the control panel
         timer_y = 10  # Top margin
-        screen.blit(timer_label, (timer_x, timer_y))
+        self.timer_rect = screen.blit(timer_label, (timer_x, timer_y))
+
+    def draw_ai_progress(self, screen, general_font):
+        label_position = ((self.board.grid_size + 1) * self.board.cell_size, 10 * self.board.cell_size)
+        # Clears the previous label, which may be longer
+        area = pygame.Rect(label_position, (self.board.control_panel_width - self.board.cell_size, general_font.get_linesize()))
+        screen.fill(self.colors["White"], area)
+        progress = self.ai_resolution.progress
+        label_text = f"Solving... {progress.nodes} nodes, depth {progress.depth}"
+        # A new text on every frame, not worth caching
+        label_surface = general_font.render_uncached(label_text, True, self.colors["Black"])
+        screen.blit(label_surface, label_position)
+        return area
 
     def draw(self, screen, general_font):
-        self.board.draw(screen, self.colors)
+        self.board_renderer.draw(screen, self.colors)
         self.draw_buttons(screen, general_font)
         self.draw_timer(screen, general_font)
         if self.ai_no_solution_found_msg:
-            font = pygame.font.Font(None, 32)
+            font = text_renderer.get_font(32)
             label_text = f"No solution found"
             label_surface = font.render(label_text, True, self.colors["Black"])  # Render text in black
             label_position = ((self.board.grid_size + 1.8) * self.board.cell_size, 10 * self.board.cell_size)
             screen.blit(label_surface, label_position)
+        if self.ai_resolution is not None:
+            self.draw_ai_progress(screen, general_font)
+        self.robot_rects = self.board_renderer.get_robot_rects()
+
+    def get_ui_state(self):
+        # Everything drawn besides the robots, the timer and the search progress
+        return (
+            self.board.layout_version,
+            self.board.selected_robot,
+            self.board.ai_error,
+            self.ai_no_solution_found_msg,
+            self.ai_resolution is None,
+        )
+
+    def render(self):
+        """
+        Draws the frame, only updating the areas of the screen that changed since the previous one.
+        """
+        ui_state = self.get_ui_state()
+        if ui_state != self.drawn_ui_state:
+            self.drawn_ui_state = ui_state
+            self.screen.fill(self.colors["White"])
+            self.draw(self.screen, self.general_font)
+            pygame.display.flip()
+            return
+
+        dirty_rects = []
+        robot_rects = self.board_renderer.get_robot_rects()
+        if robot_rects != self.robot_rects:
+            dirty_rects += self.board_renderer.redraw_robots(self.screen, self.colors, self.robot_rects)
+            self.robot_rects = robot_rects
+        if self.get_timer_text() != self.timer_text:
+            self.screen.fill(self.colors["White"], self.timer_rect)
+            dirty_rects.append(self.timer_rect)
+            self.draw_timer(self.screen, self.general_font)
+            dirty_rects.append(self.timer_rect)
+        if self.ai_resolution is not None:
+            dirty_rects.append(self.draw_ai_progress(self.screen, self.general_font))
+        if dirty_rects:
+            pygame.display.update(dirty_rects)
 
     def display_end_screen(self):
         overlay = pygame.Surface(self.screen.get_size(), pygame.SRCALPHA)  # Create an alpha-enabled surface
@@ -219,8 +327,8 @@ class Game:
 
         pygame.display.flip()  # Update the display to show the overlay
 
-    def handle_end_screen_events(self):
-        for event in pygame.event.get():
+    def handle_end_screen_events(self, events):
+        for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
             elif event.type == pygame.MOUSEBUTTONDOWN:
@@ -229,55 +337,55 @@ class Game:
                         # print(f"{button_name} button clicked")
                         if button_name == "Restart":
                             # print("Game Restarted")
-                            # Clear the gray overlay and reset the game state
+                            # Clear the gray overlay and reset the game state, as the Restart button of the game does
                             self.screen.fill(self.colors["White"])
-                            self.board.reset_parameters()
-                            self.board.initialize_board(self.robot_list)
-                            self.start_time = time.time()
+                            self.trigger_action("Restart")
                             self.running = True  # Ensure the game loop continues
-                            self.draw(self.screen, self.general_font)
                             pygame.display.flip()  # Update the display
                             
                             self.game_over = False  # Reset the game over state
                         elif button_name == "Quit":
-                            self.running = False
+                            self.trigger_action("Quit")
 
 
     def run(self):
         pygame.init()
-        self.general_font = pygame.font.Font(None, 30)
+        self.general_font = text_renderer.get_font(30)
         screen_width = self.board.grid_size * self.board.cell_size + self.board.control_panel_width
         screen_height = self.board.grid_size * self.board.cell_size
         self.screen = pygame.display.set_mode((screen_width, screen_height))
-        self.board.load_images(self.screen)
+        self.board_renderer.load_images(self.screen)
         self.clock = pygame.time.Clock()
         self.game_over = False  # Flag to manage the post-target UI
+        elapsed_ms = 0
         
         while self.running:
-            if self.board.selected_robot.reached_target and not self.game_over:
+            # The end screen waits for the AI moves to be fully played
+            if self.board.selected_robot.reached_target and not self.game_over and not self.move_animator.is_running:
                 # print("GAME: target reached")
-                self.board.target_reached_result(self.screen, self.colors)
+                self.board_renderer.target_reached_result(self.screen, self.colors)
                 self.display_end_screen()  # Call the new method for the overlay
                 self.game_over = True  # Mark the game as finished
 
             if not self.game_over:
-                # Process events
-                self.handle_events()
-
-                # Clear the screen
-                self.screen.fill(self.colors["White"])
-
-                # Draw the board and buttons
-                self.draw(self.screen, self.general_font)
-
-                # Update the display
-                pygame.display.flip()
+                # Process events, sleeping until the next one or the next timer second when nothing moves
+                if self.is_busy():
+                    events = pygame.event.get()
+                else:
+                    events = self.wait_for_events(self.get_timer_timeout())
+                    self.clock.tick()  # The idle time is not animation time
+                self.handle_events(events)
+                self.poll_ai_resolution()
+                self.update_ai_animation(elapsed_ms)
+
+                # Draw the board and buttons, only updating the changed areas of the display
+                self.render()
 
                 # Cap the frame rate
-                self.clock.tick(60)
+                elapsed_ms = self.clock.tick(60)
             else:
-                # Handle the overlay state for Restart and Quit buttons
-                self.handle_end_screen_events()
+                # Handle the overlay state for Restart and Quit buttons, nothing changes until then
+                self.handle_end_screen_events(self.wait_for_events())
 
         pygame.quit()  # Quit Pygame properly after the game ends
 
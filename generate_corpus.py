@@ -0,0 +1,167 @@
+import argparse
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+
+from map_builder import BOARD_SIZE, QuadrantTables
+from puzzle_file import MAX_ROBOTS, TARGET_KEYS, UNKNOWN_LENGTH, PuzzleFileWriter, create_records
+from puzzles import encode_board, get_board_key, init_worker, solve_puzzle
+from utils import Algorithm
+
+# Boards of the corpus, set in each worker by _init_corpus_worker
+_boards: List[dict] = []
+
+
+def create_boards(count: int, seed: int) -> List[dict]:
+    """
+    Build boards from random quadrant choices (see `map_builder`), without duplicates.
+    :param count: The number of quadrant choices drawn.
+    :param seed: The seed of the quadrant choices.
+    :return: The distinct boards, in the `puzzles.encode_board` form.
+    """
+    rng = random.Random(seed)
+    tables = QuadrantTables.get_tables()
+    boards = {}
+    for _ in range(count):
+        data = encode_board(tables.build_random(rng)[0])
+        boards.setdefault(get_board_key(data), data)
+    return list(boards.values())
+
+
+def sample_puzzles(rng: np.random.Generator, boards: List[dict], count: int, robot_count: int = MAX_ROBOTS) -> np.ndarray:
+    """
+    Sample puzzles the way `Board.generate_robots_and_target` does: a board, distinct robot cells out of
+    the 4 center cells and a chip to reach, drawn for all the puzzles at once.
+    :return: The puzzles as `puzzle_file.PUZZLE_RECORD`s, without their length.
+    """
+    records = create_records(count)
+    records["board"] = rng.integers(0, len(boards), size=count)
+
+    center = BOARD_SIZE // 2
+    excluded = {y * BOARD_SIZE + x for x in (center - 1, center) for y in (center - 1, center)}
+    cells = np.array(sorted(set(range(BOARD_SIZE ** 2)) - excluded), dtype=np.uint8)
+    picks = rng.integers(0, len(cells), size=(count, robot_count))
+    # Draws again the few puzzles where two robots got the same cell
+    while True:
+        sorted_picks = np.sort(picks, axis=1)
+        collisions = np.flatnonzero((sorted_picks[:, 1:] == sorted_picks[:, :-1]).any(axis=1))
+        if len(collisions) == 0:
+            break
+        picks[collisions] = rng.integers(0, len(cells), size=(len(collisions), robot_count))
+    records["robots"][:, :robot_count] = cells[picks]
+
+    targets = [np.array([TARGET_KEYS.index(key) for key in board["chips"]], dtype=np.uint8) for board in boards]
+    for b, board_targets in enumerate(targets):
+        on_board = np.flatnonzero(records["board"] == b)
+        records["target"][on_board] = board_targets[rng.integers(0, len(board_targets), size=len(on_board))]
+    return records
+
+
+def _init_corpus_worker(boards: List[dict]):
+    global _boards
+    init_worker()
+    _boards = boards
+
+
+def _generate_chunk(
+    seed: int, chunk: int, count: int, robot_count: int, algorithm: str, budget: Optional[float]
+) -> np.ndarray:
+    """
+    Sample and label one chunk of the corpus. The chunk only depends on the seed and its index,
+    so the corpus is the same whatever the number of processes.
+    """
+    rng = np.random.default_rng([seed, chunk])
+    records = sample_puzzles(rng, _boards, count, robot_count)
+    for record in records:
+        board = _boards[int(record["board"])]
+        puzzle = {
+            "board": board,
+            "robots": [[int(cell) % BOARD_SIZE, int(cell) // BOARD_SIZE] for cell in record["robots"][:robot_count]],
+            "target": TARGET_KEYS[int(record["target"])],
+        }
+        result = solve_puzzle(puzzle, Algorithm[algorithm], budget)
+        record["length"] = result["length"] if result["status"] == "solved" else UNKNOWN_LENGTH
+    return records
+
+
+def generate_corpus(
+    path: str,
+    count: int,
+    seed: int = 0,
+    board_count: int = 16,
+    robot_count: int = MAX_ROBOTS,
+    algorithm: Algorithm = Algorithm.BFS_VECTORIZED,
+    budget: Optional[float] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = 256,
+) -> int:
+    """
+    Generate a corpus of puzzles labelled with their optimal solution length, written to a puzzle file
+    (see `puzzle_file`) in a reproducible order.
+    :param path: The puzzle file to write.
+    :param count: The number of puzzles.
+    :param seed: The seed of the boards and of the puzzles.
+    :param board_count: The number of quadrant choices the boards are built from.
+    :param robot_count: The number of robots of each puzzle.
+    :param algorithm: The algorithm labelling the puzzles, it must be optimal.
+    :param budget: The number of seconds allowed to each puzzle, the length stays unknown past it.
+    :param workers: The number of processes, the number of CPUs by default.
+    :param chunk_size: The number of puzzles generated at once by a process.
+    :return: The number of puzzles whose length is unknown (unsolvable or out of budget).
+    """
+    boards = create_boards(board_count, seed)
+    workers = workers or os.cpu_count() or 1
+    chunk_count = (count + chunk_size - 1) // chunk_size
+    unknown = 0
+    start_time = time.perf_counter()
+
+    with PuzzleFileWriter(path, boards, robot_count) as writer, \
+            ProcessPoolExecutor(workers, initializer=_init_corpus_worker, initargs=(boards,)) as pool:
+
+        def write_next():
+            nonlocal unknown
+            records = pending.popleft().result()
+            writer.write(records)
+            unknown += int((records["length"] == UNKNOWN_LENGTH).sum())
+            print(f"{writer.count}/{count} puzzles ({writer.count / (time.perf_counter() - start_time):.1f}/s)", file=sys.stderr)
+
+        # The chunks are written in order, with a bounded number of them waiting
+        pending = deque()
+        for chunk in range(chunk_count):
+            size = min(chunk_size, count - chunk * chunk_size)
+            pending.append(pool.submit(_generate_chunk, seed, chunk, size, robot_count, algorithm.name, budget))
+            if len(pending) >= 2 * workers:
+                write_next()
+        while pending:
+            write_next()
+    return unknown
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a puzzle file labelled with the optimal solution lengths.")
+    parser.add_argument("output", help="Puzzle file to write")
+    parser.add_argument("count", type=int, help="Number of puzzles")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--boards", type=int, default=16, help="Number of quadrant choices the boards are built from")
+    parser.add_argument("--robots", type=int, default=MAX_ROBOTS, help="Number of robots per puzzle")
+    parser.add_argument("--algorithm", default=Algorithm.BFS_VECTORIZED.name, choices=Algorithm.__members__)
+    parser.add_argument("--budget", type=float, default=None, help="Seconds allowed per puzzle")
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="Puzzles generated at once by a process")
+    args = parser.parse_args()
+
+    unknown = generate_corpus(
+        args.output, args.count, args.seed, args.boards, args.robots,
+        Algorithm[args.algorithm], args.budget, args.workers, args.chunk_size,
+    )
+    print(f"{args.count} puzzles written to {args.output}, {unknown} without a known length", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,14 @@
 import random
 
 class Map:
-    def __init__(self):
-        self.map_import = self.load_maps("maps.txt")
+    # Parsed map files, shared by all the boards of the process
+    loaded_maps = {}
+
+    def __init__(self, rng=None):
+        # Random generator of the quadrant choice, a seeded random.Random gives reproducible boards
+        self.rng = rng if rng is not None else random
+        self.map_import = Map.get_maps("maps.txt")
+        self.map_index = None  # Map number of each quadrant, set by generate_gameboard
         self.map_input = self.generate_gameboard(self.map_import)
 
     # Function to rotate a map by 90 degrees clockwise
@@ -17,8 +23,16 @@ class Map:
     def rotate_map_270_right(self, map_data):
         return self.rotate_map_90_right(self.rotate_map_180_right(map_data))
 
+    # Function to get the maps of a file, only loaded by the first call
+    @classmethod
+    def get_maps(cls, file_name):
+        if file_name not in cls.loaded_maps:
+            cls.loaded_maps[file_name] = cls.load_maps(file_name)
+        return cls.loaded_maps[file_name]
+
     # Function to load maps from the file
-    def load_maps(self, file_name):
+    @staticmethod
+    def load_maps(file_name):
         try:
             with open(file_name, 'r') as f:
                 maps = {}
@@ -43,17 +57,25 @@ class Map:
             print(f"Error: File '{file_name}' not found.")
             return {}
 
+    # Function to choose the map of each quadrant (top left, top right, bottom right, bottom left):
+    # the 4 tiles in a random order, each on a random side (map1/map2 are the 2 sides of the first tile, ...)
+    @staticmethod
+    def choose_quadrants(rng):
+        chosen_order = list(range(4))
+        rng.shuffle(chosen_order)
+        map_index = [0] * 4
+        for i in range(4):
+            map_index[i] = chosen_order[i] * 2 + rng.choice([1, 2])
+        return map_index
+
     # Function to create the 16x16 gameboard by combining rotated maps
     def generate_gameboard(self, maps):
         if not maps:
             print("No maps loaded. Cannot generate gameboard.")
             return []
 
-        chosen_order = list(range(4))
-        random.shuffle(chosen_order)
-        map_index = [0] * 4
-        for i in range(4):
-            map_index[i] = chosen_order[i] * 2 + random.choice([1, 2])
+        map_index = self.choose_quadrants(self.rng)
+        self.map_index = map_index
 
         chosen_map_data = []
         for i in map_index:
@@ -83,7 +105,8 @@ class Map:
             for j in range(17):
                 gameboard[i][j] = map4[i-17][j]
 
-        for row in range(17):
+        # Merge the walls of the 2 sides of the seams, a wall on either side is kept
+        for row in range(34):
             if gameboard[row][16] == 1 and gameboard[row][17] == 1:
                 gameboard[row][16] = 1
             elif gameboard[row][16] == 2 or gameboard[row][17] == 2:
@@ -92,7 +115,7 @@ class Map:
         for row in range(34):
             del gameboard[row][17]
 
-        for col in range(17):
+        for col in range(33):
             if gameboard[16][col] == 1 and gameboard[17][col] == 1:
                 gameboard[16][col] = 1
             elif gameboard[16][col] == 2 or gameboard[17][col] == 2:
@@ -100,42 +123,6 @@ class Map:
 
         del gameboard[17]
 
-        gameboard = [
-            [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-            [1, 0, 1, 0, 1, 0, 1, 0, 0, 0, 2, 0, 1, 0, 1, 0, 1, 0, 2, 0, 1, 0, 0, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1],
-            [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-            [1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 2, 'RC', 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1],
-            [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 2, 2, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-            [1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 'BC', 2, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 'BS', 2, 0, 1, 0, 1, 0, 1],
-            [1, 2, 2, 0, 0, 1, 1, 1, 1, 1, 1, 1, 1, 2, 2, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 2, 2, 1, 1, 1, 1, 1, 1],
-            [1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 2, 'GC', 1, 0, 1, 0, 1, 0, 1],
-            [1, 1, 1, 1, 1, 2, 2, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-            [1, 0, 1, 0, 1, 'GS', 2, 'RS', 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1],
-            [1, 1, 1, 1, 1, 1, 2, 2, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 2, 1],
-            [1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 2, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 2, 0, 1, 0, 1],
-            [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 2, 2, 1, 1, 1, 1, 2, 2, 1, 1, 1, 1, 1, 1, 1, 1, 1, 2, 2, 1, 1, 1, 1],
-            [1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 2, 'YC', 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 'YS', 1, 0, 1, 0, 1],
-            [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 2, 2, 2, 2, 2, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-            [1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 2, 'X', 1, 'X', 2, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1],
-            [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 2, 1, 1, 1, 2, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-            [1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 2, 'X', 1, 'X', 2, 0, 1, 0, 2, 'BT', 1, 0, 1, 0, 1, 0, 1, 0, 1],
-            [1, 1, 1, 1, 1, 1, 1, 1, 1, 2, 2, 1, 1, 1, 2, 2, 2, 2, 2, 1, 1, 1, 1, 2, 2, 1, 1, 1, 1, 1, 1, 2, 1],
-            [1, 0, 1, 0, 1, 0, 1, 0, 1, 'YT', 2, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1],
-            [1, 2, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 2, 2, 1, 1],
-            [1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 'RT', 2, 0, 1],
-            [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-            [1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1],
-            [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-            [1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 'BH', 2, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1],
-            [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 2, 2, 2, 1, 1, 1, 1, 1, 2, 2, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-            [1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 2, 'GT', 1, 0, 1, 0, 1, 'YH', 2, 'GH', 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1],
-            [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 2, 2, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-            [1, 0, 1, 0, 1, 0, 2, 'RH', 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1],
-            [1, 1, 1, 1, 1, 1, 2, 2, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
-            [1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 2, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 2, 0, 1, 0, 1, 0, 1],
-            [1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1]
-        ]
-
         # print(gameboard)
         return gameboard
 
@@ -0,0 +1,156 @@
+import random
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from compiled_board import DIRECTION_DELTAS, CompiledBoard
+from generate_map import Map
+from utils import CHIP_MAP
+
+BOARD_SIZE = 16
+QUADRANT_SIZE = BOARD_SIZE // 2
+
+# Cell offset (x, y) of each quadrant (top left, top right, bottom right, bottom left),
+# its map being rotated by as many quarter turns clockwise
+QUADRANT_OFFSETS = ((0, 0), (QUADRANT_SIZE, 0), (QUADRANT_SIZE, QUADRANT_SIZE), (0, QUADRANT_SIZE))
+
+# Cell of a board in the GameState.walls format for each combination of direction bits
+_WALL_TUPLES = [tuple(bool(bits >> direction & 1) for direction in range(4)) for bits in range(16)]
+
+
+class QuadrantTables:
+    """
+    The maps of `maps.txt` compiled once for their 4 rotations: the walls of each cell as direction bits
+    (bit `direction` set when the cell has a wall on that side) and the targets.
+    A board is then assembled from the tables of its 4 quadrants with NumPy and compiled directly, with the same
+    walls and targets as the gameboard of `generate_map.Map`. `Board` deals its boards this way.
+    """
+
+    # Tables of the map files, shared by all the boards of the process (see `get_tables`)
+    loaded_tables = {}
+
+    def __init__(self, file_name: str = "maps.txt"):
+        self.walls: Dict[Tuple[str, int], np.ndarray] = {}
+        """
+        (8, 8) wall bits of each map and rotation, indexed by [y, x].
+        """
+        self.targets: Dict[Tuple[str, int], Dict[str, Tuple[int, int]]] = {}
+        """
+        (x, y) of the targets of each map and rotation, by key ("RC", ..., "Rain", "X" for the center).
+        """
+        for key, map_data in Map.get_maps(file_name).items():
+            for rotation in range(4):
+                self.walls[(key, rotation)], self.targets[(key, rotation)] = self._compile_quadrant(map_data)
+                map_data = [row[::-1] for row in map(list, zip(*map_data))]  # 90 degrees clockwise
+
+    @classmethod
+    def get_tables(cls, file_name: str = "maps.txt") -> "QuadrantTables":
+        """
+        Get the tables of a map file, only compiled by the first call.
+        """
+        if file_name not in cls.loaded_tables:
+            cls.loaded_tables[file_name] = cls(file_name)
+        return cls.loaded_tables[file_name]
+
+    @staticmethod
+    def _compile_quadrant(map_data: List[list]) -> Tuple[np.ndarray, Dict[str, Tuple[int, int]]]:
+        walls = np.zeros((QUADRANT_SIZE, QUADRANT_SIZE), dtype=np.uint8)
+        targets = {}
+        for y in range(QUADRANT_SIZE):
+            for x in range(QUADRANT_SIZE):
+                row, col = 2 * y + 1, 2 * x + 1
+                sides = (map_data[row - 1][col], map_data[row][col + 1], map_data[row + 1][col], map_data[row][col - 1])
+                walls[y, x] = sum(1 << direction for direction, side in enumerate(sides) if side == 2)
+                if map_data[row][col] != 0:
+                    targets[map_data[row][col]] = (x, y)
+        return walls, targets
+
+    def assemble(self, map_index: Sequence[int]) -> Tuple[np.ndarray, Dict[str, Tuple[int, int]]]:
+        """
+        Assemble the walls and targets of a board.
+        :param map_index: The map number of each quadrant, as given by `Map.choose_quadrants`.
+        :return: The (16, 16) wall bits indexed by [y, x], walls declared by one side only being added to the other,
+            and the targets in the `Board.targets` format (without the center).
+        """
+        walls = np.zeros((BOARD_SIZE, BOARD_SIZE), dtype=np.uint8)
+        targets = {}
+        for rotation, (number, (offset_x, offset_y)) in enumerate(zip(map_index, QUADRANT_OFFSETS)):
+            key = (f"map{number}", rotation)
+            walls[offset_y:offset_y + QUADRANT_SIZE, offset_x:offset_x + QUADRANT_SIZE] = self.walls[key]
+            for target, (x, y) in self.targets[key].items():
+                targets[target] = (x + offset_x, y + offset_y)
+        targets.pop("X", None)
+
+        # A wall on either side of two cells separates them (the maps only draw some walls on their edges)
+        right = ((walls[:, :-1] >> 1) | (walls[:, 1:] >> 3)) & 1
+        walls[:, :-1] |= right << 1
+        walls[:, 1:] |= right << 3
+        down = ((walls[:-1] >> 2) | walls[1:]) & 1
+        walls[:-1] |= down << 2
+        walls[1:] |= down
+        # Surrounding walls
+        walls[0] |= 1
+        walls[:, -1] |= 2
+        walls[-1] |= 4
+        walls[:, 0] |= 8
+        return walls, targets
+
+    def build(self, map_index: Sequence[int]) -> Tuple[CompiledBoard, Dict[str, Tuple[int, int]]]:
+        """
+        Build the compiled board of a quadrant choice, its move tables computed with NumPy.
+        :param map_index: The map number of each quadrant, as given by `Map.choose_quadrants`.
+        :return: The compiled board, with its chips, and the targets in the `Board.targets` format.
+        """
+        walls, targets = self.assemble(map_index)
+        return compile_walls(walls, targets), targets
+
+    def build_random(self, rng: Optional[random.Random] = None) -> Tuple[CompiledBoard, Dict[str, Tuple[int, int]]]:
+        """
+        Build a board from a random quadrant choice, the same as `Map(rng)` would make.
+        """
+        return self.build(Map.choose_quadrants(rng if rng is not None else random))
+
+
+def compile_walls(walls: np.ndarray, targets: Dict[str, Tuple[int, int]]) -> CompiledBoard:
+    """
+    Compile a board from its wall bits, without computing its move tables cell by cell.
+    :param walls: The (size, size) wall bits indexed by [y, x], declared on both sides of each wall.
+    :param targets: The targets in the `Board.targets` format, the ones that are not chips being ignored.
+    """
+    return create_compiled_board(walls, targets, compute_tables(walls))
+
+
+def compute_tables(walls: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute the `CompiledBoard.neighbours` and `CompiledBoard.slides` tables of wall bits with NumPy.
+    :return: Two (4, size * size) arrays.
+    """
+    size = len(walls)
+    cells = np.arange(size * size)
+    neighbours, slides = [], []
+    for direction, (dx, dy) in enumerate(DIRECTION_DELTAS.values()):
+        table = np.where((walls.ravel() >> direction) & 1, -1, cells + dx + dy * size)
+        neighbours.append(table)
+        # Pointer jumping: each round doubles the number of steps followed
+        stops = np.where(table < 0, cells, table)
+        for _ in range(max(1, (size - 1).bit_length())):
+            stops = stops[stops]
+        slides.append(stops)
+    return np.array(neighbours), np.array(slides)
+
+
+def create_compiled_board(
+    walls: np.ndarray, targets: Dict[str, Tuple[int, int]], tables: Tuple[np.ndarray, np.ndarray]
+) -> CompiledBoard:
+    """
+    Create a compiled board from its wall bits and its move tables, computed by `compute_tables`.
+    """
+    size = len(walls)
+    wall_grid = [[_WALL_TUPLES[bits] for bits in column] for column in walls.T.tolist()]
+    empty_grid = [[(None, None) for _ in range(size)] for _ in range(size)]
+    chips = [list(column) for column in empty_grid]
+    for key, (x, y) in targets.items():
+        if key in CHIP_MAP:
+            chips[x][y] = CHIP_MAP[key]
+    neighbours, slides = tables
+    return CompiledBoard(size, wall_grid, empty_grid, chips, (neighbours.tolist(), slides.tolist()))
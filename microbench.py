@@ -0,0 +1,223 @@
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from functools import partial
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from ai_adapter import AiAdapter
+from board import DIRECTION_NAMES, Board
+from solving_a_star import AStar, ResolutionState
+from solving_bfs import BFS
+from utils import Algorithm, Color, Direction, encode_move
+
+# The robots in the order the game deals them (see game.py)
+ROBOT_COLORS = ["Red", "Blue", "Green", "Yellow"]
+
+# Seeds of the fixed boards the operations run on (quadrant choice, robots and target)
+BOARD_SEEDS = (1, 2, 3, 4)
+
+# Number of moves of the state chains of get_move_sequence, a typical solution length
+CHAIN_LENGTH = 8
+
+# A benchmark: the calls (function and arguments) it cycles through, each with the call restoring its inputs
+# before it if the function changes them (not timed, see time_benchmark)
+Benchmark = List[Tuple[Callable, tuple, Optional[Callable]]]
+
+
+def create_boards(seeds: Sequence[int] = BOARD_SEEDS) -> List[Board]:
+    """
+    Create the fixed boards, the same for a seed as the game would deal after `random.seed(seed)`.
+    The state of the global random generator is restored afterwards.
+    """
+    boards = []
+    state = random.getstate()
+    try:
+        for seed in seeds:
+            random.seed(seed)
+            board = Board(16, 40, 500)
+            board.initialize_board(ROBOT_COLORS)
+            boards.append(board)
+    finally:
+        random.setstate(state)
+    return boards
+
+
+def create_benchmarks(boards: List[Board]) -> Dict[str, Benchmark]:
+    """
+    The hot paths of the solvers and of the game, with their inputs on each board.
+    """
+    benchmarks: Dict[str, Benchmark] = defaultdict(list)
+
+    def add(name: str, function: Callable, *args, reset: Optional[Callable] = None):
+        benchmarks[name].append((function, args, reset))
+
+    for board in boards:
+        adapter = AiAdapter(board, Algorithm.A_STAR)
+        state = adapter._convert_board_to_game_state()
+        a_star = AStar(state, board=adapter.get_compiled_board())
+        bfs = BFS(state, board=adapter.get_compiled_board())
+        root = ResolutionState(pawns=state.pawns, cost=0, heuristic=0)
+        visited_positions = [[pawn] for pawn in state.pawns]
+        target_color = state.current_target[0]
+
+        for color in Color:
+            for direction in Direction:
+                add("AStar._get_pawn_destination", a_star._get_pawn_destination, root, color, direction)
+                add("BFS._get_pawn_destination", bfs._get_pawn_destination, root, color, direction)
+        add("AStar.compute_choices", a_star.compute_choices, root, visited_positions, None)
+        add("AStar.compute_choices (target pawn)", a_star.compute_choices, root, visited_positions, target_color)
+
+        # States as the search creates them: the pawns after a move, and their key in the explored states
+        for color, direction, destination in a_star.compute_choices(root, visited_positions, None):
+            pawns = list(state.pawns)
+            pawns[color.value] = destination
+            move = encode_move(color, direction)
+            add("ResolutionState creation", ResolutionState, pawns, 1, 0, root, move)
+            add("ResolutionState hashing", _hash_state, ResolutionState(pawns, 1, 0, root, move))
+
+        chain = root
+        for cost in range(1, CHAIN_LENGTH + 1):
+            color, direction, destination = random.Random(cost).choice(a_star.compute_choices(chain, visited_positions, None))
+            pawns = list(chain.pawns)
+            pawns[color.value] = destination
+            chain = ResolutionState(pawns, cost, 0, chain, encode_move(color, direction))
+        add("ResolutionState.get_move_sequence", chain.get_move_sequence)
+
+        add("AiAdapter._convert_board_to_game_state", adapter._convert_board_to_game_state)
+
+        # The move kernel of Board.move_robot, on the dealt position: moving the robots of the board
+        # would change the position from one call to the next
+        positions = [robot.y * board.grid_size + robot.x for robot in board.robots]
+        for robot in range(len(board.robots)):
+            for direction in Direction:
+                add("CompiledBoard.move", board.compiled_board.move, positions, robot, direction.value)
+
+        # The whole move of the game, each call from the dealt position again
+        coordinates = [(robot.x, robot.y) for robot in board.robots]
+        for robot in board.robots:
+            for direction in DIRECTION_NAMES:
+                add("Board.move_robot", board.move_robot, direction, reset=partial(_restore_robots, board, coordinates, robot))
+    return dict(benchmarks)
+
+
+def _restore_robots(board: Board, coordinates: List[Tuple[int, int]], selected_robot):
+    # Back to the dealt position, undoing Board.move_robot
+    for robot, (x, y) in zip(board.robots, coordinates):
+        robot.x, robot.y = x, y
+        robot.reached_target = False
+    board.selected_robot = selected_robot
+    board.move_history.clear()
+
+
+def _hash_state(state: ResolutionState) -> int:
+    # The key of a state in the explored states of the A* search
+    return hash(tuple(state.pawns))
+
+
+def time_benchmark(benchmark: Benchmark, iterations: int, repeat: int = 5) -> float:
+    """
+    Time the calls of a benchmark, cycled through, the garbage collector disabled (as timeit does).
+    The resets of the calls are timed alone in a loop of their own, subtracted from the loop of the calls.
+    :return: The nanoseconds per call of the fastest of `repeat` loops of about `iterations` calls.
+    """
+    rounds = max(1, iterations // len(benchmark))
+    calls = [call for function, args, reset in benchmark for call in ([(reset, ())] if reset else []) + [(function, args)]]
+    resets = [(reset, ()) for _, _, reset in benchmark if reset is not None]
+    best = None
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            elapsed = _time_calls(calls, rounds)
+            if resets:
+                elapsed -= _time_calls(resets, rounds)
+            best = elapsed if best is None else min(best, elapsed)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return best / (rounds * len(benchmark))
+
+
+def _time_calls(calls: List[Tuple[Callable, tuple]], rounds: int) -> int:
+    start_time = time.perf_counter_ns()
+    for _ in range(rounds):
+        for function, args in calls:
+            function(*args)
+    return time.perf_counter_ns() - start_time
+
+
+def trace_benchmark(benchmark: Benchmark, calls: int) -> Tuple[float, float, float]:
+    """
+    Trace the memory allocations of the calls of a benchmark with tracemalloc. The results of the calls are kept,
+    so the memory blocks they hold are counted, while the temporary ones only show in the peak of each call.
+    :return: The memory blocks allocated and kept per call, their bytes per call, and the peak bytes per call.
+    """
+    results = [None] * calls
+    traced_calls = [benchmark[call % len(benchmark)] for call in range(calls)]
+    peak_total = 0
+    # Excludes the allocations of tracemalloc itself
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot().filter_traces(filters)
+        for call, (function, args, reset) in enumerate(traced_calls):
+            if reset is not None:
+                reset()
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            results[call] = function(*args)
+            peak_total += tracemalloc.get_traced_memory()[1] - current
+        after = tracemalloc.take_snapshot().filter_traces(filters)
+    finally:
+        tracemalloc.stop()
+    differences = after.compare_to(before, "filename")
+    blocks = sum(difference.count_diff for difference in differences)
+    size = sum(difference.size_diff for difference in differences)
+    return blocks / calls, size / calls, peak_total / calls
+
+
+def run_microbenchmarks(names: Sequence[str] = (), iterations: int = 100_000, calls: int = 2_000) -> Dict[str, dict]:
+    """
+    Run the microbenchmarks on the fixed boards.
+    :param names: Only run the benchmarks whose name contains one of these, all of them if empty.
+    :param iterations: The number of calls of each timed loop.
+    :param calls: The number of calls traced with tracemalloc.
+    :return: `{name: {"ns_per_op", "allocations_per_op", "bytes_per_op", "peak_bytes_per_op"}}`.
+    """
+    results = {}
+    for name, benchmark in create_benchmarks(create_boards()).items():
+        if names and not any(part in name for part in names):
+            continue
+        allocations, size, peak = trace_benchmark(benchmark, calls)
+        results[name] = {
+            "ns_per_op": time_benchmark(benchmark, iterations),
+            "allocations_per_op": allocations,
+            "bytes_per_op": size,
+            "peak_bytes_per_op": peak,
+        }
+        print(f"{name:<40} {results[name]['ns_per_op']:>10.0f} ns/op {allocations:>7.2f} allocs/op "
+              f"{size:>8.1f} B/op {peak:>8.1f} peak B/op", file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks of the move kernel, the search states and the board.")
+    parser.add_argument("names", nargs="*", help="Only run the benchmarks whose name contains one of these")
+    parser.add_argument("--iterations", type=int, default=100_000, help="Calls per timed loop")
+    parser.add_argument("--calls", type=int, default=2_000, help="Calls traced for the allocations")
+    parser.add_argument("--output", default=None, help="JSON file of the results")
+    args = parser.parse_args()
+
+    results = run_microbenchmarks(args.names, args.iterations, args.calls)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import json
+import os
+import struct
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from utils import CHIP_MAP
+
+MAGIC = b"RRPUZZLE"
+HEADER_ALIGNMENT = 16
+
+# Targets are stored as their index in this list
+TARGET_KEYS = sorted(CHIP_MAP)
+
+MAX_ROBOTS = 4
+UNKNOWN_LENGTH = 255
+
+PUZZLE_RECORD = np.dtype([
+    ("board", "<u2"),  # Index of the board in the header of the file
+    ("target", "u1"),  # Index of the target in TARGET_KEYS
+    ("length", "u1"),  # Optimal solution length, UNKNOWN_LENGTH if not known or unsolvable
+    ("robots", "u1", (MAX_ROBOTS,)),  # Cells of the robots (y * size + x), GameState.pawns order
+])
+"""
+One puzzle of a puzzle file, 8 bytes.
+"""
+
+
+class PuzzleFileWriter:
+    """
+    Writes a puzzle file: a JSON header with the boards (`puzzles.encode_board` form) and the number of robots,
+    then the puzzles as fixed-size `PUZZLE_RECORD`s, so the file can be memory-mapped and read at random.
+    """
+
+    def __init__(self, path: str, boards: List[dict], robot_count: int = MAX_ROBOTS):
+        """
+        :param path: The file to write, replaced if it exists.
+        :param boards: The boards of the puzzles, in the `puzzles.encode_board` form.
+        :param robot_count: The number of robots of each puzzle, up to MAX_ROBOTS.
+        """
+        if robot_count > MAX_ROBOTS:
+            raise ValueError(f"A puzzle file holds at most {MAX_ROBOTS} robots.")
+        if any(board["size"] ** 2 > 256 for board in boards):
+            raise ValueError("The cells of a puzzle file are stored on one byte, boards larger than 16x16 don't fit.")
+        header = json.dumps({"boards": boards, "robot_count": robot_count}).encode()
+        header += b" " * (-(len(MAGIC) + 4 + len(header)) % HEADER_ALIGNMENT)
+        self.file = open(path, "wb")
+        self.file.write(MAGIC + struct.pack("<I", len(header)) + header)
+        self.count = 0
+
+    def write(self, records: np.ndarray):
+        """
+        Append puzzles.
+        :param records: An array of `PUZZLE_RECORD`.
+        """
+        np.asarray(records, dtype=PUZZLE_RECORD).tofile(self.file)
+        self.count += len(records)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self) -> "PuzzleFileWriter":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class PuzzleFile:
+    """
+    A puzzle file written by `PuzzleFileWriter`, its records memory-mapped.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a puzzle file.")
+            header_size, = struct.unpack("<I", file.read(4))
+            header = json.loads(file.read(header_size))
+        self.boards: List[dict] = header["boards"]
+        self.robot_count: int = header["robot_count"]
+        offset = len(MAGIC) + 4 + header_size
+        # A file without any puzzle can't be mapped
+        self.records = np.memmap(path, dtype=PUZZLE_RECORD, mode="r", offset=offset) \
+            if os.path.getsize(path) > offset else np.empty(0, dtype=PUZZLE_RECORD)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get_puzzle(self, index: int) -> dict:
+        """
+        Get a puzzle in the `puzzles.encode_puzzle` form, with its "length" when known.
+        """
+        return self._to_puzzle(self.records[index])
+
+    def iter_puzzles(self, start: int = 0, chunk_size: int = 4096) -> Iterator[Tuple[int, dict]]:
+        """
+        Read the puzzles one chunk of records at a time.
+        :return: The index and the puzzle, in the `get_puzzle` form.
+        """
+        for begin in range(start, len(self.records), chunk_size):
+            for offset, record in enumerate(np.array(self.records[begin:begin + chunk_size])):
+                yield begin + offset, self._to_puzzle(record)
+
+    def _to_puzzle(self, record) -> dict:
+        board = self.boards[int(record["board"])]
+        size = board["size"]
+        puzzle = {
+            "board": board,
+            "robots": [[int(cell) % size, int(cell) // size] for cell in record["robots"][:self.robot_count]],
+            "target": TARGET_KEYS[int(record["target"])],
+        }
+        if record["length"] != UNKNOWN_LENGTH:
+            puzzle["length"] = int(record["length"])
+        return puzzle
+
+
+def create_records(count: int, length: int = UNKNOWN_LENGTH) -> np.ndarray:
+    """
+    Get an array of `count` empty records, to be filled and given to `PuzzleFileWriter.write`.
+    """
+    records = np.zeros(count, dtype=PUZZLE_RECORD)
+    records["length"] = length
+    return records
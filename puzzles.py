@@ -0,0 +1,170 @@
+import json
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from ai_adapter import create_resolver
+from compiled_board import CompiledBoard
+from utils import CHIP_MAP, Algorithm, Coordinate, GameResolutionInterface, GameState, SearchCache, SearchProgress
+
+if TYPE_CHECKING:
+    from board_catalog import BoardCatalog
+
+CHIP_KEYS = {chip: key for key, chip in CHIP_MAP.items()}
+
+# Above this many known configurations, the search cache of a resolver is cleared rather than growing
+# with every puzzle of a long run
+MAX_TRANSPOSITIONS = 1_000_000
+
+# Resolvers of the boards already seen by this process, by (board key, algorithm)
+_resolvers: Dict[Tuple[str, Algorithm], GameResolutionInterface] = {}
+_resolvers_lock = threading.Lock()
+
+# Boards of the puzzles given by their id, set by init_worker
+_board_tables: Optional['BoardCatalog'] = None
+
+
+def encode_board(board: CompiledBoard) -> dict:
+    """
+    Get the JSON form of a compiled board:
+    `{"size": 16, "walls": "9511...", "chips": {"RC": [x, y], ...}}`, with one hexadecimal digit of walls per cell
+    (`y * size + x` order), bit `direction` set when the cell has a wall on that side. Mirrors are not encoded.
+    """
+    size = board.board_size
+    walls = "".join(
+        f"{sum(1 << direction for direction, wall in enumerate(board.walls[x][y]) if wall):x}"
+        for y in range(size)
+        for x in range(size)
+    )
+    chips = {CHIP_KEYS[chip]: [coordinates.x, coordinates.y] for chip, coordinates in board.chip_coordinates.items()}
+    return {"size": size, "walls": walls, "chips": chips}
+
+
+def decode_board(data: dict) -> CompiledBoard:
+    """
+    Build a compiled board from the form given by `encode_board`.
+    """
+    size = data["size"]
+    walls = [[tuple(bool(int(data["walls"][y * size + x], 16) >> direction & 1) for direction in range(4))
+              for y in range(size)] for x in range(size)]
+    chips = [[(None, None) for _ in range(size)] for _ in range(size)]
+    for key, (x, y) in data["chips"].items():
+        chips[x][y] = CHIP_MAP[key]
+    mirrors = [[(None, None) for _ in range(size)] for _ in range(size)]
+    return CompiledBoard(size, walls, mirrors, chips)
+
+
+def get_board_key(data: dict) -> str:
+    """
+    Identifies the board of a puzzle, two equal boards having the same key.
+    """
+    return json.dumps(data, sort_keys=True, separators=(",", ":"))
+
+
+def encode_puzzle(state: GameState, board: Optional[CompiledBoard] = None) -> dict:
+    """
+    Get the JSON form of a game state:
+    `{"board": {...}, "robots": [[x, y], ...], "target": "RC"}`, the robots in the `GameState.pawns` order.
+    :param state: The game state.
+    :param board: Its compiled board, compiled from the state if not provided.
+    """
+    board = board if board is not None else CompiledBoard.from_game_state(state)
+    return {
+        "board": encode_board(board),
+        "robots": [[pawn.x, pawn.y] for pawn in state.pawns],
+        "target": CHIP_KEYS[state.current_target],
+    }
+
+
+def decode_puzzle(data: dict, board: Optional[CompiledBoard] = None) -> Tuple[GameState, CompiledBoard]:
+    """
+    Build the game state of a puzzle in the form given by `encode_puzzle`.
+    :param data: The puzzle.
+    :param board: Its compiled board, decoded from the puzzle if not provided (it must be provided when the puzzle
+        gives a "board_id" instead of its board).
+    :return: The game state and its compiled board.
+    """
+    board = board if board is not None else decode_board(data["board"])
+    state = GameState(
+        board_size=board.board_size,
+        walls=board.walls,
+        mirrors=board.mirrors,
+        chips=board.chips,
+        pawns=[Coordinate(x, y) for x, y in data["robots"]],
+        current_target=CHIP_MAP[data["target"]],
+    )
+    return state, board
+
+
+def init_worker(board_tables: Optional[str] = None):
+    """
+    Initializer of the solver processes.
+    :param board_tables: The name of the board tables published by the parent process (see `shared_boards`),
+        for the puzzles giving a "board_id" instead of their board.
+    """
+    global _board_tables
+    if board_tables is not None:
+        from shared_boards import SharedBoardTables
+        _board_tables = SharedBoardTables.attach(board_tables)
+
+
+def get_resolver(data: dict, algorithm: Algorithm) -> GameResolutionInterface:
+    """
+    Get the resolver of the board of a puzzle, shared by all the puzzles of that board solved by this process
+    (compiled board, distance maps and search cache). A puzzle giving a "board_id" gets its board
+    from the board tables of the process.
+    """
+    board_id = data.get("board_id")
+    if board_id is not None and _board_tables is None:
+        raise ValueError("The puzzle gives a board id, but no board tables are attached.")
+    key = (str(board_id) if board_id is not None else get_board_key(data["board"]), algorithm)
+    with _resolvers_lock:
+        resolver = _resolvers.get(key)
+        if resolver is None:
+            state, board = decode_puzzle(data, _board_tables.get_board(board_id) if board_id is not None else None)
+            resolver = create_resolver(algorithm, state, SearchCache(), board)
+            _resolvers[key] = resolver
+        elif len(resolver.cache.transpositions) > MAX_TRANSPOSITIONS:
+            resolver.cache.transpositions.clear()
+    return resolver
+
+
+def solve_puzzle(data: dict, algorithm: Algorithm = Algorithm.A_STAR, budget: Optional[float] = None) -> dict:
+    """
+    Solve a puzzle in the form given by `encode_puzzle`.
+    :param data: The puzzle.
+    :param algorithm: The algorithm to use.
+    :param budget: The number of seconds after which the search is cancelled, unlimited if not provided.
+    :return: `{"status": "solved" | "unsolvable" | "timeout", "moves": "RUGL", "length": 2, "nodes": ..., "time": ...}`,
+        the moves being two letters per move (color, direction), see `Solution.__str__`.
+    """
+    start_time = time.perf_counter()
+    resolver = get_resolver(data, algorithm)
+    state, _ = decode_puzzle(data, resolver.board)
+
+    progress = SearchProgress()
+    timer = None
+    if budget is not None:
+        timer = threading.Timer(budget, progress.cancel)
+        timer.daemon = True
+        timer.start()
+    try:
+        solution = resolver.resolve(state, progress)
+    finally:
+        if timer is not None:
+            timer.cancel()
+
+    if solution is not None:
+        status = "solved"
+    elif progress.cancelled:
+        status = "timeout"
+    else:
+        status = "unsolvable"
+    return {
+        "status": status,
+        "moves": str(solution) if solution is not None else None,
+        "length": len(solution) if solution is not None else None,
+        "nodes": progress.nodes,
+        "time": time.perf_counter() - start_time,
+    }
+
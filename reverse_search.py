@@ -0,0 +1,180 @@
+import argparse
+import contextlib
+import itertools
+import json
+import random
+import sys
+from math import comb
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from batched_env import clip_slides
+from compiled_board import CompiledBoard
+from solving_bfs_vectorized import PAWN_BITS, PAWN_MASK, VisitedMode, create_visited, get_visited_keys, unpack_pawns
+from utils import CHIP_MAP, Color, Coordinate, GameState, Shape
+
+# Index of the opposite of each direction (UP, RIGHT, DOWN, LEFT)
+OPPOSITE_DIRECTIONS = (2, 3, 0, 1)
+
+
+class ReverseGenerator:
+    """
+    Generates puzzles needing exactly `depth` moves with a retrograde analysis of a board and target: a breadth-first
+    search backward from all the goal configurations (target robot on its chip, the other robots anywhere).
+
+    The search follows the predecessor relation of the moves: a robot stopped at a cell by a wall or a robot may come
+    from any free cell behind it. The other robots are interchangeable for the target, so the states are deduplicated
+    by their canonical key (`VisitedMode.CANONICAL_BITMAP`) in a bitmap. A state is reached at the depth of its optimal
+    solution, so the depth `depth` of the search holds every puzzle needing exactly `depth` moves, once, and
+    the puzzles are sampled uniformly from it without solving any of them.
+
+    The cost is the number of states within `depth` moves of a goal, whatever the depth asked, and a frontier of
+    4 robots may hold hundreds of millions of states: it is expanded by chunks of `chunk_size` states.
+    Boards with mirrors are not supported.
+    """
+
+    def __init__(self, board: CompiledBoard, robot_count: int = len(Color), seed: Optional[int] = None, chunk_size: int = 1 << 20):
+        """
+        :param board: The compiled board, with its chips.
+        :param robot_count: The number of robots of the puzzles, in the `GameState.pawns` order.
+        :param seed: The seed of the sampling.
+        :param chunk_size: The number of states expanded at once.
+        """
+        if board.has_mirrors:
+            raise ValueError("Boards with mirrors are not supported.")
+        self.board = board
+        self.robot_count = robot_count
+        self.chunk_size = chunk_size
+        self.rng = np.random.default_rng(seed)
+        self.slides = np.array(board.slides, dtype=np.int64)
+        center = board.board_size // 2
+        excluded = {board.index_of(Coordinate(x, y)) for x in (center - 1, center) for y in (center - 1, center)}
+        self.start_cells = np.array(sorted(set(range(board.board_size ** 2)) - excluded), dtype=np.uint32)
+
+    def generate(self, target: Tuple[Color, Shape], depth: int, count: int) -> List[GameState]:
+        """
+        Sample distinct puzzles whose optimal solution has exactly `depth` moves, uniformly.
+        :param target: The chip to reach.
+        :param depth: The number of moves of the optimal solutions.
+        :param count: The number of puzzles wanted.
+        :return: Up to `count` game states, fewer if there aren't as many puzzles at this depth.
+        """
+        target_pawn = target[0].value
+        layer = self.search_backward(target, depth)
+        picks = self.rng.choice(len(layer), size=min(count, len(layer)), replace=False)
+
+        puzzles = []
+        for packed in layer[np.sort(picks)]:
+            cells = unpack_pawns(int(packed), self.robot_count)
+            # The other robots of a canonical state can be in any order
+            helpers = [cell for pawn, cell in enumerate(cells) if pawn != target_pawn]
+            helpers = [int(cell) for cell in self.rng.permutation(helpers)]
+            helpers.insert(target_pawn, cells[target_pawn])
+            puzzles.append(self._create_state(helpers, target))
+        return puzzles
+
+    def search_backward(self, target: Tuple[Color, Shape], depth: int) -> np.ndarray:
+        """
+        Retrograde breadth-first search from all the goal configurations of a target.
+        :return: One packed state of each canonical state needing exactly `depth` moves.
+        """
+        target_pawn = target[0].value
+        target_cell = self.board.index_of(self.board.get_chip_coordinates(*target))
+        cell_count = self.board.board_size ** 2
+        visited = create_visited(VisitedMode.CANONICAL_BITMAP, cell_count, self.robot_count)
+
+        frontier = self._get_goals(target_pawn, target_cell)
+        visited.add(get_visited_keys(VisitedMode.CANONICAL_BITMAP, frontier, target_pawn, self.robot_count, cell_count))
+        print(f"Depth 0: {len(frontier)} states")
+        for current_depth in range(1, depth + 1):
+            layer = []
+            for begin in range(0, len(frontier), self.chunk_size):
+                predecessors = self._expand_backward(frontier[begin:begin + self.chunk_size])
+                chunk_keys, first = np.unique(
+                    get_visited_keys(VisitedMode.CANONICAL_BITMAP, predecessors, target_pawn, self.robot_count, cell_count),
+                    return_index=True,
+                )
+                layer.append(predecessors[first[visited.add(chunk_keys)]])
+            frontier = np.concatenate(layer)
+            print(f"Depth {current_depth}: {len(frontier)} states")
+        return frontier
+
+    def _get_goals(self, target_pawn: int, target_cell: int) -> np.ndarray:
+        """
+        All the canonical goal configurations: the target robot on the target cell, the other robots on distinct
+        cells in increasing order.
+        """
+        cells = self.start_cells[self.start_cells != target_cell]
+        helper_count = self.robot_count - 1
+        helpers = np.fromiter(
+            itertools.chain.from_iterable(itertools.combinations(cells.tolist(), helper_count)),
+            dtype=np.uint32, count=comb(len(cells), helper_count) * helper_count,
+        ).reshape(-1, helper_count)
+        goals = np.full(len(helpers), target_cell << (PAWN_BITS * target_pawn), dtype=np.uint32)
+        for i, pawn in enumerate(pawn for pawn in range(self.robot_count) if pawn != target_pawn):
+            goals |= helpers[:, i] << np.uint32(PAWN_BITS * pawn)
+        return goals
+
+    def _expand_backward(self, frontier: np.ndarray) -> np.ndarray:
+        """
+        All the predecessors of the frontier: for each robot and direction in which it can't move further,
+        every free cell behind it it may have slid from.
+        """
+        size = self.board.board_size
+        cells = [((frontier >> (PAWN_BITS * pawn)) & PAWN_MASK).astype(np.int64) for pawn in range(self.robot_count)]
+        predecessors = []
+        for pawn in range(self.robot_count):
+            end = cells[pawn]
+            cleared = frontier & np.uint32(0xFFFFFFFF ^ (PAWN_MASK << (PAWN_BITS * pawn)))
+            for direction, delta in enumerate(self.board.deltas):
+                # The robot must be stopped here: it doesn't move any further in this direction
+                stopped = clip_slides(end, self.slides[direction][end], delta, cells, size) == end
+                opposite = OPPOSITE_DIRECTIONS[direction]
+                back = clip_slides(end, self.slides[opposite][end], -delta, cells, size)
+                steps = np.where(stopped, (back - end) // -delta, 0)
+                for step in range(1, int(steps.max(initial=0)) + 1):
+                    moved = np.flatnonzero(steps >= step)
+                    start = (end[moved] - step * delta).astype(np.uint32)
+                    predecessors.append(cleared[moved] | (start << (PAWN_BITS * pawn)))
+        if not predecessors:
+            return np.empty(0, dtype=np.uint32)
+        return np.concatenate(predecessors)
+
+    def _create_state(self, cells: List[int], target: Tuple[Color, Shape]) -> GameState:
+        return GameState(
+            board_size=self.board.board_size,
+            walls=self.board.walls,
+            mirrors=self.board.mirrors,
+            chips=self.board.chips,
+            pawns=[self.board.coordinates[cell] for cell in cells],
+            current_target=target,
+        )
+
+
+def main():
+    from generate_corpus import create_boards
+    from puzzles import decode_board, encode_puzzle
+
+    parser = argparse.ArgumentParser(description="Generate puzzles needing exactly DEPTH moves, as JSONL on the output.")
+    parser.add_argument("depth", type=int, help="Number of moves of the optimal solutions")
+    parser.add_argument("count", type=int, help="Number of puzzles")
+    parser.add_argument("--target", default=None, choices=sorted(CHIP_MAP), help="Chip to reach (default: random)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--robots", type=int, default=len(Color), help="Number of robots per puzzle")
+    args = parser.parse_args()
+
+    board_data = create_boards(1, args.seed)[0]
+    board = decode_board(board_data)
+    chips = sorted(key for key in board_data["chips"] if CHIP_MAP[key][0].value < args.robots)
+    target = CHIP_MAP[args.target or random.Random(args.seed).choice(chips)]
+    generator = ReverseGenerator(board, args.robots, seed=args.seed)
+    # The search reports its progress on the standard output, kept for the puzzles
+    with contextlib.redirect_stdout(sys.stderr):
+        puzzles = generator.generate(target, args.depth, args.count)
+    for state in puzzles:
+        print(json.dumps({**encode_puzzle(state, board), "length": args.depth}))
+
+
+if __name__ == "__main__":
+    main()
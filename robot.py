@@ -1,8 +1,3 @@
-import pygame
-import random
-
-
-
 class Robot:
     def __init__(self, color, x, y):
         self.color = color
@@ -0,0 +1,83 @@
+import struct
+import threading
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from board_catalog import CATALOG_RECORD, BoardCatalog, create_board_records
+
+# Number of boards at the start of the shared memory, padded for the alignment of the records
+HEADER = struct.Struct("<Q8x")
+
+
+def get_walls_and_targets(data: dict) -> Tuple[np.ndarray, Dict[str, Tuple[int, int]]]:
+    """
+    Get the wall bits and targets of a board in the `puzzles.encode_board` form,
+    in the `map_builder.QuadrantTables.assemble` format.
+    """
+    size = data["size"]
+    walls = np.array([int(digit, 16) for digit in data["walls"]], dtype=np.uint8).reshape(size, size)
+    return walls, {key: (x, y) for key, (x, y) in data["chips"].items()}
+
+
+class SharedBoardTables(BoardCatalog):
+    """
+    Board records (see `board_catalog.CATALOG_RECORD`) published once in shared memory by the parent process,
+    and attached by name by the workers: their records are read in place rather than pickled to each of them,
+    and the puzzles sent to the workers only give the id of their board (see `wire_format.pack_puzzle`).
+    The id of a board is its index in the published list.
+    """
+
+    def __init__(self, memory: shared_memory.SharedMemory, owner: bool = False):
+        """
+        Use `publish` or `attach` instead.
+        """
+        count, = HEADER.unpack_from(memory.buf)
+        self.memory = memory
+        self.owner = owner
+        self.records = np.ndarray(count, dtype=CATALOG_RECORD, buffer=memory.buf, offset=HEADER.size)
+        self._boards = {}
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        """
+        The name the workers attach the tables with.
+        """
+        return self.memory.name
+
+    @classmethod
+    def publish(cls, boards: List[dict]) -> "SharedBoardTables":
+        """
+        Compile boards and publish their records in a new block of shared memory, to be closed by `close`.
+        :param boards: The boards in the `puzzles.encode_board` form.
+        """
+        records = create_board_records([get_walls_and_targets(board) for board in boards])
+        memory = shared_memory.SharedMemory(create=True, size=HEADER.size + records.nbytes)
+        HEADER.pack_into(memory.buf, 0, len(records))
+        np.ndarray(len(records), dtype=CATALOG_RECORD, buffer=memory.buf, offset=HEADER.size)[:] = records
+        return cls(memory, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedBoardTables":
+        """
+        Attach the tables published by another process.
+        """
+        return cls(shared_memory.SharedMemory(name))
+
+    def close(self):
+        """
+        Detach the tables, and free them if they were published by this process.
+        """
+        # The memory can't be closed while an array uses it
+        self.records = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+    def __enter__(self) -> "SharedBoardTables":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,195 @@
+import argparse
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from puzzles import get_board_key, init_worker, solve_puzzle
+from utils import Algorithm
+from wire_format import pack_puzzle, unpack_puzzle
+
+DEFAULT_PORT = 8765
+
+
+def _warm_up():
+    return os.getpid()
+
+
+def _solve(packed: bytes, algorithm: str, budget: Optional[float], accepted: float) -> dict:
+    if budget is not None:
+        # The time spent waiting for the worker counts in the budget of the request
+        budget -= time.time() - accepted
+        if budget <= 0:
+            return {"status": "timeout", "moves": None, "length": None, "nodes": 0, "time": 0.0}
+    return solve_puzzle(unpack_puzzle(packed), Algorithm[algorithm], budget)
+
+
+class SolverService:
+    """
+    Solves puzzles (see `puzzles.encode_puzzle`) in a pool of processes started up front.
+    Identical requests in flight share a single search, and the requests of a board always go to the same process,
+    which keeps its resolvers: each board is compiled once for the whole pool, and its caches are reused
+    by all the connections.
+    """
+
+    def __init__(self, workers: Optional[int] = None, default_budget: Optional[float] = None):
+        """
+        :param workers: The number of processes, the number of CPUs by default.
+        :param default_budget: The number of seconds allowed to a request that doesn't set its own budget.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.default_budget = default_budget
+        # One process per executor, to choose the process of each board
+        self.pools: List[ProcessPoolExecutor] = [
+            ProcessPoolExecutor(1, initializer=init_worker) for _ in range(self.workers)
+        ]
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        # Start all the workers now rather than on the first requests
+        for future in [pool.submit(_warm_up) for pool in self.pools]:
+            future.result()
+
+    def submit(self, request: dict) -> Future:
+        """
+        Start solving a request `{"puzzle": {...}, "algorithm": "A_STAR", "budget": 5.0}`, or join the identical
+        request already running. The budget starts now, the time waiting for the worker included.
+        :return: The future of the result of `puzzles.solve_puzzle`.
+        """
+        puzzle = request["puzzle"]
+        algorithm = request.get("algorithm", Algorithm.A_STAR.name)
+        if algorithm not in Algorithm.__members__:
+            raise ValueError(f"Unsupported algorithm: {algorithm}")
+        budget = request.get("budget", self.default_budget)
+        accepted = time.time()
+
+        key = json.dumps([puzzle, algorithm, budget], sort_keys=True)
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future
+            # Sent to the worker in the binary form of wire_format rather than pickled
+            pool = self.pools[zlib.crc32(get_board_key(puzzle["board"]).encode()) % self.workers]
+            future = pool.submit(_solve, pack_puzzle(puzzle), algorithm, budget, accepted)
+            self._in_flight[key] = future
+        # Out of the lock: the callback runs at once if the search is already done
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def _forget(self, key: str, future: Future):
+        # Failed searches too: an identical request then starts a new one
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def shutdown(self):
+        for pool in self.pools:
+            pool.shutdown(cancel_futures=True)
+
+
+class SolverRequestHandler(BaseHTTPRequestHandler):
+    """
+    `POST /solve` with a JSON request (see `SolverService.submit`), answered with the JSON result,
+    or with `{"error": ...}`: 400 for an invalid request or puzzle, 500 if the search failed otherwise.
+    """
+
+    server: "SolverServer"
+
+    def do_POST(self):
+        if self.path != "/solve":
+            self._send(404, {"error": "Unknown path"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            future = self.server.service.submit(request)
+        except (ValueError, KeyError, TypeError) as e:
+            self._send(400, {"error": str(e)})
+            return
+        # The errors of the worker are raised again here
+        try:
+            result = future.result()
+        except (ValueError, KeyError, TypeError) as e:
+            self._send(400, {"error": f"Invalid puzzle: {e}"})
+            return
+        except Exception as e:
+            self._send(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        self._send(200, result)
+
+    def _send(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SolverServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, service: SolverService, host: str = "127.0.0.1", port: int = DEFAULT_PORT):
+        super().__init__((host, port), SolverRequestHandler)
+        self.service = service
+
+
+class SolverClient:
+    """
+    Client of a local `SolverServer`.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, timeout: Optional[float] = None):
+        self.url = f"http://{host}:{port}/solve"
+        self.timeout = timeout
+
+    def solve(self, puzzle: dict, algorithm: Algorithm = Algorithm.A_STAR, budget: Optional[float] = None) -> dict:
+        """
+        Solve a puzzle on the server.
+        :return: The result of `puzzles.solve_puzzle`.
+        :raise ValueError: If the server rejected the puzzle.
+        :raise RuntimeError: If the search failed on the server.
+        """
+        request = {"puzzle": puzzle, "algorithm": algorithm.name}
+        if budget is not None:
+            request["budget"] = budget
+        http_request = urllib.request.Request(
+            self.url, data=json.dumps(request).encode(), headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(http_request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            error = json.loads(e.read()).get("error", e.reason)
+            raise (ValueError if e.code == 400 else RuntimeError)(error) from None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local solver server, POST /solve with a JSON puzzle.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None, help="Number of solver processes (default: CPU count)")
+    parser.add_argument("--budget", type=float, default=None, help="Default seconds allowed per request")
+    args = parser.parse_args()
+
+    service = SolverService(args.workers, args.budget)
+    server = SolverServer(service, args.host, args.port)
+    print(f"Solver listening on http://{args.host}:{args.port}/solve with {service.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,8 @@ import heapq
 from typing import List, Optional, Tuple
 from dataclasses import dataclass
 from collections import deque
-from utils import Coordinate, Direction, GameState, Color, MirrorAngle, Shape,GameResolutionInterface
+from compiled_board import CompiledBoard
+from utils import Coordinate, Direction, GameState, Color, Shape, GameResolutionInterface, SearchCache, SearchProgress, Solution, encode_move
 
 @dataclass(frozen=True)
 class ResolutionState:
@@ -10,25 +11,22 @@ class ResolutionState:
     cost: int 
     heuristic: int  # A* heuristic value
     previous_state: Optional["ResolutionState"] = None
+    move: Optional[int] = None  # Move that led to this state (see encode_move)
 
     # Comparison function for the priority queue based on cost + heuristic
     def __lt__(self, other: "ResolutionState") -> bool:
         return (self.cost + self.heuristic) < (other.cost + other.heuristic)
 
     # Generates the sequence of moves from the current state to the initial state
-    def get_move_sequence(self) -> List[Tuple[Color, Coordinate]]:
-        moves = []
+    def get_move_sequence(self) -> bytes:
+        moves = bytearray()
         current = self
-     # Traverse back through previous states to generate the sequence of moves
+     # Traverse back through previous states to collect the encoded moves
         while current.previous_state is not None:
-            for pawn_color, (curr_pos, prev_pos) in enumerate(
-                zip(current.pawns, current.previous_state.pawns)
-            ):
-                if curr_pos != prev_pos:
-                    moves.append((Color(pawn_color), curr_pos))# Record the move of the pawn
-                    break
+            moves.append(current.move)
             current = current.previous_state
-        return list(reversed(moves)) # Return the sequence in the correct order
+        moves.reverse()
+        return bytes(moves) # Return the sequence in the correct order
 
     # Custom string representation for debugging and output
     def __str__(self):
@@ -67,289 +65,77 @@ def get_shape(shape_code: Shape):
 
 # AI player class that will use A* to find the solution
 class AStar(GameResolutionInterface):
-    def __init__(self, state: "GameState"):
-        super().__init__(state)
+    def __init__(self, state: "GameState", cache: Optional[SearchCache] = None, board: Optional[CompiledBoard] = None):
+        super().__init__(state, cache, board)
         self.name = "AI"
-        self.state = state  # Current game state
-        self.visited_positions = [[coords] for coords in self.state.pawns]
 
     # Compute the possible moves for a given state
-    def compute_choices(self, state: "ResolutionState", target_pawn_color: Optional[Color] = None) -> List[Tuple[Color, Coordinate]]:
-        possible_moves: List[Tuple[Color, Coordinate]] = []
+    def compute_choices(self, state: "ResolutionState", visited_positions: List[List[Coordinate]], target_pawn_color: Optional[Color] = None) -> List[Tuple[Color, Direction, Coordinate]]:
+        possible_moves: List[Tuple[Color, Direction, Coordinate]] = []
         pawn_colors = (
             [target_pawn_color] # If a target pawn is specified, limit to that pawn
             if target_pawn_color is not None
-            else Color(range(len(state.pawns))) # Otherwise consider all pawns
+            else [Color(i) for i in range(len(state.pawns))] # Otherwise consider all pawns
         )
 
          # Loop through all pawns and directions to generate possible moves
         for pawn_color in pawn_colors:
             for direction in Direction:
                 target_coords = self._get_pawn_destination(state, pawn_color, direction)
-        # Only add the move if it's valid and the pawn hasn't visited this position before
-                if target_coords is not None and (
+        # Only add the move if it's valid, moves the pawn and the pawn hasn't visited this position before
+                if target_coords is not None and target_coords != state.pawns[pawn_color.value] and (
                     target_pawn_color is None
-                    or target_coords not in self.visited_positions[pawn_color.value]
+                    or target_coords not in visited_positions[pawn_color.value]
                 ):
-                    possible_moves.append((pawn_color, target_coords))
+                    possible_moves.append((pawn_color, direction, target_coords))
         return possible_moves
 
     # Solve the puzzle using A* algorithm
-    def resolve(self) -> Optional[List[Tuple[Color, Coordinate]]]:
-        # Initialize priority queue and set of explored states
-        open_list = []
-        heapq.heappush(open_list, ResolutionState(
-            pawns=self.state.pawns,
-            cost=0,
-            heuristic=self._calculate_heuristic(self.state.pawns),
-        ))
-        explored_states = set()
-
-        # Get the target position for the current pawn
-        target_coords = self.get_chip_coordinates(*self.state.current_target)
-        target_pawn_color = self.state.current_target[0]
-        print(f"Target: {get_color_name(target_pawn_color)} {get_shape(self.state.current_target[1])} "
-              f"(at x={target_coords.x}, y={target_coords.y})")
-
-        # A* loop to find the optimal solution
-        while open_list:
-            current_state = heapq.heappop(open_list)  # Get the state with the lowest cost + heuristic
-
-            # Check if we've reached the target
-            if self._is_solution(current_state.pawns):
-                return current_state.get_move_sequence()
-
-            # Mark state as visited
-            state_tuple = tuple(current_state.pawns)
-            if state_tuple in explored_states:
-                continue
-            explored_states.add(state_tuple)
-
-            # Compute all possible moves
-            moves = self.compute_choices(current_state, target_pawn_color)
-            has_valid_moves = False
-
-            for pawn_color, target_coords in moves:
-                has_valid_moves = True
-
-                new_pawns = list(current_state.pawns)
-                new_pawns[pawn_color.value] = target_coords
+    # The search state only lives in this method, so the resolver can be shared between queries and threads
+    # Progress is reported after each expanded state, and the search stops once the progress is cancelled
+    def resolve(self, state: Optional[GameState] = None, progress: Optional[SearchProgress] = None) -> Optional[Solution]:
+        state = state if state is not None else self.state
 
-                # Create a new state with the updated positions and add it to the open list
-                new_state = ResolutionState(
-                    pawns=new_pawns,
-                    cost=current_state.cost + 1,
-                    heuristic=self._calculate_heuristic(new_pawns),
-                    previous_state=current_state,
-                )
-
-                heapq.heappush(open_list, new_state)
-
-            if not has_valid_moves:
-                print("No valid moves found at this step.")
-
-        print("No solution found.")
-        return None
-
-    def _calculate_heuristic(self, pawns: List[Coordinate]) -> int:
-        """
-        Calculate the heuristic for the A* algorithm.
-        Here, we estimate the distance to the target as the Manhattan distance of the target pawn.
-        """
-        target_pawn_color = self.state.current_target[0]
-        target_coords = self.get_chip_coordinates(*self.state.current_target)
-        pawn_coords = pawns[target_pawn_color.value]
-        return abs(target_coords.x - pawn_coords.x) + abs(target_coords.y - pawn_coords.y)
+        # Reuse a previous search that went through this configuration
+        known_solution = self._get_known_solution(state)
+        if known_solution is not None:
+            self._log("Solution already known for this configuration.")
+            return known_solution
 
-    # Check if the current state is a solution (i.e., target pawn is at its destination)
-    def _is_solution(self, pawns: List[Coordinate]) -> bool:
-        target_pawn_color = self.state.current_target[0]
-        target = self.get_chip_coordinates(*self.state.current_target)
-        return pawns[target_pawn_color.value] == target
-    
-    # Get the destination of a pawn based on its direction
-    def _get_pawn_destination(self, state: ResolutionState, pawn_color: Color, direction: Direction) -> Optional[Coordinate]:
-        pawn = state.pawns[pawn_color.value]
-        if not pawn:
-            return None
-
-        x, y = pawn.x, pawn.y
-        direction_deltas = {
-            Direction.UP: (0, -1),
-            Direction.RIGHT: (1, 0),
-            Direction.DOWN: (0, 1),
-            Direction.LEFT: (-1, 0),
-        }
-        dx, dy = direction_deltas[direction]
-
-        # If there's a wall, the pawn can't move
-        if self.state.walls[x][y][direction.value]:
-            return Coordinate(x=x, y=y)
-
-        # Keep moving in the direction until hitting an obstacle
-        while 0 <= x + dx < self.state.board_size and 0 <= y + dy < self.state.board_size:
-            x += dx
-            y += dy
-
-         # Handle reflections if there are mirrors
-            mirror = self.state.mirrors[x][y]
-            if mirror[0] is not None:
-                if pawn_color != mirror[0]:
-                    continue
-                new_direction = self._get_reflected_direction(direction, mirror[1])
-                return self._get_pawn_destination(state, pawn_color, new_direction, Coordinate(x=x, y=y))
-
-            # If there's a wall or pawn at the new position, stop
-            if self.state.walls[x][y][direction.value]:
-                return Coordinate(x=x, y=y)
-
-            if self._is_pawn_at(state, Coordinate(x=x, y=y)):
-                return Coordinate(x=x - dx, y=y - dy)
-
-        return Coordinate(x=x, y=y)
-
-    # Check if there's a pawn at the target coordinates
-    @staticmethod
-    def _is_pawn_at(state: ResolutionState, target_coords: Coordinate) -> bool:
-        return any(p == target_coords for p in state.pawns if p is not None)
-
-    @staticmethod
-    def _get_reflected_direction(direction: Direction, mirror_angle: MirrorAngle) -> Direction:
-        reflection_map = {
-            (Direction.UP, MirrorAngle.BACKSLASH): Direction.LEFT,
-            (Direction.UP, MirrorAngle.SLASH): Direction.RIGHT,
-            (Direction.RIGHT, MirrorAngle.SLASH): Direction.UP,
-            (Direction.RIGHT, MirrorAngle.BACKSLASH): Direction.DOWN,
-            (Direction.DOWN, MirrorAngle.BACKSLASH): Direction.RIGHT,
-            (Direction.DOWN, MirrorAngle.SLASH): Direction.LEFT,
-            (Direction.LEFT, MirrorAngle.BACKSLASH): Direction.UP,
-            (Direction.LEFT, MirrorAngle.SLASH): Direction.DOWN,
-        }
-        return reflection_map[(direction, mirror_angle)]
-
-    # Find the coordinates of a specific chip based on color and shape
-    def get_chip_coordinates(self, color: Color, chip: Shape) -> Coordinate:
-        for x, col in enumerate(self.state.chips):
-            for y, (c, ch) in enumerate(col):
-                if c == color and ch == chip:
-                    return Coordinate(x=x, y=y)
-        raise ValueError(f"Chip {chip} of color {color} not found on the board.")
-
-
-import heapq
-from typing import List, Optional, Tuple
-from dataclasses import dataclass
-from collections import deque
-from utils import Coordinate, Direction, GameState, Color, MirrorAngle, Shape
-
-@dataclass(frozen=True)
-class ResolutionState:
-    pawns: List[Coordinate]# Positions of all pawns
-    cost: int 
-    heuristic: int  # A* heuristic value
-    previous_state: Optional["ResolutionState"] = None
-
-    # Comparison function for the priority queue based on cost + heuristic
-    def __lt__(self, other: "ResolutionState") -> bool:
-        return (self.cost + self.heuristic) < (other.cost + other.heuristic)
-
-    # Generates the sequence of moves from the current state to the initial state
-    def get_move_sequence(self) -> List[Tuple[Color, Coordinate]]:
-        moves = []
-        current = self
-     # Traverse back through previous states to generate the sequence of moves
-        while current.previous_state is not None:
-            for pawn_color, (curr_pos, prev_pos) in enumerate(
-                zip(current.pawns, current.previous_state.pawns)
-            ):
-                if curr_pos != prev_pos:
-                    moves.append((Color(pawn_color), curr_pos))# Record the move of the pawn
-                    break
-            current = current.previous_state
-        return list(reversed(moves)) # Return the sequence in the correct order
-
-    # Custom string representation for debugging and output
-    def __str__(self):
-        pawn_moved = None
-
-        if self.previous_state:
-          # Find the pawn that was moved in this state
-            for i, (curr_pos, prev_pos) in enumerate(
-                zip(self.pawns, self.previous_state.pawns)
-            ):
-                if curr_pos != prev_pos:
-                    pawn_moved = i
-                    break
-
-        string = "\n\n"
-
-        if pawn_moved is None:
-            string += "Initial state:\n"
-        else:
-            string += f"Move pawn {get_color_name(Color(pawn_moved))} with a cost of {self.cost}:\n"
-        string += "\n".join(
-            f"  Pawn {i}: ({pos.x}, {pos.y})" + (" <-" if i == pawn_moved else "")
-            for i, pos in enumerate(self.pawns)
-        )
-
-        return string
-    
-# Helper function to convert color code to its name
-def get_color_name(color_code: Color):
-    colors = ["red", "green", "blue", "yellow"]
-    return colors[color_code.value]
-
-def get_shape(shape_code: Shape):
-    shapes = ["circle", "square", "triangle", "star"]
-    return shapes[shape_code.value]
-
-# AI player class that will use A* to find the solution
-class AIPlayer:
-    def __init__(self, state: "GameState"):
-        self.name = "AI"
-        self.state = state # Current game state
-        self.visited_positions = [[coords] for coords in self.state.pawns]
-
-    # Compute the possible moves for a given state
-    def compute_choices(self, state: "ResolutionState", target_pawn_color: Optional[Color] = None) -> List[Tuple[Color, Coordinate]]:
-        possible_moves: List[Tuple[Color, Coordinate]] = []
-        pawn_colors = (
-            [target_pawn_color] # If a target pawn is specified, limit to that pawn
-            if target_pawn_color is not None
-            else Color(range(len(state.pawns))) # Otherwise consider all pawns
-        )
-
-         # Loop through all pawns and directions to generate possible moves
-        for pawn_color in pawn_colors:
-            for direction in Direction:
-                target_coords = self._get_pawn_destination(state, pawn_color, direction)
-        # Only add the move if it's valid and the pawn hasn't visited this position before
-                if target_coords is not None and (
-                    target_pawn_color is None
-                    or target_coords not in self.visited_positions[pawn_color.value]
-                ):
-                    possible_moves.append((pawn_color, target_coords))
-        return possible_moves
+        # Get the target position for the current pawn
+        chip_coords = self.get_chip_coordinates(*state.current_target)
+        target_pawn_color = state.current_target[0]
+        distance_map = self.board.get_distance_map(chip_coords)
+        self._log(f"Target: {get_color_name(target_pawn_color)} {get_shape(state.current_target[1])} "
+              f"(at x={chip_coords.x}, y={chip_coords.y})")
 
-    # Solve the puzzle using A* algorithm
-    def solve(self) -> Optional[List[Tuple[Color, Coordinate]]]:
         # Initialize priority queue and set of explored states
         open_list = []
-        heapq.heappush(open_list, ResolutionState(pawns=self.state.pawns, cost=0, heuristic=self._calculate_heuristic(self.state.pawns)))
+        initial_heuristic = self._calculate_heuristic(state.pawns, target_pawn_color, distance_map)
+        if initial_heuristic is not None:
+            heapq.heappush(open_list, ResolutionState(
+                pawns=state.pawns,
+                cost=0,
+                heuristic=initial_heuristic,
+            ))
         explored_states = set()
-
-        # Get the target position for the current pawn
-        target_coords = self.get_chip_coordinates(*self.state.current_target)
-        target_pawn_color = self.state.current_target[0]
-        print("Target:", get_color_name(target_pawn_color), get_shape(self.state.current_target[1]), f"(at x={target_coords.x}, y={target_coords.y})")
+        visited_positions = [[coords] for coords in state.pawns]
 
         # A* loop to find the optimal solution
         while open_list:
-            current_state = heapq.heappop(open_list) # Get the state with the lowest cost + heuristic
+            current_state = heapq.heappop(open_list)  # Get the state with the lowest cost + heuristic
+            if progress is not None:
+                if progress.cancelled:
+                    self._log("Search cancelled.")
+                    return None
+                progress.nodes += 1
+                progress.depth = current_state.cost
 
             # Check if we've reached the target
-            if self._is_solution(current_state.pawns):
-                return current_state.get_move_sequence()
+            if self._is_solution(current_state.pawns, target_pawn_color, chip_coords):
+                solution = Solution(current_state.get_move_sequence(), tuple(current_state.pawns))
+                self._record_solution(state, solution)
+                return solution
 
             # Mark state as visited
             state_tuple = tuple(current_state.pawns)
@@ -358,113 +144,52 @@ class AIPlayer:
             explored_states.add(state_tuple)
 
             # Compute all possible moves
-            moves = self.compute_choices(current_state, target_pawn_color)
-            has_valid_moves = False
-
-            for pawn_color, target_coords in moves:
-                has_valid_moves = True
+            moves = self.compute_choices(current_state, visited_positions, target_pawn_color)
 
+            for pawn_color, direction, target_coords in moves:
                 new_pawns = list(current_state.pawns)
                 new_pawns[pawn_color.value] = target_coords
 
-            # Create a new state with the updated positions and add it to the open list
+                # Skip the states from which the target can't be reached
+                heuristic = self._calculate_heuristic(new_pawns, target_pawn_color, distance_map)
+                if heuristic is None:
+                    continue
+
+                # Create a new state with the updated positions and add it to the open list
                 new_state = ResolutionState(
                     pawns=new_pawns,
                     cost=current_state.cost + 1,
-                    heuristic=self._calculate_heuristic(new_pawns),
+                    heuristic=heuristic,
                     previous_state=current_state,
+                    move=encode_move(pawn_color, direction),
                 )
 
                 heapq.heappush(open_list, new_state)
 
-            if not has_valid_moves:
-                print("No valid moves found at this step.")
-
-        print("No solution found.")
+        self._log("No solution found.")
         return None
 
-    def _calculate_heuristic(self, pawns: List[Coordinate]) -> int:
+    @staticmethod
+    def _calculate_heuristic(pawns: List[Coordinate], target_pawn_color: Color, distance_map: List[List[Optional[int]]]) -> Optional[int]:
         """
         Calculate the heuristic for the A* algorithm.
-        Here, we estimate the distance to the target as the Manhattan distance of the target pawn.
+        Here, we estimate the distance to the target with the distance map of the target pawn (number of moves
+        ignoring the other pawns), which never overestimates the real cost. None if the target can't be reached.
         """
-        target_pawn_color = self.state.current_target[0]
-        target_coords = self.get_chip_coordinates(*self.state.current_target)
         pawn_coords = pawns[target_pawn_color.value]
-        return abs(target_coords.x - pawn_coords.x) + abs(target_coords.y - pawn_coords.y)
+        return distance_map[pawn_coords.x][pawn_coords.y]
 
     # Check if the current state is a solution (i.e., target pawn is at its destination)
-    def _is_solution(self, pawns: List[Coordinate]) -> bool:
-        target_pawn_color = self.state.current_target[0]
-        target = self.get_chip_coordinates(*self.state.current_target)
+    @staticmethod
+    def _is_solution(pawns: List[Coordinate], target_pawn_color: Color, target: Coordinate) -> bool:
         return pawns[target_pawn_color.value] == target
     
-    # Get the destination of a pawn based on its direction
+    # Get the destination of a pawn based on its direction, with the move kernel of the compiled board
     def _get_pawn_destination(self, state: ResolutionState, pawn_color: Color, direction: Direction) -> Optional[Coordinate]:
-        pawn = state.pawns[pawn_color.value]
-        if not pawn:
+        if not state.pawns[pawn_color.value]:
             return None
-
-        x, y = pawn.x, pawn.y
-        direction_deltas = {
-            Direction.UP: (0, -1),
-            Direction.RIGHT: (1, 0),
-            Direction.DOWN: (0, 1),
-            Direction.LEFT: (-1, 0),
-        }
-        dx, dy = direction_deltas[direction]
-
-        # If there's a wall, the pawn can't move
-        if self.state.walls[x][y][direction.value]:
-            return Coordinate(x=x, y=y)
-
-        # Keep moving in the direction until hitting an obstacle
-        while 0 <= x + dx < self.state.board_size and 0 <= y + dy < self.state.board_size:
-            x += dx
-            y += dy
-
-         # Handle reflections if there are mirrors
-            mirror = self.state.mirrors[x][y]
-            if mirror[0] is not None:
-                if pawn_color != mirror[0]:
-                    continue
-                new_direction = self._get_reflected_direction(direction, mirror[1])
-                return self._get_pawn_destination(state, pawn_color, new_direction, Coordinate(x=x, y=y))
-
-            # If there's a wall or pawn at the new position, stop
-            if self.state.walls[x][y][direction.value]:
-                return Coordinate(x=x, y=y)
-
-            if self._is_pawn_at(state, Coordinate(x=x, y=y)):
-                return Coordinate(x=x - dx, y=y - dy)
-
-        return Coordinate(x=x, y=y)
-
-    # Check if there's a pawn at the target coordinates
-    @staticmethod
-    def _is_pawn_at(state: ResolutionState, target_coords: Coordinate) -> bool:
-        return any(p == target_coords for p in state.pawns if p is not None)
-
-    @staticmethod
-    def _get_reflected_direction(direction: Direction, mirror_angle: MirrorAngle) -> Direction:
-        reflection_map = {
-            (Direction.UP, MirrorAngle.BACKSLASH): Direction.LEFT,
-            (Direction.UP, MirrorAngle.SLASH): Direction.RIGHT,
-            (Direction.RIGHT, MirrorAngle.SLASH): Direction.UP,
-            (Direction.RIGHT, MirrorAngle.BACKSLASH): Direction.DOWN,
-            (Direction.DOWN, MirrorAngle.BACKSLASH): Direction.RIGHT,
-            (Direction.DOWN, MirrorAngle.SLASH): Direction.LEFT,
-            (Direction.LEFT, MirrorAngle.BACKSLASH): Direction.UP,
-            (Direction.LEFT, MirrorAngle.SLASH): Direction.DOWN,
-        }
-        return reflection_map[(direction, mirror_angle)]
+        return self.board.get_pawn_destination(state.pawns, pawn_color, direction)
 
     # Find the coordinates of a specific chip based on color and shape
     def get_chip_coordinates(self, color: Color, chip: Shape) -> Coordinate:
-        for x, col in enumerate(self.state.chips):
-            for y, (c, ch) in enumerate(col):
-                if c == color and ch == chip:
-                    return Coordinate(x=x, y=y)
-        raise ValueError(f"Chip {chip} of color {color} not found on the board.")
-
-
+        return self.board.get_chip_coordinates(color, chip)
@@ -0,0 +1,266 @@
+import os
+import tempfile
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from compiled_board import CompiledBoard
+from solving_bfs import BFS, get_color_name, get_shape
+from solving_bfs_vectorized import (
+    PAWN_BITS, PAWN_MASK, VectorizedBFS, VisitedMode, create_visited, get_visited_keys, pack_pawns, unpack_pawns
+)
+from utils import GameState, SearchCache, SearchProgress, Solution
+
+# States are spread over 2^BUCKET_BITS buckets by their high bits, so a layer is sorted once its buckets are
+BUCKET_BITS = 8
+
+
+class ExternalMemoryBFS(VectorizedBFS):
+    """
+    Vectorized breadth-first search keeping its layers on disk, for the puzzles whose search doesn't fit in RAM.
+
+    Each depth is a file of sorted packed states, split in buckets by their high bits. The frontier is read back
+    by chunks through a memory map and its successors are buffered in RAM; above `ram_limit` bytes the buffer is
+    spilled to one run file per bucket. Once the depth is expanded, each bucket is loaded alone, deduplicated
+    and cleared of the states already visited, kept as one bit per canonical state
+    (`VisitedMode.CANONICAL_BITMAP`, pages allocated as they are touched). The search then ends once a depth
+    brings no new state, on the puzzles without any solution too.
+
+    Without the bitmap, the states are only compared with the same bucket of the `duplicate_layers` previous
+    depths (delayed duplicate detection). The moves are not reversible, so a state may come back after more than
+    two depths and the search only ends at `max_depth`. Parents are not stored, the moves are found again by
+    expanding the previous layers once the target is reached.
+    """
+
+    def __init__(
+        self,
+        state: "GameState",
+        cache: Optional[SearchCache] = None,
+        board: Optional[CompiledBoard] = None,
+        ram_limit: int = 256 * 1024 ** 2,
+        duplicate_layers: int = 2,
+        max_depth: Optional[int] = None,
+        directory: Optional[str] = None,
+        visited_bitmap: bool = True,
+    ):
+        """
+        :param ram_limit: The number of bytes of successors buffered before spilling them to disk.
+        :param duplicate_layers: The number of previous depths the new states are compared with, without the bitmap.
+        :param max_depth: The depth at which the search gives up, unlimited by default (with the bitmap, the search
+            ends when no new state is reached).
+        :param directory: Where the layer files are written, the default temporary directory if not provided.
+        :param visited_bitmap: Whether to keep the visited states in a bitmap (about 88 MB of address space for
+            4 pawns). Without it, `max_depth` must be given for the search to end on unsolvable puzzles.
+        """
+        if not visited_bitmap and max_depth is None:
+            raise ValueError("Without the visited bitmap, a max_depth is needed for the search to end.")
+        super().__init__(state, cache, board, VisitedMode.CANONICAL_BITMAP if visited_bitmap else VisitedMode.SORTED)
+        self.visited_bitmap = visited_bitmap
+        self.ram_limit = ram_limit
+        self.duplicate_layers = duplicate_layers
+        self.max_depth = max_depth
+        self.directory = directory
+        # Up to 16 successors per state, with their parent index and move
+        self.chunk_size = max(1, ram_limit // (16 * 16))
+
+    def resolve(self, state: Optional[GameState] = None, progress: Optional[SearchProgress] = None) -> Optional[Solution]:
+        """
+        Find an optimal solution, one depth at a time, with the layers of the search on disk.
+        :param state: The game state to resolve, on the board of the resolver. Defaults to the state given at creation.
+        :param progress: If provided, updated after each chunk of the frontier, the search stops as soon as
+            it is cancelled.
+        :return: The moves to reach the target and the final pawn coordinates. None if no solution is found
+            or if the search was cancelled.
+        """
+        state = state if state is not None else self.state
+
+        # Reuse a previous search that went through this configuration
+        known_solution = self._get_known_solution(state)
+        if known_solution is not None:
+            self._log("Solution already known for this configuration.")
+            return known_solution
+
+        if not self.can_pack(state):
+            self._log("State can't be packed, using the basic breadth-first search.")
+            fallback = BFS(state, self.cache, self.board)
+            fallback.verbose = self.verbose
+            return fallback.resolve(state, progress)
+
+        target_pawn_color = state.current_target[0]
+        chip_coords = self.board.get_chip_coordinates(*state.current_target)
+        self._log("Target:", get_color_name(target_pawn_color), get_shape(state.current_target[1]), f"(at x={chip_coords.x}, y={chip_coords.y})")
+
+        start = pack_pawns([self.board.index_of(pawn) for pawn in state.pawns])
+        if state.pawns[target_pawn_color.value] == chip_coords:
+            return Solution(b"", tuple(state.pawns))
+
+        # The target can't be reached from this cell whatever the other pawns do
+        pawn_coords = state.pawns[target_pawn_color.value]
+        if self.board.get_distance_map(chip_coords)[pawn_coords.x][pawn_coords.y] is None:
+            self._log("No solution found.")
+            return None
+
+        with tempfile.TemporaryDirectory(prefix="bfs_", dir=self.directory) as directory:
+            search = _LayeredSearch(self, directory, len(state.pawns), target_pawn_color.value, self.board.index_of(chip_coords))
+            solution = search.run(start, progress)
+
+        if solution is not None:
+            self._log(f"Solution found at depth {len(solution)}.")
+            self._record_solution(state, solution)
+        return solution
+
+
+class _LayeredSearch:
+    """
+    The files and the state of one search of `ExternalMemoryBFS`.
+    """
+
+    def __init__(self, resolver: ExternalMemoryBFS, directory: str, pawn_count: int, target_pawn: int, target_cell: int):
+        self.resolver = resolver
+        self.directory = directory
+        self.pawn_count = pawn_count
+        self.target_pawn = target_pawn
+        self.target_shift = PAWN_BITS * target_pawn
+        self.target_cell = target_cell
+        self.bucket_shift = PAWN_BITS * pawn_count - BUCKET_BITS
+        self.layers: List[np.ndarray] = []  # Start offset of each bucket in the file of each depth (+ the end)
+        self.cell_count = resolver.board.board_size ** 2
+        self.visited = create_visited(resolver.visited_mode, self.cell_count, pawn_count) if resolver.visited_bitmap else None
+
+    def run(self, start: int, progress: Optional[SearchProgress]) -> Optional[Solution]:
+        start_layer = np.array([start], dtype=np.uint32)
+        if self.visited is not None:
+            self.visited.add(self._get_keys(start_layer))
+        self._write_layer(0, self._split_buckets(start_layer))
+
+        while self.resolver.max_depth is None or len(self.layers) <= self.resolver.max_depth:
+            depth = len(self.layers) - 1
+            frontier_size = int(self.layers[depth][-1])
+            if frontier_size == 0:
+                break
+
+            runs = [self._run_path(bucket) for bucket in range(1 << BUCKET_BITS)]
+            buffer: List[np.ndarray] = []
+            buffered = 0
+            for chunk in self._read_chunks(depth):
+                if progress is not None:
+                    if progress.cancelled:
+                        self.resolver._log("Search cancelled.")
+                        return None
+                    progress.nodes += len(chunk)
+                    progress.depth = depth
+
+                successors, parents, moves = self.resolver._expand(chunk, self.pawn_count)
+                goals = np.flatnonzero(((successors >> self.target_shift) & PAWN_MASK) == self.target_cell)
+                if len(goals):
+                    goal = goals[0]
+                    return self._build_solution(int(successors[goal]), int(chunk[parents[goal]]), int(moves[goal]), depth)
+
+                buffer.append(np.unique(successors))
+                buffered += buffer[-1].nbytes
+                if buffered > self.resolver.ram_limit:
+                    self._spill(buffer, runs)
+                    buffer, buffered = [], 0
+            self._spill(buffer, runs)
+
+            self._merge_runs(runs)
+            self.resolver._log(f"Depth {len(self.layers) - 1}: {int(self.layers[-1][-1])} new states")
+
+        self.resolver._log("No solution found.")
+        return None
+
+    def _layer_path(self, depth: int) -> str:
+        return os.path.join(self.directory, f"layer_{depth}.bin")
+
+    def _run_path(self, bucket: int) -> str:
+        return os.path.join(self.directory, f"run_{bucket}.bin")
+
+    def _read_layer(self, depth: int) -> np.ndarray:
+        if self.layers[depth][-1] == 0:
+            return np.empty(0, dtype=np.uint32)
+        return np.memmap(self._layer_path(depth), dtype=np.uint32, mode="r")
+
+    def _read_chunks(self, depth: int) -> Iterator[np.ndarray]:
+        layer = self._read_layer(depth)
+        for begin in range(0, len(layer), self.resolver.chunk_size):
+            yield np.array(layer[begin:begin + self.resolver.chunk_size])
+
+    def _spill(self, buffer: List[np.ndarray], runs: List[str]):
+        """
+        Append the buffered successors to the run file of their bucket, as one sorted run per bucket.
+        """
+        if not buffer:
+            return
+        for bucket, states in enumerate(self._split_buckets(np.unique(np.concatenate(buffer)))):
+            if len(states):
+                with open(runs[bucket], "ab") as run:
+                    states.tofile(run)
+
+    def _get_keys(self, states: np.ndarray) -> np.ndarray:
+        return get_visited_keys(self.resolver.visited_mode, states, self.target_pawn, self.pawn_count, self.cell_count)
+
+    def _split_buckets(self, states: np.ndarray) -> List[np.ndarray]:
+        """
+        Split sorted states by bucket.
+        """
+        bounds = np.searchsorted(states >> self.bucket_shift, np.arange((1 << BUCKET_BITS) + 1))
+        return [states[bounds[bucket]:bounds[bucket + 1]] for bucket in range(1 << BUCKET_BITS)]
+
+    def _merge_runs(self, runs: List[str]):
+        """
+        Build the next layer: each bucket of runs is deduplicated and cleared of the states already visited
+        (or of the states of the previous layers, without the visited bitmap).
+        """
+        depth = len(self.layers)
+        previous = [] if self.visited is not None else [
+            (self._read_layer(d), self.layers[d]) for d in range(max(0, depth - self.resolver.duplicate_layers), depth)
+        ]
+        parts = []
+        for bucket, path in enumerate(runs):
+            if not os.path.exists(path):
+                parts.append(np.empty(0, dtype=np.uint32))
+                continue
+            states = np.unique(np.fromfile(path, dtype=np.uint32))
+            os.remove(path)
+            for layer, offsets in previous:
+                known = np.asarray(layer[offsets[bucket]:offsets[bucket + 1]])
+                if len(known):
+                    indices = np.minimum(np.searchsorted(known, states), len(known) - 1)
+                    states = states[known[indices] != states]
+            if self.visited is not None and len(states):
+                # States only swapping the other pawns share a key, the first of them is kept
+                keys, first = np.unique(self._get_keys(states), return_index=True)
+                states = states[np.sort(first[self.visited.add(keys)])]
+            parts.append(states)
+        self._write_layer(depth, parts)
+
+    def _write_layer(self, depth: int, parts: List[np.ndarray]):
+        """
+        Write a layer from the sorted states of each bucket.
+        """
+        offsets = [0]
+        with open(self._layer_path(depth), "wb") as layer:
+            for part in parts:
+                part.tofile(layer)
+                offsets.append(offsets[-1] + len(part))
+        self.layers.append(np.array(offsets, dtype=np.int64))
+
+    def _find_parent(self, child: int, depth: int) -> Tuple[int, int]:
+        """
+        Find a state of a layer leading to `child`, along with the move.
+        """
+        for chunk in self._read_chunks(depth):
+            successors, parents, moves = self.resolver._expand(chunk, self.pawn_count)
+            hits = np.flatnonzero(successors == child)
+            if len(hits):
+                return int(chunk[parents[hits[0]]]), int(moves[hits[0]])
+        raise RuntimeError(f"No parent found at depth {depth}.")
+
+    def _build_solution(self, goal: int, parent: int, move: int, depth: int) -> Solution:
+        sequence = bytearray([move])
+        for previous_depth in range(depth - 1, -1, -1):
+            parent, move = self._find_parent(parent, previous_depth)
+            sequence.append(move)
+        sequence.reverse()
+        pawns = tuple(self.resolver.board.coordinates[cell] for cell in unpack_pawns(goal, self.pawn_count))
+        return Solution(bytes(sequence), pawns)
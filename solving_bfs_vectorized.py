@@ -0,0 +1,275 @@
+import mmap
+from enum import Enum
+from functools import lru_cache
+from math import comb
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+from batched_env import clip_slides
+from compiled_board import CompiledBoard
+from solving_bfs import BFS, get_color_name, get_shape
+from utils import GameState, GameResolutionInterface, SearchCache, SearchProgress, Solution
+
+# Bits of a pawn cell in a packed state, so 4 pawns on a board of up to 16x16 cells fit in an uint32
+PAWN_BITS = 8
+PAWN_MASK = (1 << PAWN_BITS) - 1
+
+
+def pack_pawns(positions: List[int]) -> int:
+    """
+    Pack the cells of the pawns (`GameState.pawns` order) in one integer, 8 bits per pawn.
+    """
+    packed = 0
+    for i, cell in enumerate(positions):
+        packed |= cell << (PAWN_BITS * i)
+    return packed
+
+
+def unpack_pawns(packed: int, pawn_count: int) -> List[int]:
+    """
+    Get back the cells of the pawns packed by `pack_pawns`.
+    """
+    return [(packed >> (PAWN_BITS * i)) & PAWN_MASK for i in range(pawn_count)]
+
+
+class VisitedMode(Enum):
+    SORTED = 0
+    """
+    Sorted array of the packed states, growing with the search.
+    """
+
+    BITMAP = 1
+    """
+    One bit per packed state: 2^32 bits (512 MB) for 4 pawns, fixed whatever the search.
+    """
+
+    CANONICAL_BITMAP = 2
+    """
+    One bit per (target pawn cell, sorted cells of the other pawns): the other pawns are interchangeable
+    for the target, so the states that only swap them are visited once. About 88 MB for 4 pawns on 16x16 cells.
+    """
+
+
+class SortedVisited:
+    """
+    Visited states as a sorted array of keys.
+    """
+
+    def __init__(self):
+        self.keys = np.empty(0, dtype=np.uint32)
+
+    def add(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Mark unique keys as visited.
+        :return: Whether each key was new.
+        """
+        indices = np.searchsorted(self.keys, keys)
+        indices[indices == len(self.keys)] = 0
+        new = self.keys[indices] != keys if len(self.keys) else np.ones(len(keys), dtype=bool)
+        self.keys = np.concatenate((self.keys, keys[new]))
+        self.keys.sort(kind="mergesort")  # Two sorted runs
+        return new
+
+
+class BitmapVisited:
+    """
+    Visited states as one bit per possible key, in an anonymous memory map: the memory is fixed by the key range
+    and the pages are only allocated once touched.
+    """
+
+    def __init__(self, key_count: int):
+        self._map = mmap.mmap(-1, (key_count + 7) // 8)
+        self.bits = np.frombuffer(self._map, dtype=np.uint8)
+
+    def add(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Mark unique keys as visited.
+        :return: Whether each key was new.
+        """
+        byte_indices = keys >> 3
+        masks = (np.uint8(1) << (keys & 7).astype(np.uint8))
+        new = (self.bits[byte_indices] & masks) == 0
+        # Several keys may share a byte
+        np.bitwise_or.at(self.bits, byte_indices[new], masks[new])
+        return new
+
+
+def create_visited(mode: VisitedMode, cell_count: int, pawn_count: int) -> Union[SortedVisited, BitmapVisited]:
+    """
+    Create an empty visited set of the packed states of `pawn_count` pawns on a board of `cell_count` cells,
+    its keys given by `get_visited_keys`.
+    """
+    if mode == VisitedMode.SORTED:
+        return SortedVisited()
+    if mode == VisitedMode.BITMAP:
+        return BitmapVisited(1 << (PAWN_BITS * pawn_count))
+    return BitmapVisited(cell_count * comb(cell_count, pawn_count - 1))
+
+
+def get_visited_keys(mode: VisitedMode, states: np.ndarray, target_pawn: int, pawn_count: int, cell_count: int) -> np.ndarray:
+    """
+    The keys of packed states in the visited set: the states themselves, or their canonical index
+    (target pawn cell, rank of the sorted cells of the other pawns) for `VisitedMode.CANONICAL_BITMAP`.
+    """
+    if mode != VisitedMode.CANONICAL_BITMAP:
+        return states
+
+    helpers = np.sort(np.stack(
+        [(states >> (PAWN_BITS * pawn)) & PAWN_MASK for pawn in range(pawn_count) if pawn != target_pawn], axis=1
+    ), axis=1).astype(np.int64)
+    # Combinatorial number system: the sorted distinct cells c0 < c1 < ... get the rank sum(comb(ci, i + 1))
+    rank = np.zeros(len(states), dtype=np.int64)
+    for i in range(pawn_count - 1):
+        rank += _get_binomials(cell_count, i + 1)[helpers[:, i]]
+    target = ((states >> (PAWN_BITS * target_pawn)) & PAWN_MASK).astype(np.int64)
+    return target * comb(cell_count, pawn_count - 1) + rank
+
+
+@lru_cache(maxsize=None)
+def _get_binomials(cell_count: int, k: int) -> np.ndarray:
+    return np.array([comb(n, k) for n in range(cell_count)], dtype=np.int64)
+
+
+class VectorizedBFS(GameResolutionInterface):
+    """
+    Level-synchronous breadth-first search with NumPy: the whole frontier of a depth is an array of packed states,
+    expanded for every pawn and direction at once through the slide tables of the compiled board.
+    All the pawns can move, so the solution found is optimal.
+
+    Falls back to `BFS` for what can't be packed in 32 bits (boards larger than 16x16, more than 4 pawns,
+    missing pawns) and for boards with mirrors.
+
+    The visited states are kept as chosen by `visited_mode`, the bitmaps giving a fixed memory use and O(1)
+    deduplication for exhaustive searches of hard puzzles.
+    """
+
+    optimal = True
+
+    def __init__(
+        self,
+        state: "GameState",
+        cache: Optional[SearchCache] = None,
+        board: Optional[CompiledBoard] = None,
+        visited_mode: VisitedMode = VisitedMode.SORTED,
+    ):
+        super().__init__(state, cache, board)
+        self.visited_mode = visited_mode
+        self.slides = np.array(self.board.slides, dtype=np.int64)
+        self.deltas = self.board.deltas
+
+    def can_pack(self, state: GameState) -> bool:
+        return (
+            self.board.board_size ** 2 <= 1 << PAWN_BITS
+            and len(state.pawns) * PAWN_BITS <= 32
+            and all(pawn is not None for pawn in state.pawns)
+            and not self.board.has_mirrors
+        )
+
+    def resolve(self, state: Optional[GameState] = None, progress: Optional[SearchProgress] = None) -> Optional[Solution]:
+        """
+        Find an optimal solution, expanding one depth of the search at a time.
+        :param state: The game state to resolve, on the board of the resolver. Defaults to the state given at creation.
+        :param progress: If provided, updated after each depth, the search stops as soon as it is cancelled.
+        :return: The moves to reach the target and the final pawn coordinates. None if no solution is found
+            or if the search was cancelled.
+        """
+        state = state if state is not None else self.state
+
+        # Reuse a previous search that went through this configuration
+        known_solution = self._get_known_solution(state)
+        if known_solution is not None:
+            self._log("Solution already known for this configuration.")
+            return known_solution
+
+        if not self.can_pack(state):
+            self._log("State can't be packed, using the basic breadth-first search.")
+            fallback = BFS(state, self.cache, self.board)
+            fallback.verbose = self.verbose
+            return fallback.resolve(state, progress)
+
+        target_pawn_color = state.current_target[0]
+        chip_coords = self.board.get_chip_coordinates(*state.current_target)
+        target_cell = self.board.index_of(chip_coords)
+        target_shift = PAWN_BITS * target_pawn_color.value
+        pawn_count = len(state.pawns)
+        self._log("Target:", get_color_name(target_pawn_color), get_shape(state.current_target[1]), f"(at x={chip_coords.x}, y={chip_coords.y})")
+
+        start = pack_pawns([self.board.index_of(pawn) for pawn in state.pawns])
+        if (start >> target_shift) & PAWN_MASK == target_cell:
+            return Solution(b"", tuple(state.pawns))
+
+        # The target can't be reached from this cell whatever the other pawns do
+        pawn_coords = state.pawns[target_pawn_color.value]
+        if self.board.get_distance_map(chip_coords)[pawn_coords.x][pawn_coords.y] is None:
+            self._log("No solution found.")
+            return None
+
+        frontier = np.array([start], dtype=np.uint32)
+        cell_count = self.board.board_size ** 2
+        visited = create_visited(self.visited_mode, cell_count, pawn_count)
+        visited.add(get_visited_keys(self.visited_mode, frontier, target_pawn_color.value, pawn_count, cell_count))
+        layers: List[Tuple[np.ndarray, np.ndarray]] = []  # Parent index and move of each state of each depth
+
+        while len(frontier):
+            if progress is not None:
+                if progress.cancelled:
+                    self._log("Search cancelled.")
+                    return None
+                progress.nodes += len(frontier)
+                progress.depth = len(layers)
+
+            successors, parents, moves = self._expand(frontier, pawn_count)
+
+            goals = np.flatnonzero(((successors >> target_shift) & PAWN_MASK) == target_cell)
+            if len(goals):
+                goal = goals[0]
+                solution = self._build_solution(int(successors[goal]), int(parents[goal]), int(moves[goal]), layers, pawn_count)
+                self._log(f"Solution found at depth {len(solution)}.")
+                self._record_solution(state, solution)
+                return solution
+
+            # Keep the first occurrence of each new state
+            keys, first = np.unique(
+                get_visited_keys(self.visited_mode, successors, target_pawn_color.value, pawn_count, cell_count),
+                return_index=True,
+            )
+            new = first[visited.add(keys)]
+            frontier, parents, moves = successors[new], parents[new], moves[new]
+
+            layers.append((parents, moves))
+            self._log(f"Depth {len(layers)}: {len(frontier)} new states")
+
+        self._log("No solution found.")
+        return None
+
+    def _expand(self, frontier: np.ndarray, pawn_count: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        All the successors of the frontier, one per pawn and direction for which the pawn moves.
+        :return: The packed successors, the index of their parent in the frontier and their encoded move.
+        """
+        # Signed cells, for the offsets computed by the move kernel
+        cells = [((frontier >> (PAWN_BITS * pawn)) & PAWN_MASK).astype(np.int64) for pawn in range(pawn_count)]
+        successors, parents, moves = [], [], []
+        for pawn in range(pawn_count):
+            start = cells[pawn]
+            cleared = frontier & np.uint32(0xFFFFFFFF ^ (PAWN_MASK << (PAWN_BITS * pawn)))
+            for direction, slides in enumerate(self.slides):
+                end = clip_slides(start, slides[start], self.deltas[direction], cells, self.board.board_size)
+                moved = np.flatnonzero(end != start)
+                successors.append(cleared[moved] | (end[moved].astype(np.uint32) << (PAWN_BITS * pawn)))
+                parents.append(moved)
+                moves.append(np.full(len(moved), pawn << 2 | direction, dtype=np.uint8))
+        return np.concatenate(successors), np.concatenate(parents), np.concatenate(moves)
+
+    def _build_solution(
+        self, goal: int, parent: int, move: int, layers: List[Tuple[np.ndarray, np.ndarray]], pawn_count: int
+    ) -> Solution:
+        # Walk the parent indices back to the initial state
+        sequence = bytearray([move])
+        for parents, moves in reversed(layers):
+            sequence.append(int(moves[parent]))
+            parent = int(parents[parent])
+        sequence.reverse()
+        pawns = tuple(self.board.coordinates[cell] for cell in unpack_pawns(goal, pawn_count))
+        return Solution(bytes(sequence), pawns)
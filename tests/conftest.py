@@ -0,0 +1,80 @@
+import os
+import random
+
+import pytest
+
+from board import Board
+from puzzle_file import PuzzleFile
+from puzzles import decode_puzzle
+
+# The robots in the order the game deals them (see game.py)
+ROBOT_COLORS = ["Red", "Blue", "Green", "Yellow"]
+
+# The first puzzles of the benchmark corpus, of up to 6 moves, their optimal length labelled
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "benchmark_corpus.bin")
+CORPUS_PUZZLES = 24
+
+# Wall bit of each direction and of the opposite side of the neighbour cell, with the (dx, dy) of the neighbour
+ENCLOSING_WALLS = [(1, 4, 0, -1), (2, 8, 1, 0), (4, 1, 0, 1), (8, 2, -1, 0)]
+
+
+def _deal_board(seed: int) -> Board:
+    state = random.getstate()
+    try:
+        random.seed(seed)
+        board = Board(16, 40, 500)
+        board.initialize_board(ROBOT_COLORS)
+    finally:
+        random.setstate(state)
+    return board
+
+
+@pytest.fixture
+def deal_board():
+    """
+    Deal the board the game would deal after `random.seed(seed)`, keeping the state of the global random generator.
+    """
+    return _deal_board
+
+
+@pytest.fixture(scope="session")
+def corpus_puzzles():
+    return [puzzle for _, puzzle in PuzzleFile(CORPUS_PATH).iter_puzzles()][:CORPUS_PUZZLES]
+
+
+def _check_solution(puzzle: dict, solution):
+    state, board = decode_puzzle(puzzle)
+    pawns = list(state.pawns)
+    for color, direction in solution.decode():
+        pawns[color.value] = board.get_pawn_destination(pawns, color, direction)
+    assert tuple(pawns) == solution.pawns
+    color, shape = state.current_target
+    assert pawns[color.value] == board.get_chip_coordinates(color, shape)
+
+
+@pytest.fixture
+def check_solution():
+    """
+    Replay the solution of a puzzle with the move kernel: it must end on its pawns, the target pawn on the target.
+    """
+    return _check_solution
+
+
+def _enclose_target(puzzle: dict) -> dict:
+    board = puzzle["board"]
+    size = board["size"]
+    walls = [int(digit, 16) for digit in board["walls"]]
+    x, y = board["chips"][puzzle["target"]]
+    for bit, opposite, dx, dy in ENCLOSING_WALLS:
+        walls[y * size + x] |= bit
+        if 0 <= x + dx < size and 0 <= y + dy < size:
+            walls[(y + dy) * size + x + dx] |= opposite
+    return {**puzzle, "board": {**board, "walls": "".join(f"{bits:x}" for bits in walls)}}
+
+
+@pytest.fixture
+def enclose_target():
+    """
+    Get the same puzzle with walls all around its target: it can't be reached anymore.
+    """
+    return _enclose_target
@@ -0,0 +1,56 @@
+import pytest
+
+from ai_adapter import AiAdapter
+from utils import Algorithm
+
+
+def play(board, moves):
+    # The robots are looked up by color, the board keeps them in the dealt order
+    for direction, color in moves:
+        board.selected_robot = next(robot for robot in board.robots if robot.color == color)
+        board.move_robot(direction)
+
+
+@pytest.mark.parametrize("seed", [1, 3, 5])
+def test_resolve_after_player_moves(deal_board, seed):
+    board = deal_board(seed)
+    adapter = AiAdapter(board, Algorithm.A_STAR)
+    adapter.resolve()
+    moves = adapter.get_converted_moves()
+    assert adapter.found_solution and moves
+
+    # Play the first moves: the search starts from the new position, with the same resolver,
+    # and the rest of the solution is still the shortest one
+    played = len(moves) // 2
+    play(board, moves[:played])
+    resolver = adapter._resolver
+    adapter.resolve()
+    assert adapter._resolver is resolver
+    assert len(adapter.get_converted_moves()) == len(moves) - played
+
+
+def test_new_layout_gets_a_new_resolver(deal_board):
+    board = deal_board(1)
+    adapter = AiAdapter(board, Algorithm.A_STAR)
+    adapter.resolve()
+    resolver = adapter._resolver
+
+    board.reset_parameters()
+    board.initialize_board(["Red", "Blue", "Green", "Yellow"])
+    adapter.resolve()
+    assert adapter._resolver is not resolver
+
+
+def test_game_state_conversion_keeps_the_static_part(deal_board):
+    board = deal_board(1)
+    adapter = AiAdapter(board, Algorithm.A_STAR)
+    state = adapter._convert_board_to_game_state()
+    play(board, [["Left", color] for color in ["Red", "Blue", "Green", "Yellow"]])
+    moved = adapter._convert_board_to_game_state()
+    assert moved.walls is state.walls and moved.chips is state.chips
+    robots = {robot.color: (robot.x, robot.y) for robot in board.robots}
+    assert [(pawn.x, pawn.y) for pawn in moved.pawns] == [robots[color] for color in ["Red", "Green", "Blue", "Yellow"]]
+
+    board.reset_parameters()
+    board.initialize_board(["Red", "Blue", "Green", "Yellow"])
+    assert adapter._convert_board_to_game_state().walls is not state.walls
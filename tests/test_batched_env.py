@@ -0,0 +1,32 @@
+import numpy as np
+
+from ai_adapter import AiAdapter
+from batched_env import BatchedEnvironment
+from utils import Algorithm, Color, Direction
+
+
+def test_steps_match_the_move_kernel(deal_board):
+    boards = [AiAdapter(deal_board(seed), Algorithm.A_STAR).get_compiled_board() for seed in (1, 2, 3)]
+    env = BatchedEnvironment(boards, 64, seed=0)
+    rng = np.random.default_rng(0)
+    for _ in range(30):
+        actions = rng.integers(0, len(Color) * len(Direction), size=env.num_games)
+        positions, done = env.positions.copy(), env.done.copy()
+        env.step(actions)
+        for game in np.flatnonzero(~done):
+            board = boards[env.board_ids[game]]
+            expected = positions[game].copy()
+            expected[actions[game] >> 2] = board.move(positions[game].tolist(), actions[game] >> 2, actions[game] & 3)
+            assert env.positions[game].tolist() == expected.tolist()
+        assert (env.positions[done] == positions[done]).all()
+
+
+def test_start_cells_are_the_game_ones(deal_board):
+    board = AiAdapter(deal_board(1), Algorithm.A_STAR).get_compiled_board()
+    env = BatchedEnvironment([board], 2000, seed=0)
+    center = {7 * 16 + 7, 7 * 16 + 8, 8 * 16 + 7, 8 * 16 + 8}
+    cells = set(env.positions.ravel().tolist())
+    assert not cells & center
+    # Robots may start on a chip, as in the game
+    assert cells & {board.index_of(coordinates) for coordinates in board.chip_coordinates.values()}
+    assert all(len(set(robots)) == len(robots) for robots in env.positions.tolist())
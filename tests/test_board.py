@@ -0,0 +1,14 @@
+import pytest
+
+from compiled_board import CompiledBoard
+from utils import CHIP_MAP, Coordinate
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3, 4, 5])
+def test_walls_and_targets_match_the_compiled_board(deal_board, seed):
+    # The wall lists drawn by the game and the move tables of the kernel come from the same quadrant tables
+    board = deal_board(seed)
+    lists = CompiledBoard.from_wall_lists(board.grid_size, board.walls["Vertical"], board.walls["Horizontal"])
+    assert lists.slides == board.compiled_board.slides
+    chips = {CHIP_MAP[key]: Coordinate(*cell) for key, cell in board.targets.items() if key in CHIP_MAP}
+    assert chips == board.compiled_board.chip_coordinates
@@ -0,0 +1,35 @@
+import pytest
+
+from board_catalog import BoardCatalog, build_catalog, enumerate_quadrant_choices, get_board_id
+from compiled_board import CompiledBoard
+from utils import CHIP_MAP, Coordinate
+
+
+@pytest.fixture(scope="module")
+def catalog(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("catalog") / "boards.bin")
+    build_catalog(path)
+    return BoardCatalog(path)
+
+
+def test_catalog_has_every_quadrant_choice(catalog):
+    choices = enumerate_quadrant_choices()
+    assert len(catalog) == len(choices) == len(set(choices))
+    assert sorted(get_board_id(choice) for choice in choices) == list(range(len(choices)))
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3, 4, 5, 6])
+def test_catalog_boards_match_dealt_boards(catalog, deal_board, seed):
+    board = deal_board(seed)
+    board_id = get_board_id(board.map_index)
+    # Compiled cell by cell from the wall lists of the game, rather than from the quadrant tables
+    compiled = CompiledBoard.from_wall_lists(board.grid_size, board.walls["Vertical"], board.walls["Horizontal"])
+    loaded = catalog.get_board(board_id)
+    assert loaded.walls == compiled.walls
+    assert loaded.slides == compiled.slides
+
+    assert catalog.get_targets(board_id) == board.targets
+    for key, (x, y) in board.targets.items():
+        if key in CHIP_MAP:
+            assert loaded.get_chip_coordinates(*CHIP_MAP[key]) == Coordinate(x, y)
+            assert loaded.get_distance_map(Coordinate(x, y)) == compiled.get_distance_map(Coordinate(x, y))
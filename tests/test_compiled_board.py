@@ -0,0 +1,37 @@
+import random
+
+import pytest
+
+from ai_adapter import AiAdapter, COLOR_NAMES, DIRECTION_NAMES_BY_DIRECTION
+from compiled_board import CompiledBoard
+from utils import Algorithm, Color, Coordinate, Direction
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3, 4, 5])
+def test_move_kernel_matches_board_moves(deal_board, seed):
+    # The kernel of the solvers, its tables compiled from the game state, against the moves of the game
+    board = deal_board(seed)
+    adapter = AiAdapter(board, Algorithm.A_STAR)
+    kernel = CompiledBoard.from_game_state(adapter._convert_board_to_game_state())
+    robots = {robot.color: robot for robot in board.robots}
+    rng = random.Random(seed)
+    for _ in range(200):
+        color, direction = rng.choice(list(Color)), rng.choice(list(Direction))
+        pawns = adapter._get_robot_positions()
+        expected = kernel.get_pawn_destination(pawns, color, direction)
+
+        robot = robots[COLOR_NAMES[color]]
+        robot.reached_target = False
+        board.selected_robot = robot
+        moved = board.move_robot(DIRECTION_NAMES_BY_DIRECTION[direction])
+
+        assert Coordinate(robot.x, robot.y) == expected
+        assert moved == (expected != pawns[color.value])
+
+
+def test_reached_target_stops_the_robot(deal_board):
+    board = deal_board(1)
+    robot = next(robot for robot in board.robots if robot.color == board.target_color)
+    board.selected_robot = robot
+    robot.reached_target = True
+    assert not board.move_robot("Up")
@@ -0,0 +1,29 @@
+from puzzle_file import TARGET_KEYS, UNKNOWN_LENGTH, PuzzleFile, PuzzleFileWriter, create_records
+from puzzles import get_board_key
+
+
+def without_length(puzzle: dict) -> dict:
+    return {key: value for key, value in puzzle.items() if key != "length"}
+
+
+def test_puzzle_file_round_trip(corpus_puzzles, tmp_path):
+    boards = list({get_board_key(puzzle["board"]): puzzle["board"] for puzzle in corpus_puzzles}.values())
+    board_keys = [get_board_key(board) for board in boards]
+    records = create_records(len(corpus_puzzles))
+    for record, puzzle in zip(records, corpus_puzzles):
+        size = puzzle["board"]["size"]
+        record["board"] = board_keys.index(get_board_key(puzzle["board"]))
+        record["target"] = TARGET_KEYS.index(puzzle["target"])
+        record["robots"] = [y * size + x for x, y in puzzle["robots"]]
+    # The last puzzle keeps an unknown length
+    records["length"][:-1] = [puzzle["length"] for puzzle in corpus_puzzles[:-1]]
+    assert records["length"][-1] == UNKNOWN_LENGTH
+
+    path = str(tmp_path / "puzzles.bin")
+    with PuzzleFileWriter(path, boards) as writer:
+        writer.write(records[:5])
+        writer.write(records[5:])
+    puzzles = PuzzleFile(path)
+    assert len(puzzles) == len(corpus_puzzles)
+    assert [puzzle for _, puzzle in puzzles.iter_puzzles(chunk_size=7)] == corpus_puzzles[:-1] + [without_length(corpus_puzzles[-1])]
+    assert puzzles.get_puzzle(3) == corpus_puzzles[3]
@@ -0,0 +1,12 @@
+from puzzles import decode_board, decode_puzzle, encode_board, encode_puzzle
+
+
+def test_board_round_trip(corpus_puzzles):
+    board = corpus_puzzles[0]["board"]
+    assert encode_board(decode_board(board)) == board
+
+
+def test_puzzle_round_trip(corpus_puzzles):
+    for puzzle in corpus_puzzles:
+        state, board = decode_puzzle(puzzle)
+        assert encode_puzzle(state, board) == {key: value for key, value in puzzle.items() if key != "length"}
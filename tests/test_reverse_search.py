@@ -0,0 +1,23 @@
+import numpy as np
+
+from puzzles import decode_puzzle
+from reverse_search import ReverseGenerator
+from solving_bfs_vectorized import VectorizedBFS, VisitedMode, create_visited, get_visited_keys, pack_pawns
+from utils import Color, SearchCache
+
+
+def test_puzzles_need_exactly_the_depth(corpus_puzzles):
+    _, board = decode_puzzle(corpus_puzzles[0])
+    target = next(chip for chip in board.chip_coordinates if chip[0] == Color.GREEN)
+    for state in ReverseGenerator(board, robot_count=2, seed=1).generate(target, 4, 5):
+        assert len(VectorizedBFS(state, SearchCache(), board).resolve(state)) == 4
+
+
+def test_canonical_keys_ignore_the_order_of_the_other_pawns():
+    states = np.array([pack_pawns([10, 20, 30, 40]), pack_pawns([10, 40, 20, 30]), pack_pawns([20, 10, 30, 40])],
+                      dtype=np.uint32)
+    keys = get_visited_keys(VisitedMode.CANONICAL_BITMAP, states, 0, 4, 256)
+    assert keys[0] == keys[1] != keys[2]
+    visited = create_visited(VisitedMode.CANONICAL_BITMAP, 256, 4)
+    assert visited.add(np.unique(keys)).tolist() == [True, True]
+    assert not visited.add(keys[:1]).any()
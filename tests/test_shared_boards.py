@@ -0,0 +1,14 @@
+from puzzles import decode_board, get_board_key
+from shared_boards import SharedBoardTables
+
+
+def test_attached_tables_give_the_published_boards(corpus_puzzles):
+    boards = list({get_board_key(puzzle["board"]): puzzle["board"] for puzzle in corpus_puzzles}.values())
+    with SharedBoardTables.publish(boards) as published:
+        with SharedBoardTables.attach(published.name) as attached:
+            assert len(attached) == len(boards)
+            for board_id, board in enumerate(boards):
+                expected = decode_board(board)
+                loaded = attached.get_board(board_id)
+                assert loaded.slides == expected.slides
+                assert loaded.chip_coordinates == expected.chip_coordinates
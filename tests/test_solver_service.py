@@ -0,0 +1,44 @@
+import threading
+
+import pytest
+
+from solver_service import SolverClient, SolverServer, SolverService
+from utils import Algorithm
+
+
+@pytest.fixture(scope="module")
+def client():
+    service = SolverService(2)
+    server = SolverServer(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield SolverClient(port=server.server_address[1])
+    server.shutdown()
+    server.server_close()
+    service.shutdown()
+
+
+def test_solutions_are_optimal(client, corpus_puzzles):
+    for puzzle in corpus_puzzles[:8]:
+        result = client.solve(puzzle, Algorithm.BFS_VECTORIZED)
+        assert result["status"] == "solved" and result["length"] == puzzle["length"]
+
+
+def test_expired_budget_times_out(client, corpus_puzzles):
+    result = client.solve(corpus_puzzles[-1], Algorithm.BFS, budget=0)
+    assert result["status"] == "timeout" and result["nodes"] == 0
+
+
+def test_invalid_puzzle_is_rejected(client, corpus_puzzles):
+    puzzle = {**corpus_puzzles[0], "target": "Unknown"}
+    with pytest.raises(ValueError):
+        client.solve(puzzle)
+
+
+def test_identical_requests_share_a_search(corpus_puzzles):
+    service = SolverService(1)
+    try:
+        futures = [service.submit({"puzzle": corpus_puzzles[-1], "algorithm": "BFS_VECTORIZED"}) for _ in range(4)]
+        assert len(set(futures)) == 1
+        assert futures[0].result()["length"] == corpus_puzzles[-1]["length"]
+    finally:
+        service.shutdown()
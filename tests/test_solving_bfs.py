@@ -0,0 +1,13 @@
+from ai_adapter import create_resolver
+from puzzles import decode_puzzle
+from utils import Algorithm
+
+
+def test_solutions_are_valid(corpus_puzzles, check_solution):
+    # Only the target pawn moves, the solutions can't be shorter than the optimal ones
+    for puzzle in corpus_puzzles:
+        state, board = decode_puzzle(puzzle)
+        solution = create_resolver(Algorithm.BFS, state, None, board).resolve(state)
+        if solution is not None:
+            assert len(solution) >= puzzle["length"]
+            check_solution(puzzle, solution)
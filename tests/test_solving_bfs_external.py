@@ -0,0 +1,40 @@
+import pytest
+
+from puzzles import decode_puzzle
+from solving_bfs_external import ExternalMemoryBFS
+from utils import SearchProgress
+
+
+def solve(puzzle: dict, directory, **kwargs):
+    state, board = decode_puzzle(puzzle)
+    progress = SearchProgress()
+    solution = ExternalMemoryBFS(state, None, board, directory=str(directory), **kwargs).resolve(state, progress)
+    return solution, progress
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    # Spills the successors to disk every few thousand states
+    {"ram_limit": 16 * 1024},
+    {"visited_bitmap": False, "max_depth": 8},
+])
+def test_finds_labelled_lengths(corpus_puzzles, check_solution, tmp_path, options):
+    for puzzle in corpus_puzzles:
+        solution, _ = solve(puzzle, tmp_path, **options)
+        assert len(solution) == puzzle["length"]
+        check_solution(puzzle, solution)
+    # The layers are removed once the search is done
+    assert not list(tmp_path.iterdir())
+
+
+def test_unreachable_target_is_not_searched(corpus_puzzles, enclose_target, tmp_path):
+    for puzzle in corpus_puzzles[:6]:
+        solution, progress = solve(enclose_target(puzzle), tmp_path)
+        assert solution is None
+        assert progress.nodes == 0
+
+
+def test_unbounded_search_needs_the_bitmap(corpus_puzzles):
+    state, board = decode_puzzle(corpus_puzzles[0])
+    with pytest.raises(ValueError):
+        ExternalMemoryBFS(state, None, board, visited_bitmap=False)
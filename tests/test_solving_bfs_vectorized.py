@@ -0,0 +1,37 @@
+import pytest
+
+from puzzles import decode_puzzle
+from solving_bfs_vectorized import VectorizedBFS, VisitedMode
+from utils import SearchProgress
+
+
+def solve(puzzle: dict, **kwargs):
+    state, board = decode_puzzle(puzzle)
+    progress = SearchProgress()
+    solution = VectorizedBFS(state, None, board, **kwargs).resolve(state, progress)
+    return solution, progress
+
+
+def test_finds_labelled_lengths(corpus_puzzles, check_solution):
+    for puzzle in corpus_puzzles:
+        solution, _ = solve(puzzle)
+        assert len(solution) == puzzle["length"]
+        check_solution(puzzle, solution)
+
+
+@pytest.mark.parametrize("visited_mode", [VisitedMode.BITMAP, VisitedMode.CANONICAL_BITMAP])
+def test_visited_modes_find_the_same_lengths(corpus_puzzles, check_solution, visited_mode):
+    for puzzle in corpus_puzzles:
+        solution, progress = solve(puzzle, visited_mode=visited_mode)
+        assert len(solution) == puzzle["length"]
+        check_solution(puzzle, solution)
+        # The canonical states merge the configurations where the other robots swap cells
+        if visited_mode == VisitedMode.BITMAP:
+            assert progress.nodes == solve(puzzle)[1].nodes
+
+
+def test_unreachable_target_is_not_searched(corpus_puzzles, enclose_target):
+    for puzzle in corpus_puzzles[:6]:
+        solution, progress = solve(enclose_target(puzzle))
+        assert solution is None
+        assert progress.nodes == 0
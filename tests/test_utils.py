@@ -0,0 +1,68 @@
+import dataclasses
+
+import pytest
+
+from ai_adapter import AiAdapter, create_resolver
+from utils import Algorithm, Color, Coordinate, Direction, SearchCache, Solution, decode_move, encode_move
+
+
+def get_states(board):
+    """
+    The game state of a dealt board for each chip of the board as the target.
+    """
+    adapter = AiAdapter(board, Algorithm.A_STAR)
+    state = adapter._convert_board_to_game_state()
+    chips = sorted(adapter.get_compiled_board().chip_coordinates, key=lambda chip: (chip[0].value, chip[1].value))
+    return adapter.get_compiled_board(), [dataclasses.replace(state, current_target=chip) for chip in chips]
+
+
+def get_length(solution):
+    return len(solution) if solution is not None else None
+
+
+@pytest.mark.parametrize("algorithm", [Algorithm.A_STAR, Algorithm.BFS_VECTORIZED])
+def test_resolver_is_reusable(deal_board, algorithm):
+    # One resolver for all the targets of a board, against a new resolver for each of them
+    board, states = get_states(deal_board(4))
+    resolver = create_resolver(algorithm, states[0], SearchCache(), board)
+    for state in states[:6]:
+        expected = create_resolver(algorithm, state, SearchCache(), board).resolve(state)
+        assert get_length(resolver.resolve(state)) == get_length(expected)
+        # Found again in the search cache
+        assert get_length(resolver.resolve(state)) == get_length(expected)
+
+
+def test_shared_cache_keeps_solutions_optimal(deal_board):
+    # The solutions of the target pawn resolvers must not be reused by the optimal ones
+    board, states = get_states(deal_board(3))
+    cache = SearchCache()
+    # A* finds 8 moves instead of 6 for the second one
+    for state in states[:4]:
+        create_resolver(Algorithm.A_STAR, state, cache, board).resolve(state)
+        shared = create_resolver(Algorithm.BFS_VECTORIZED, state, cache, board).resolve(state)
+        expected = create_resolver(Algorithm.BFS_VECTORIZED, state, SearchCache(), board).resolve(state)
+        assert get_length(shared) == get_length(expected)
+
+
+def test_moves_round_trip():
+    moves = [(color, direction) for color in Color for direction in Direction]
+    encoded = [encode_move(color, direction) for color, direction in moves]
+    assert sorted(encoded) == list(range(16))
+    assert [decode_move(move) for move in encoded] == moves
+
+
+def test_solution_decode():
+    moves = [(Color.RED, Direction.UP), (Color.GREEN, Direction.LEFT), (Color.YELLOW, Direction.DOWN)]
+    pawns = (Coordinate(0, 0), Coordinate(1, 0), Coordinate(2, 0), Coordinate(3, 0))
+    solution = Solution(bytes(encode_move(color, direction) for color, direction in moves), pawns)
+    assert len(solution) == 3
+    assert solution.decode() == moves
+    assert str(solution) == "RUGLYD"
+
+
+def test_resolvers_are_silent_unless_verbose(deal_board, capsys):
+    board, states = get_states(deal_board(1))
+    create_resolver(Algorithm.BFS_VECTORIZED, states[0], SearchCache(), board).resolve(states[0])
+    assert capsys.readouterr().out == ""
+    create_resolver(Algorithm.BFS_VECTORIZED, states[0], SearchCache(), board, verbose=True).resolve(states[0])
+    assert capsys.readouterr().out != ""
@@ -0,0 +1,28 @@
+import pytest
+
+from wire_format import pack_puzzle, unpack_puzzle
+
+
+def without_length(puzzle: dict) -> dict:
+    return {key: value for key, value in puzzle.items() if key != "length"}
+
+
+def test_wire_format_round_trip(corpus_puzzles):
+    for puzzle in corpus_puzzles:
+        packed = pack_puzzle(puzzle)
+        assert len(packed) == 153
+        assert unpack_puzzle(packed) == without_length(puzzle)
+
+
+def test_wire_format_by_board_id(corpus_puzzles):
+    for board_id, puzzle in enumerate(corpus_puzzles):
+        packed = pack_puzzle(puzzle, board_id)
+        assert len(packed) == 10
+        assert unpack_puzzle(packed) == {"target": puzzle["target"], "board_id": board_id, "robots": puzzle["robots"]}
+
+
+def test_wire_format_rejects_other_versions(corpus_puzzles):
+    packed = bytearray(pack_puzzle(corpus_puzzles[0]))
+    packed[0] += 1
+    with pytest.raises(ValueError):
+        unpack_puzzle(bytes(packed))
@@ -0,0 +1,68 @@
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+import pygame
+
+
+class TextRenderer:
+    """
+    Fonts and rendered text surfaces of the UI labels, so that a label drawn every frame is only rasterized once.
+    The rendered surfaces are kept in a bounded LRU, keyed by (text, size, color, antialias).
+    They are shared between the callers, which must not draw on them.
+    """
+
+    def __init__(self, max_surfaces: int = 256):
+        self.max_surfaces = max_surfaces
+        self._fonts: Dict[int, CachedFont] = {}
+        self._surfaces: "OrderedDict[Tuple[str, int, Tuple[int, ...], bool], pygame.Surface]" = OrderedDict()
+
+    def get_font(self, size: int) -> "CachedFont":
+        """
+        Returns the default font of the given size, created on first use.
+        pygame must be initialized before.
+        """
+        font = self._fonts.get(size)
+        if font is None:
+            font = self._fonts[size] = CachedFont(self, size)
+        return font
+
+    def render(self, text: str, size: int, color, antialias: bool = True) -> pygame.Surface:
+        key = (text, size, tuple(color), antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            return surface
+
+        surface = self.get_font(size).font.render(text, antialias, color)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_surfaces:
+            self._surfaces.popitem(last=False)  # Least recently used
+        return surface
+
+
+class CachedFont:
+    """
+    Replacement for `pygame.font.Font(None, size)` whose rendered surfaces come from the TextRenderer cache.
+    """
+
+    def __init__(self, renderer: TextRenderer, size: int):
+        self.renderer = renderer
+        self.size = size
+        self.font = pygame.font.Font(None, size)
+
+    def render(self, text: str, antialias: bool, color) -> pygame.Surface:
+        return self.renderer.render(text, self.size, color, antialias)
+
+    def render_uncached(self, text: str, antialias: bool, color) -> pygame.Surface:
+        """
+        Render a label that changes on almost every frame (e.g. a counter) without the cache,
+        where it would only push out the labels that are drawn again.
+        """
+        return self.font.render(text, antialias, color)
+
+    def get_linesize(self) -> int:
+        return self.font.get_linesize()
+
+
+# Shared by the board and the game, so every label is cached once
+text_renderer = TextRenderer()
@@ -1,8 +1,11 @@
-from typing import List, Tuple, Optional
-from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Tuple, Optional
+from dataclasses import dataclass, field
 from enum import Enum
 from abc import ABC, abstractmethod
 
+if TYPE_CHECKING:
+    from compiled_board import CompiledBoard
+
 
 @dataclass(frozen=True)
 class Coordinate:
@@ -47,6 +50,41 @@ class MirrorAngle(Enum):
         return self.name.lower()
 
 
+# Helper dictionaries for translating between the board and the game state
+COLOR_MAP = {
+    "Red": Color.RED,
+    "Green": Color.GREEN,
+    "Blue": Color.BLUE,
+    "Yellow": Color.YELLOW
+}
+
+SHAPE_MAP = {
+    "Circle": Shape.CIRCLE,
+    "Square": Shape.SQUARE,
+    "Hexagon": Shape.STAR,   # Hexagon -> Star
+    "Triangle": Shape.TRIANGLE
+}
+
+CHIP_MAP = {
+    "BC": (Color.BLUE, Shape.CIRCLE),
+    "BS": (Color.BLUE, Shape.SQUARE),
+    "BH": (Color.BLUE, Shape.STAR),
+    "BT": (Color.BLUE, Shape.TRIANGLE),
+    "GC": (Color.GREEN, Shape.CIRCLE),
+    "GS": (Color.GREEN, Shape.SQUARE),
+    "GH": (Color.GREEN, Shape.STAR),
+    "GT": (Color.GREEN, Shape.TRIANGLE),
+    "RC": (Color.RED, Shape.CIRCLE),
+    "RS": (Color.RED, Shape.SQUARE),
+    "RH": (Color.RED, Shape.STAR),
+    "RT": (Color.RED, Shape.TRIANGLE),
+    "YC": (Color.YELLOW, Shape.CIRCLE),
+    "YS": (Color.YELLOW, Shape.SQUARE),
+    "YH": (Color.YELLOW, Shape.STAR),
+    "YT": (Color.YELLOW, Shape.TRIANGLE),
+}
+
+
 @dataclass
 class GameState:
     board_size: int
@@ -103,21 +141,154 @@ class Direction(Enum):
     LEFT = 3
 
 
+def encode_move(color: Color, direction: Direction) -> int:
+    """
+    Encode a move in a single byte: `color << 2 | direction`.
+    """
+    return color.value << 2 | direction.value
+
+
+def decode_move(move: int) -> Tuple[Color, Direction]:
+    """
+    Decode a move encoded by `encode_move`.
+    """
+    return Color(move >> 2), Direction(move & 3)
+
+
+@dataclass(frozen=True)
+class Solution:
+    moves: bytes
+    """
+    The moves to play, one byte per move (see `encode_move`).
+    """
+
+    pawns: Tuple[Coordinate, ...]
+    """
+    The coordinates of the pawns once all the moves are played, in the `GameState.pawns` order.
+    """
+
+    def __len__(self):
+        return len(self.moves)
+
+    def decode(self) -> List[Tuple[Color, Direction]]:
+        """
+        Get the moves as (color of the pawn, direction) pairs.
+        """
+        return [decode_move(move) for move in self.moves]
+
+    def __str__(self):
+        # Two letters per move: the color of the pawn and the direction, e.g. "RUGL" for red up, green left
+        return "".join(color.name[0] + direction.name[0] for color, direction in self.decode())
+
+
+class SearchProgress:
+    """
+    Progress of a running search, updated by the resolver and read by other threads (e.g. the UI).
+    Calling `cancel` stops the search, which then returns None.
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        """
+        The number of states expanded so far.
+        """
+        self.depth = 0
+        """
+        The number of moves of the last expanded state.
+        """
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+@dataclass
+class SearchCache:
+    """
+    Search results that stay valid as long as the board layout does not change.
+    Resolvers read and fill it, so a new search started from another pawn configuration of the same board
+    can reuse the work of the previous ones.
+    """
+
+    transpositions: Dict[Tuple[bool, Tuple[Color, Shape], Tuple[Coordinate, ...]], "Solution"] = field(default_factory=dict)
+    """
+    Move sequences already found, indexed by whether they are optimal (`GameResolutionInterface.optimal`),
+    the target and the pawn configuration they start from (same order as `GameState.pawns`).
+    The solutions of the resolvers only moving the target pawn are kept apart: they may be longer than the optimal
+    ones and are never returned by the optimal resolvers.
+    """
+
+
 class GameResolutionInterface(ABC):
     """
     Interface that define how to build resolvers for the game.
+    A resolver only holds the parts shared by all the searches on a board (the compiled board and the search cache),
+    the state of a search lives in `resolve`. The same instance can then be used for many queries and by many threads.
+    """
+
+    optimal = False
+    """
+    Whether the solutions found are optimal, all the pawns being allowed to move.
     """
 
-    def __init__(self, state: GameState):
+    verbose = False
+    """
+    Whether the searches are reported on the standard output (target, known solutions, depths, result).
+    """
+
+    def __init__(self, state: GameState, cache: Optional[SearchCache] = None, board: Optional["CompiledBoard"] = None):
+        """
+        :param state: The default game state to resolve.
+        :param cache: The search cache of the board, a new one is created if not provided.
+        :param board: The compiled board of the state, compiled from `state` if not provided.
+        """
+        from compiled_board import CompiledBoard
+
         self.state = state
+        self.cache = cache if cache is not None else SearchCache()
+        self.board = board if board is not None else CompiledBoard.from_game_state(state)
 
     @abstractmethod
-    def resolve(self) -> Optional[List[Tuple[Color, Coordinate]]]:
+    def resolve(self, state: Optional[GameState] = None, progress: Optional[SearchProgress] = None) -> Optional[Solution]:
         """
         Find the best solution to reach the target.
-        :return: A list of moves in the format to reach the target. None if no solution is found.
+        :param state: The game state to resolve, which must be on the same board. Defaults to the state given at creation.
+        :param progress: If provided, updated during the search, which stops as soon as it is cancelled.
+        :return: The moves to reach the target and the final pawn coordinates. None if no solution is found
+            or if the search was cancelled.
+        """
+
+    def _log(self, *values):
         """
+        Report a step of a search on the standard output, only when `verbose` is set.
+        """
+        if self.verbose:
+            print(*values)
+
+    def _get_known_solution(self, state: GameState) -> Optional[Solution]:
+        """
+        Get the solution of a game state already found by a resolver of the same kind (see `optimal`).
+        """
+        return self.cache.transpositions.get((self.optimal, state.current_target, tuple(state.pawns)))
+
+    def _record_solution(self, state: GameState, solution: Solution):
+        """
+        Store a solution in the cache, along with all its suffixes: each intermediate configuration of a shortest
+        path is itself solved by the rest of the path, as well as the resolver would solve it. The solutions are
+        stored for the resolvers of the same kind only (see `optimal`).
+        :param state: The game state the solution starts from.
+        :param solution: The solution.
+        """
+        current = list(state.pawns)
+        for i, move in enumerate(solution.moves):
+            self.cache.transpositions[(self.optimal, state.current_target, tuple(current))] = Solution(solution.moves[i:], solution.pawns)
+            color, direction = decode_move(move)
+            current[color.value] = self.board.get_pawn_destination(current, color, direction)
+        self.cache.transpositions[(self.optimal, state.current_target, tuple(current))] = Solution(b"", solution.pawns)
+
 
 class Algorithm(Enum):
     BFS = 0
-    A_STAR = 1
\ No newline at end of file
+    A_STAR = 1
+    BFS_VECTORIZED = 2  # Needs numpy
+    BFS_EXTERNAL = 3  # Needs numpy, writes the search layers to disk
\ No newline at end of file
@@ -0,0 +1,76 @@
+import struct
+from typing import Optional
+
+from puzzle_file import TARGET_KEYS
+
+VERSION = 1
+
+# Version, flags, number of robots, target (index in TARGET_KEYS)
+HEADER = struct.Struct("<BBBB")
+BOARD_ID = struct.Struct("<H")
+
+# Flag set when the board is given by its id rather than included
+BY_BOARD_ID = 1
+
+MISSING_CHIP = 255
+
+# Cells are stored in one byte
+MAX_BOARD_SIZE = 16
+
+
+def pack_puzzle(data: dict, board_id: Optional[int] = None) -> bytes:
+    """
+    Get the binary form of a puzzle, a few bytes to send to another process instead of pickling it:
+    - the header: format version, flags, number of robots and target (index in `puzzle_file.TARGET_KEYS`)
+    - the cell of each robot (`y * size + x`), one byte each
+    - the id of the board (2 bytes), or the board: its size, its walls (the hexadecimal digits of
+      `puzzles.encode_board`, two cells per byte) and the cell of each chip of TARGET_KEYS, 255 if absent
+
+    A 16x16 puzzle takes 10 bytes with the id of its board, 153 with the board.
+    :param data: The puzzle in the `puzzles.encode_puzzle` form.
+    :param board_id: The id of its board in the board tables of the workers (see `shared_boards`),
+        the board is included if not provided.
+    """
+    robots = data["robots"]
+    if board_id is not None:
+        size = MAX_BOARD_SIZE
+        board = BOARD_ID.pack(board_id)
+    else:
+        size = data["board"]["size"]
+        if size > MAX_BOARD_SIZE:
+            raise ValueError(f"Boards larger than {MAX_BOARD_SIZE}x{MAX_BOARD_SIZE} can't be packed.")
+        walls = data["board"]["walls"]
+        chips = data["board"]["chips"]
+        board = bytes([size]) + bytes.fromhex(walls + "0" * (len(walls) % 2)) + bytes(
+            chips[key][1] * size + chips[key][0] if key in chips else MISSING_CHIP for key in TARGET_KEYS
+        )
+    header = HEADER.pack(VERSION, BY_BOARD_ID if board_id is not None else 0, len(robots), TARGET_KEYS.index(data["target"]))
+    return header + bytes(y * size + x for x, y in robots) + board
+
+
+def unpack_puzzle(packed: bytes) -> dict:
+    """
+    Get the puzzle of a binary form given by `pack_puzzle`.
+    :return: The puzzle in the `puzzles.encode_puzzle` form, with a "board_id" instead of its board
+        when it was packed with its id.
+    """
+    version, flags, robot_count, target = HEADER.unpack_from(packed)
+    if version != VERSION:
+        raise ValueError(f"Unsupported wire format version: {version}")
+    offset = HEADER.size + robot_count
+    cells = packed[HEADER.size:offset]
+    puzzle = {"target": TARGET_KEYS[target]}
+    if flags & BY_BOARD_ID:
+        size = MAX_BOARD_SIZE
+        puzzle["board_id"], = BOARD_ID.unpack_from(packed, offset)
+    else:
+        size = packed[offset]
+        walls_end = offset + 1 + (size * size + 1) // 2
+        chips = packed[walls_end:walls_end + len(TARGET_KEYS)]
+        puzzle["board"] = {
+            "size": size,
+            "walls": packed[offset + 1:walls_end].hex()[:size * size],
+            "chips": {key: [cell % size, cell // size] for key, cell in zip(TARGET_KEYS, chips) if cell != MISSING_CHIP},
+        }
+    puzzle["robots"] = [[cell % size, cell // size] for cell in cells]
+    return puzzle